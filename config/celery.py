@@ -5,4 +5,20 @@ from celery import Celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Очереди задач: письма по действиям пользователей не ждут
+# массовую рассылку напоминаний, служебные задачи идут в celery
+DEFAULT_QUEUE = 'celery'
+MAIL_QUEUE = 'mail'
+BULK_QUEUE = 'bulk'
+
+app.conf.task_default_queue = DEFAULT_QUEUE
+app.conf.task_routes = {
+    # Напоминания из celery beat, письма по действиям
+    # отправляются TaskManager.launch_task в MAIL_QUEUE
+    'library.tasks.mail_task': {'queue': BULK_QUEUE},
+    'library.tasks.overdue_digest_task': {'queue': BULK_QUEUE},
+    'library.tasks.envelope_mail_task': {'queue': BULK_QUEUE},
+    'users.tasks.import_users_task': {'queue': BULK_QUEUE},
+}
 app.autodiscover_tasks()
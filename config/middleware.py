@@ -0,0 +1,106 @@
+from typing import Union
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def negotiate_encoding(accept_encoding: str) -> Union[str, None]:
+    """Выбор сжатия по заголовку Accept-Encoding
+
+    Учитываются только явно указанные br и gzip с q больше нуля,
+    при равном q предпочитается br, если установлен brotli
+    """
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    accepted = [coding for coding in codings if qualities.get(coding, 0) > 0]
+    if not accepted:
+        return None
+    return max(accepted, key=lambda coding: qualities[coding])
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжатие ответов gzip или brotli
+
+    Ответы короче COMPRESSION_MIN_SIZE, уже сжатые типы
+    из COMPRESSION_SKIP_TYPES и ответы с Cache-Control: no-transform
+    не сжимаются. Потоковые ответы сжимаются по мере отправки
+    """
+
+    def _skip(self, response) -> bool:
+        if response.has_header('Content-Encoding'):
+            return True
+        if (not response.streaming and
+                len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return True
+        if 'no-transform' in response.get('Cache-Control', '').lower():
+            return True
+        content_type = response.get('Content-Type', '').lower()
+        return content_type.startswith(settings.COMPRESSION_SKIP_TYPES)
+
+    def process_response(self, request, response):
+        if self._skip(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if encoding == 'gzip':
+            return super().process_response(request, response)
+        if encoding == 'br':
+            return self._compress_brotli(response)
+        return response
+
+    def _compress_brotli(self, response):
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+        if response.streaming:
+            original_iterator = response.streaming_content
+            if response.is_async:
+                async def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=quality)
+                    async for chunk in original_iterator:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+            else:
+                def brotli_wrapper():
+                    compressor = brotli.Compressor(quality=quality)
+                    for chunk in original_iterator:
+                        data = compressor.process(chunk) + compressor.flush()
+                        if data:
+                            yield data
+                    yield compressor.finish()
+
+            response.streaming_content = brotli_wrapper()
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content,
+                                                 quality=quality,
+                                                 )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,93 @@
+import math
+import codecs
+from typing import Any
+
+import orjson
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from django.conf import settings
+
+# Символы, которые JSONRenderer экранирует для встраивания в JavaScript
+_JS_ESCAPES = ((b'\xe2\x80\xa8', b'\\u2028'),
+               (b'\xe2\x80\xa9', b'\\u2029'),
+               )
+
+
+_encoder = JSONEncoder()
+
+
+def default(obj: Any) -> Any:
+    """Типы, которые orjson не сериализует сам, переводятся
+    кодировщиком DRF, поэтому даты, Decimal и номера телефонов
+    выводятся так же, как в JSONRenderer
+    """
+    return _encoder.default(obj)
+
+
+def has_non_finite(data: Any) -> bool:
+    """Есть ли в данных NaN или бесконечность
+    """
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        data = data.values()
+    elif not isinstance(data, (list, tuple)):
+        return False
+    return any(has_non_finite(item) for item in data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON рендерер на orjson
+
+    Даты и время передаются кодировщику DRF, вывод совпадает
+    с JSONRenderer, кроме записи чисел с плавающей точкой
+    в экспоненциальной форме: orjson пишет 1e16 и 1e-7,
+    json - 1e+16 и 1e-07. Запросы с отступами, нестандартными
+    настройками вывода, значения, которые orjson не может
+    сериализовать, и NaN или бесконечность (orjson пишет их как null,
+    JSONRenderer при STRICT_JSON выбрасывает ошибку) отдаются
+    обычному JSONRenderer
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (self.get_indent(accepted_media_type, renderer_context) or
+                self.ensure_ascii or not self.compact):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # NaN и бесконечность orjson выводит как null, поэтому данные
+        # проверяются только если в ответе есть null
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Общий префикс UTF-8 для U+2028 и U+2029, одна проверка
+        # в обычном случае вместо двух проходов по ответу
+        if b'\xe2\x80' in ret:
+            for char, escape in _JS_ESCAPES:
+                ret = ret.replace(char, escape)
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSON парсер на orjson
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
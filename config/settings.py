@@ -14,6 +14,8 @@ from datetime import timedelta
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 from .utils import find_env
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -70,6 +72,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -120,17 +123,71 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(hours=1)
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
+    "TOKEN_OBTAIN_SERIALIZER":
+        "users.serializers.RoleTokenObtainPairSerializer",
 }
 
+# Снимки пользователей для JWT аутентификации:
+# время жизни в общем кеше, в памяти процесса и размер LRU
+USER_SNAPSHOT_CACHE_TIMEOUT = 300
+USER_SNAPSHOT_LOCAL_TIMEOUT = 30
+USER_SNAPSHOT_LOCAL_SIZE = 1024
+
+# Количество пользователей в одной вставке массового импорта
+USER_IMPORT_CHUNK_SIZE = 1000
+
+# Потоки хэширования паролей массового импорта: хэшеры
+# Django (PBKDF2, Argon2, bcrypt, scrypt) отпускают GIL,
+# поэтому пароли части хэшируются параллельно на всех ядрах
+USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS',
+                                              os.cpu_count() or 1))
+
+# Файлы импорта читателей больше этого размера в байтах
+# API передает задаче Celery вместо импорта в запросе
+USER_IMPORT_SYNC_MAX_SIZE = int(os.environ.get('USER_IMPORT_SYNC_MAX_SIZE',
+                                               64 * 1024))
+
+# Количество книг в одной части импорта каталога
+CATALOG_IMPORT_CHUNK_SIZE = 500
+
+# Количество строк, читаемых серверным курсором за раз при выгрузке
+EXPORT_CHUNK_SIZE = 2000
+
+# Минимальный размер ответа в байтах для сжатия gzip или brotli,
+# потоковые ответы сжимаются всегда
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+# Уровень сжатия brotli от 0 до 11, высокие уровни медленнее gzip
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY',
+                                                5))
+# Уже сжатые типы содержимого, которые не сжимаются повторно
+COMPRESSION_SKIP_TYPES = ('image/',
+                          'video/',
+                          'audio/',
+                          'font/woff',
+                          'application/zip',
+                          'application/gzip',
+                          'application/x-7z-compressed',
+                          'application/x-rar-compressed',
+                          )
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
@@ -159,6 +216,10 @@ else:
         }
     }
 
+# Секционирование таблицы выдач по месяцам (только PostgreSQL)
+ORDER_PARTITIONING = bool(int(os.environ.get('ORDER_PARTITIONING', 0)))
+ORDER_PARTITIONS_AHEAD = 3
+
 
 # CELERY
 
@@ -168,14 +229,66 @@ CELERY_BROKER_URL = os.environ.get("CELERY_BROKER",
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_BACKEND",
                                        "redis://127.0.0.1:6379/0",
                                        )
-CELERY_RESULT_EXTENDED = True
+# Результаты хранятся только у задач с ignore_result=False
+# и недолго, ошибки записываются в library.TaskFailure
+CELERY_RESULT_EXTENDED = False
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXPIRES = int(os.environ.get('CELERY_RESULT_EXPIRES', 3600))
+
+# Повторы отправки письма: экспоненциальная задержка
+# от MAIL_TASK_RETRY_BACKOFF секунд, не больше MAIL_TASK_RETRY_BACKOFF_MAX
+MAIL_TASK_MAX_RETRIES = 5
+MAIL_TASK_RETRY_BACKOFF = 10
+MAIL_TASK_RETRY_BACKOFF_MAX = 600
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_BEAT_SCHEDULER = find_env('DEFAULT_DATABASE_BEAT')
 
 STANDART_HOUR_TO_TASK = 8
 STANDART_MINUTE_TO_TASK = 0
 
+# Окно рассылки напоминаний в минутах от STANDART_HOUR_TO_TASK,
+# 0 - все напоминания в одну минуту
+REMINDER_WINDOW_MINUTES = int(os.environ.get('REMINDER_WINDOW_MINUTES', 0))
+# Напоминаний в минуту внутри окна, 0 - без ограничения
+REMINDER_RATE_PER_MINUTE = int(os.environ.get('REMINDER_RATE_PER_MINUTE', 0))
+# Ключ распределения по окну: order или user
+REMINDER_JITTER_KEY = os.environ.get('REMINDER_JITTER_KEY', 'order')
+# Время жизни счетчиков напоминаний по минутам в кеше, секунды,
+# после него счетчики пересчитываются по базе
+REMINDER_SLOTS_CACHE_TIMEOUT = 300
+
+# Одно письмо о просрочке в день на пользователя
+# вместо периодической задачи на каждую выдачу
+OVERDUE_DIGEST = bool(int(os.environ.get('OVERDUE_DIGEST', 0)))
+
+CELERY_BEAT_SCHEDULE = {
+    'purge_periodic_tasks': {
+        'task': 'library.tasks.purge_periodic_tasks_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'archive_orders': {
+        'task': 'library.tasks.archive_orders_task',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'overdue_digest': {
+        'task': 'library.tasks.overdue_digest_task',
+        'schedule': crontab(hour=STANDART_HOUR_TO_TASK,
+                            minute=STANDART_MINUTE_TO_TASK,
+                            ),
+    },
+    'create_order_partitions': {
+        'task': 'library.tasks.create_order_partitions_task',
+        'schedule': crontab(hour=2, minute=0),
+    },
+}
+
+PURGE_PERIODIC_TASKS_CHUNK_SIZE = 1000
+
+ARCHIVE_ORDERS_AFTER_DAYS = 90
+ARCHIVE_ORDERS_CHUNK_SIZE = 500
+
 TEMPLATE_PERIODICK_TASK_PATH = 'library/template_overdue.html'
+TEMPLATE_OVERDUE_DIGEST_PATH = 'library/template_overdue_digest.html'
 MAIL_SUBJECT_TASK_PATH = 'library/mail_send_subject.txt'
 
 # Password validation
@@ -196,6 +309,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хэшер паролей по умолчанию, например
+# django.contrib.auth.hashers.ScryptPasswordHasher,
+# остальные хэшеры нужны для проверки уже сохраненных паролей
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER')
+if PASSWORD_HASHER:
+    PASSWORD_HASHERS = [PASSWORD_HASHER] + [
+        hasher for hasher in PASSWORD_HASHERS if hasher != PASSWORD_HASHER
+    ]
+
 
 # CORS
 
@@ -213,6 +342,15 @@ if not DOCKER_DEBUG:
         }
     }
 
+# Кеш списка отзыва JWT, должен быть общим для всех процессов.
+# Без Redis кеш по умолчанию свой у каждого процесса, поэтому
+# отзыв хранится в базе (users.TokenRevocation), таблица
+# не кешируется cachalot в том же локальном кеше
+TOKEN_REVOCATION_CACHE = None if DOCKER_DEBUG else 'default'
+CACHALOT_UNCACHABLE_TABLES = frozenset(('django_migrations',
+                                        'users_tokenrevocation',
+                                        ))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -261,6 +399,15 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 EMAIL_ADMIN = EMAIL_HOST_USER
 
+# Количество открытых SMTP соединений на процесс воркера
+MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))
+
+# Асинхронная рассылка ежедневных писем о просрочке
+ASYNC_MAIL = bool(int(os.environ.get('ASYNC_MAIL', 0)))
+ASYNC_MAIL_CONNECTIONS = int(os.environ.get('ASYNC_MAIL_CONNECTIONS', 10))
+# Писем в минуту на домен получателя, 0 - без ограничения
+ASYNC_MAIL_RATE_PER_HOST = int(os.environ.get('ASYNC_MAIL_RATE_PER_HOST', 0))
+
 AUTH_USER_MODEL = 'users.User'
 
 AUTHENTICATION_BACKENDS = [
@@ -1,4 +1,7 @@
 import os
+import csv
+import json
+from typing import Dict, Iterable, Iterator, Tuple, Union
 
 
 def find_env(name_env: str) -> str:
@@ -8,3 +11,30 @@ def find_env(name_env: str) -> str:
     if env is not None:
         return env
     print(f'Warning env with name {name_env} is return None, check you .env')
+
+
+def read_records(stream: Iterable[str],
+                 file_type: str,
+                 ) -> Iterator[Tuple[int, Union[Dict, None]]]:
+    """Построчное чтение CSV или NDJSON без загрузки файла в память
+
+    Returns:
+        Iterator[Tuple[int, Union[Dict, None]]]: Номер строки данных
+        и запись, None - строку не удалось разобрать
+    """
+    if file_type == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+    elif file_type == 'ndjson':
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+    else:
+        raise ValueError(f'{file_type}, неизвестный формат файла')
@@ -7,6 +7,9 @@ from library.models import (Author,
                             Publisher,
                             Volume,
                             Genre,
+                            OrderArchive,
+                            RequestExtensionArchive,
+                            TaskFailure,
                             )
 
 
@@ -77,3 +80,40 @@ class VolumeAdmin(admin.ModelAdmin):
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
     list_display = ('name_en', 'name_ru',)
+
+
+@admin.register(OrderArchive)
+class OrderArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id',
+                    'book',
+                    'tenant',
+                    'count_extensions',
+                    'time_order',
+                    'time_return',
+                    'status',
+                    'archived_at',
+                    )
+
+
+@admin.register(RequestExtensionArchive)
+class RequestExtensionArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id',
+                    'order',
+                    'applicant',
+                    'time_request',
+                    'receiving',
+                    'time_response',
+                    'solution',
+                    'archived_at',
+                    )
+
+
+@admin.register(TaskFailure)
+class TaskFailureAdmin(admin.ModelAdmin):
+    list_display = ('task',
+                    'task_id',
+                    'exception',
+                    'retries',
+                    'failed_at',
+                    'redriven_at',
+                    )
@@ -0,0 +1,117 @@
+import time
+from datetime import date, timedelta
+from typing import Dict, Union
+
+from django.db import transaction
+from django.db.models import BooleanField, Q, QuerySet, Value
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+
+from library.models import (Order,
+                            OrderArchive,
+                            RequestExtension,
+                            RequestExtensionArchive,
+                            )
+
+
+ORDER_FIELDS = ('id',
+                'book_id',
+                'tenant_id',
+                'count_extensions',
+                'time_order',
+                'time_return',
+                'status',
+                )
+
+EXTENSION_FIELDS = ('id',
+                    'order_id',
+                    'applicant_id',
+                    'time_request',
+                    'receiving_id',
+                    'time_response',
+                    'response_text',
+                    'solution',
+                    )
+
+HISTORY_FIELDS = ('id',
+                  'book__name',
+                  'count_extensions',
+                  'time_order',
+                  'time_return',
+                  'status',
+                  )
+
+
+def archive_orders(days: Union[int, None] = None,
+                   chunk_size: Union[int, None] = None,
+                   ) -> Dict:
+    """Перенос закрытых выдач старше days дней и их обработанных
+    запросов на продление в архивные таблицы
+
+    Выдачи с необработанными запросами остаются в рабочей таблице.
+    Каждая часть переносится в отдельной транзакции.
+
+    Returns:
+        Dict: Количество перенесенных выдач, запросов и время работы
+    """
+    if days is None:
+        days = settings.ARCHIVE_ORDERS_AFTER_DAYS
+    if chunk_size is None:
+        chunk_size = settings.ARCHIVE_ORDERS_CHUNK_SIZE
+    if chunk_size <= 0:
+        raise ValueError(f'{chunk_size}, должен быть больше нуля')
+    started = time.monotonic()
+    border = date.today() - timedelta(days=days)
+    pending = RequestExtension.objects.filter(solution='wait')
+    candidates = Order.objects.filter(
+        Q(status='end') &
+        Q(time_return__lt=border),
+        ).exclude(
+            pk__in=pending.values('order_id'),
+        ).order_by('pk')
+    orders_count = 0
+    extensions_count = 0
+    while True:
+        with transaction.atomic():
+            orders = list(candidates.values(*ORDER_FIELDS)[:chunk_size])
+            if not orders:
+                break
+            pks = [order['id'] for order in orders]
+            extensions = list(RequestExtension.objects.filter(
+                order_id__in=pks,
+                ).values(*EXTENSION_FIELDS))
+            OrderArchive.objects.bulk_create(
+                [OrderArchive(**order) for order in orders],
+            )
+            RequestExtensionArchive.objects.bulk_create(
+                [RequestExtensionArchive(**extension)
+                 for extension in extensions],
+            )
+            Order.objects.filter(pk__in=pks).delete()
+        orders_count += len(orders)
+        extensions_count += len(extensions)
+
+    return {
+        'orders': orders_count,
+        'extensions': extensions_count,
+        'runtime': round(time.monotonic() - started, 3),
+    }
+
+
+def get_order_history(user: Union[AbstractUser, None] = None,
+                      ) -> QuerySet:
+    """История выдач из рабочей и архивной таблиц
+    Если указан пользователь, возвращаются только его выдачи
+    """
+    live = Order.objects.get_queryset()
+    archived = OrderArchive.objects.get_queryset()
+    if user is not None:
+        live = live.filter(tenant=user)
+        archived = archived.filter(tenant=user)
+    live = live.order_by().values(*HISTORY_FIELDS).annotate(
+        archived=Value(False, output_field=BooleanField()),
+    )
+    archived = archived.order_by().values(*HISTORY_FIELDS).annotate(
+        archived=Value(True, output_field=BooleanField()),
+    )
+    return live.union(archived, all=True).order_by('-time_order', '-id')
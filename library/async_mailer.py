@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Tuple, Union
+
+import aiosmtplib
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from library.models import TaskFailure
+
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected,
+                    aiosmtplib.SMTPConnectError,
+                    ConnectionError,
+                    )
+
+# Ошибки, которые не исправятся повтором, как PERMANENT_ERRORS в mailer
+PERMANENT_ERRORS = (aiosmtplib.SMTPAuthenticationError,
+                    aiosmtplib.SMTPSenderRefused,
+                    aiosmtplib.SMTPRecipientRefused,
+                    aiosmtplib.SMTPRecipientsRefused,
+                    aiosmtplib.SMTPNotSupported,
+                    )
+
+Envelope = Tuple[str, List[str], bytes]
+
+# Задача, которой перезапускаются неотправленные письма
+ENVELOPE_TASK = 'library.tasks.envelope_mail_task'
+
+
+class HostRateLimiter:
+    """Ограничение количества писем в минуту
+    на домен получателя
+    """
+
+    def __init__(self, rate_per_minute: int = 0) -> None:
+        self.interval = 60 / rate_per_minute if rate_per_minute else 0
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        """Ожидание своей очереди на отправку
+        """
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next.get(host, now))
+        self._next[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class AsyncMailDispatcher:
+    """Асинхронная рассылка писем через несколько
+    SMTP соединений одновременно
+
+    Количество одновременных отправок ограничено семафором,
+    каждая отправка занимает одно соединение из пула
+    """
+
+    def __init__(self,
+                 connections: Union[int, None] = None,
+                 rate_per_host: Union[int, None] = None,
+                 ) -> None:
+        if connections is None:
+            connections = settings.ASYNC_MAIL_CONNECTIONS
+        if rate_per_host is None:
+            rate_per_host = settings.ASYNC_MAIL_RATE_PER_HOST
+        self.connections = connections
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.stats = dict.fromkeys(('opened',
+                                    'reconnects',
+                                    'sent',
+                                    'failed',
+                                    ), 0)
+        self.failed: List[Tuple[Envelope, Exception]] = []
+
+    async def _open(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.EMAIL_HOST,
+            port=int(settings.EMAIL_PORT),
+            username=settings.EMAIL_HOST_USER or None,
+            password=settings.EMAIL_HOST_PASSWORD or None,
+            use_tls=settings.EMAIL_USE_SSL,
+            start_tls=settings.EMAIL_USE_TLS,
+            timeout=settings.EMAIL_TIMEOUT,
+        )
+        await client.connect()
+        self.stats['opened'] += 1
+        return client
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        if self._idle:
+            return self._idle.pop()
+        return await self._open()
+
+    async def _send(self, envelope: Envelope) -> bool:
+        sender, recipients, message = envelope
+        host = recipients[0].rpartition('@')[2].lower()
+        # Очередь домена ожидается без соединения,
+        # иначе письма одного домена занимают весь семафор
+        await self.limiter.wait(host)
+        async with self._semaphore:
+            client = None
+            try:
+                client = await self._acquire()
+                try:
+                    await client.sendmail(sender, recipients, message)
+                except RECONNECT_ERRORS:
+                    client.close()
+                    self.stats['reconnects'] += 1
+                    client = await self._open()
+                    await client.sendmail(sender, recipients, message)
+            except (aiosmtplib.SMTPException, OSError) as error:
+                logger.warning('Письмо для %s не отправлено: %s',
+                               recipients, error)
+                self.stats['failed'] += 1
+                self.failed.append((envelope, error))
+                if client is not None:
+                    client.close()
+                return False
+            self._idle.append(client)
+        self.stats['sent'] += 1
+        return True
+
+    async def send_messages(self, envelopes: List[Envelope]) -> int:
+        """Одновременная отправка писем
+
+        Returns:
+            int: Количество отправленных писем
+        """
+        self._semaphore = asyncio.BoundedSemaphore(self.connections)
+        self._idle: List[aiosmtplib.SMTP] = []
+        try:
+            results = await asyncio.gather(*(self._send(envelope)
+                                             for envelope in envelopes))
+        finally:
+            for client in self._idle:
+                try:
+                    await client.quit()
+                except (aiosmtplib.SMTPException, OSError):
+                    client.close()
+        return sum(results)
+
+
+def to_envelope(message: EmailMessage) -> Envelope:
+    """Письмо Django в отправителя, получателей и тело письма
+    """
+    return (message.from_email,
+            message.recipients(),
+            message.message().as_bytes(linesep='\r\n'),
+            )
+
+
+def record_failures(failed: List[Tuple[Envelope, Exception]]) -> int:
+    """Запись неотправленных писем в TaskFailure,
+    redrive_failed_tasks отправляет их задачей envelope_mail_task
+
+    Returns:
+        int: Количество записанных писем
+    """
+    return len(TaskFailure.objects.bulk_create(
+        TaskFailure(task=ENVELOPE_TASK,
+                    args=[sender, recipients, message.decode()],
+                    exception=repr(error)[:1000],
+                    ) for (sender, recipients, message), error in failed
+    ))
+
+
+def dispatch_messages(messages: Iterable[EmailMessage],
+                      connections: Union[int, None] = None,
+                      rate_per_host: Union[int, None] = None,
+                      ) -> int:
+    """Асинхронная отправка писем из синхронного кода
+    Неотправленные письма записываются в TaskFailure
+
+    Returns:
+        int: Количество отправленных писем
+    """
+    envelopes = [to_envelope(message) for message in messages
+                 if message.recipients()]
+    if not envelopes:
+        return 0
+    dispatcher = AsyncMailDispatcher(connections, rate_per_host)
+    sent = asyncio.run(dispatcher.send_messages(envelopes))
+    logger.info('Статистика асинхронной рассылки: %s', dispatcher.stats)
+    if dispatcher.failed:
+        record_failures(dispatcher.failed)
+    return sent
+
+
+def send_envelope(sender: str,
+                  recipients: List[str],
+                  message: str,
+                  ) -> None:
+    """Отправка одного письма из TaskFailure,
+    ошибка SMTP пробрасывается для повтора задачи
+    """
+    dispatcher = AsyncMailDispatcher(connections=1, rate_per_host=0)
+    if not asyncio.run(dispatcher.send_messages(
+        [(sender, recipients, message.encode())],
+    )):
+        raise dispatcher.failed[0][1]
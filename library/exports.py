@@ -0,0 +1,98 @@
+import csv
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+
+from library.permissions import IsLibrarian, IsSuperUser
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий строку вместо записи
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def render_csv(rows: Iterable[Dict],
+               columns: Tuple[str, ...],
+               ) -> Iterator[str]:
+    """Построчный CSV с BOM, чтобы кириллица открывалась в Excel
+    """
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row.get(column) for column in columns])
+
+
+def render_ndjson(rows: Iterable[Dict],
+                  columns: Tuple[str, ...],
+                  ) -> Iterator[str]:
+    """Построчный NDJSON, по одному объекту на строку
+    """
+    for row in rows:
+        yield json.dumps({column: row.get(column) for column in columns},
+                         cls=DjangoJSONEncoder,
+                         ensure_ascii=False,
+                         ) + '\n'
+
+
+class ExportMixin:
+    """Выгрузка всего списка представления в CSV или NDJSON
+
+    Подмешивается к представлению списка, поэтому фильтры,
+    сортировка и ограничения get_queryset сохраняются. Строки
+    читаются через values() серверным курсором частями
+    по EXPORT_CHUNK_SIZE и сразу отдаются клиенту, память
+    не зависит от размера выгрузки. Пагинация не применяется.
+    """
+    export_fields: Tuple[str, ...] = ()
+    # Колонки из выражений, например F() денормализованного поля
+    export_expressions: Dict[str, Any] = {}
+    export_name = 'export'
+    export_types = {'csv': ('text/csv', render_csv),
+                    'ndjson': ('application/x-ndjson', render_ndjson),
+                    }
+    permission_classes = [permissions.IsAuthenticated &
+                          (IsLibrarian | IsSuperUser)]
+    pagination_class = None
+
+    def get_export_columns(self) -> Tuple[str, ...]:
+        return (*self.export_fields, *self.export_expressions)
+
+    def extend_rows(self, rows: List[Dict]) -> None:
+        """Дополнение части строк перед отправкой,
+        например значениями связей многие ко многим
+        """
+
+    def get_export_rows(self) -> Iterator[Dict]:
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(
+            *self.export_fields,
+            **self.export_expressions,
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        while chunk := list(islice(rows, settings.EXPORT_CHUNK_SIZE)):
+            self.extend_rows(chunk)
+            yield from chunk
+
+    def list(self, request, *args, **kwargs):
+        file_type = request.query_params.get('type', 'csv')
+        if file_type not in self.export_types:
+            return Response({'type': 'Поддерживаются только CSV и NDJSON'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        content_type, render = self.export_types[file_type]
+        response = StreamingHttpResponse(
+            render(self.get_export_rows(), self.get_export_columns()),
+            content_type=f'{content_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.export_name}.{file_type}"'
+        )
+        return response
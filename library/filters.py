@@ -0,0 +1,23 @@
+from typing import Dict, List, Union
+
+from rest_framework.filters import OrderingFilter
+
+
+class AliasOrderingFilter(OrderingFilter):
+    """Сортировка с заменой полей из ordering_aliases представления,
+    например сортировка по author выполняется по authors_display
+    без соединения с авторами
+    """
+
+    def get_ordering(self, request, queryset, view) -> Union[List[str], None]:
+        ordering = super().get_ordering(request, queryset, view)
+        aliases: Dict[str, str] = getattr(view, 'ordering_aliases', {})
+        if not ordering or not aliases:
+            return ordering
+        result = []
+        for term in ordering:
+            descending = term.startswith('-')
+            name = term[1:] if descending else term
+            result.append(('-' if descending else '') +
+                          aliases.get(name, name))
+        return result
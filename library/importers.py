@@ -0,0 +1,377 @@
+import time
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from rest_framework import exceptions
+
+from django.db import IntegrityError, models, transaction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from library.listings import join_names
+from library.models import (Author,
+                            Book,
+                            Genre,
+                            Publisher,
+                            Volume,
+                            )
+from library.serializers import BookCreateSerializer
+from library.validators import VolumeValidator
+
+# Поля книги, которые можно загрузить из файла
+BOOK_FIELDS = ('name',
+               'quantity',
+               'best_seller',
+               'num_of_volume',
+               'age_restriction',
+               'count_pages',
+               'year_published',
+               'circulation',
+               'is_published',
+               )
+PUBLISHER_FIELDS = ('address', 'url', 'email', 'phone')
+BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+# Допустимые типы значений полей книги, издателя и тома
+SCALARS = (str, int, float, type(None))
+
+# Естественные ключи справочников
+NATURAL_KEYS = {Publisher: ('name',),
+                Author: ('first_name', 'last_name'),
+                Genre: ('name_ru',),
+                Volume: ('name',),
+                }
+
+Key = Tuple[str, ...]
+
+
+def split_values(value: Union[str, List, None], field: str) -> List:
+    """Список значений из строки CSV через ";" или списка JSON
+
+    Элементы списка JSON должны быть строками или объектами
+    со строковыми значениями
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    if not isinstance(value, list):
+        raise ValidationError({field: 'Ожидается строка или список'})
+    for item in value:
+        if isinstance(item, dict):
+            if all(isinstance(part, (str, type(None)))
+                   for part in item.values()):
+                continue
+        elif isinstance(item, str):
+            continue
+        raise ValidationError({field: f'{item!r}, ожидается строка '
+                               'или объект со строковыми значениями'})
+    return value
+
+
+class CatalogImporter:
+    """Потоковый импорт каталога книг
+
+    Записи обрабатываются частями по chunk_size. Издатели, авторы,
+    жанры и тома ищутся по естественным ключам в картах в памяти,
+    недостающие догружаются одним запросом на справочник и создаются
+    одной вставкой. Правила валидаторов книги проверяются сразу
+    для всей части, книги и связи с авторами и жанрами
+    вставляются через bulk_create.
+    """
+
+    def __init__(self, chunk_size: Union[int, None] = None) -> None:
+        if chunk_size is None:
+            chunk_size = settings.CATALOG_IMPORT_CHUNK_SIZE
+        if chunk_size <= 0:
+            raise ValueError(f'{chunk_size}, должен быть больше нуля')
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.errors: List[Dict] = []
+        self.references = dict.fromkeys(('publisher',
+                                         'author',
+                                         'genre',
+                                         'volume',
+                                         ), 0)
+        self._maps: Dict[type, Dict[Key, models.Model]] = {
+            model: {} for model in NATURAL_KEYS
+        }
+        self._validators = BookCreateSerializer.Meta.validators
+        self._volume_validator = VolumeValidator('volume', 'num_of_volume')
+
+    def _add_error(self, number: int, errors: Dict) -> None:
+        self.errors.append({'row': number, 'errors': errors})
+
+    @staticmethod
+    def _parse_author(value: Union[str, Dict]) -> Author:
+        if isinstance(value, dict):
+            return Author(first_name=value.get('first_name', ''),
+                          last_name=value.get('last_name', ''),
+                          surname=value.get('surname') or None,
+                          )
+        parts = value.split()
+        if len(parts) < 2:
+            raise ValidationError({'authors': f'{value}, необходимо указать '
+                                   'фамилию и имя автора'})
+        return Author(last_name=parts[0],
+                      first_name=parts[1],
+                      surname=' '.join(parts[2:]) or None,
+                      )
+
+    @staticmethod
+    def _parse_genre(value: Union[str, Dict]) -> Genre:
+        if isinstance(value, dict):
+            return Genre(name_ru=value.get('name_ru', ''),
+                         name_en=value.get('name_en', ''),
+                         )
+        name_ru, _, name_en = value.partition('/')
+        return Genre(name_ru=name_ru.strip(), name_en=name_en.strip())
+
+    def _parse_record(self, record: Dict) -> Tuple[Dict, Dict]:
+        """Поля книги и ссылки на справочники из записи файла
+        """
+        scalar_fields = (BOOK_FIELDS + ('publisher', 'volume') +
+                         tuple(f'publisher_{field}'
+                               for field in PUBLISHER_FIELDS))
+        errors = {field: 'Ожидается строка или число'
+                  for field in scalar_fields
+                  if not isinstance(record.get(field), SCALARS)}
+        if errors:
+            raise ValidationError(errors)
+        data = {}
+        for field in BOOK_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+                value = BOOLEANS.get(value.lower(), value)
+            if value not in (None, ''):
+                data[field] = value
+        book = Book(**data)
+        book.clean_fields(exclude=('publisher', 'volume', 'image'))
+        row = {field: getattr(book, field) for field in BOOK_FIELDS}
+        publisher = Publisher(name=str(record.get('publisher') or '').strip(),
+                              **{field: str(record.get(f'publisher_{field}')
+                                            or '').strip()
+                                 for field in PUBLISHER_FIELDS},
+                              )
+        if not publisher.name:
+            raise ValidationError({'publisher': 'Необходимо указать издателя'})
+        volume = str(record.get('volume') or '').strip()
+        refs = {Publisher: [publisher],
+                Author: [self._parse_author(value)
+                         for value in split_values(record.get('authors'),
+                                                   'authors')],
+                Genre: [self._parse_genre(value)
+                        for value in split_values(record.get('genres'),
+                                                  'genres')],
+                Volume: [Volume(name=volume)] if volume else [],
+                }
+        if not refs[Author]:
+            raise ValidationError({'authors': 'Необходимо указать автора'})
+        if not refs[Genre]:
+            raise ValidationError({'genres': 'Необходимо указать жанр'})
+        return row, refs
+
+    @staticmethod
+    def _key(model: type, instance: models.Model) -> Key:
+        return tuple(getattr(instance, field) for field in NATURAL_KEYS[model])
+
+    def _load(self, model: type, keys: Iterable[Key]) -> None:
+        """Дозагрузка существующих объектов в карту одним запросом
+        """
+        cache = self._maps[model]
+        missing = set(keys) - cache.keys()
+        if not missing:
+            return
+        fields = NATURAL_KEYS[model]
+        filters = {f'{field}__in': {key[index] for key in missing}
+                   for index, field in enumerate(fields)}
+        for instance in model.objects.filter(**filters).order_by('pk'):
+            key = self._key(model, instance)
+            if key in missing:
+                cache.setdefault(key, instance)
+
+    def _create(self, model: type, instances: Dict[Key, models.Model]) -> None:
+        """Создание недостающих объектов одной вставкой,
+        при гонке с другим импортом объекты создаются по одному
+        """
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(instances.values())
+        except IntegrityError:
+            for instance in instances.values():
+                instance.pk = None
+                try:
+                    with transaction.atomic():
+                        instance.save(force_insert=True)
+                except IntegrityError:
+                    instance.pk = None
+        created = {key: instance for key, instance in instances.items()
+                   if instance.pk is not None}
+        self._maps[model].update(created)
+        self.references[model._meta.model_name] += len(created)
+        self._load(model, instances.keys() - created.keys())
+
+    def _resolve(self, model: type, chunk: List[Tuple]) -> Dict[Key, Dict]:
+        """Поиск и создание объектов справочника для части
+
+        Returns:
+            Dict[Key, Dict]: Ошибки по ключам объектов,
+            которые не удалось создать
+        """
+        self._load(model, {self._key(model, instance)
+                           for _, _, refs in chunk
+                           for instance in refs[model]})
+        cache = self._maps[model]
+        new, failed = {}, {}
+        for _, _, refs in chunk:
+            for instance in refs[model]:
+                key = self._key(model, instance)
+                if key in cache or key in new or key in failed:
+                    continue
+                try:
+                    instance.full_clean(validate_unique=False,
+                                        validate_constraints=False,
+                                        )
+                except ValidationError as error:
+                    failed[key] = error.message_dict
+                    continue
+                new[key] = instance
+        if new:
+            self._create(model, new)
+        for key in new:
+            if key not in cache:
+                failed[key] = {model._meta.model_name:
+                               'Значение уже используется'}
+        return failed
+
+    def _insert(self, books: List[Tuple[int, Book, Dict]]) -> None:
+        """Вставка книг и связей с авторами и жанрами,
+        при ошибке целостности книги вставляются по одной
+        """
+        try:
+            with transaction.atomic():
+                Book.objects.bulk_create([book for _, book, _ in books])
+                self._insert_relations(books)
+            self.created += len(books)
+            return
+        except IntegrityError:
+            for _, book, _ in books:
+                book.pk = None
+        for number, book, refs in books:
+            try:
+                with transaction.atomic():
+                    book.save(force_insert=True)
+                    self._insert_relations([(number, book, refs)])
+                self.created += 1
+            except IntegrityError as error:
+                book.pk = None
+                try:
+                    self._volume_validator.check_integrity(book.volume,
+                                                           book.num_of_volume,
+                                                           )
+                except exceptions.ValidationError as field_error:
+                    self._add_error(number, field_error.detail)
+                    continue
+                self._add_error(number, {'row': [str(error)]})
+
+    def _insert_relations(self, books: List[Tuple[int, Book, Dict]]) -> None:
+        for model, field in ((Author, Book.author), (Genre, Book.genre)):
+            through = field.through
+            cache = self._maps[model]
+            pairs = {(book.pk, cache[self._key(model, instance)].pk)
+                     for _, book, refs in books for instance in refs[model]}
+            through.objects.bulk_create([
+                through(**{'book_id': book_id,
+                           f'{model._meta.model_name}_id': related_id})
+                for book_id, related_id in pairs
+            ])
+
+    def _display(self, row: Dict, refs: Dict) -> Dict[str, str]:
+        """Денормализованные имена книги, bulk_create
+        не вызывает сигналы, которые их обновляют
+        """
+        display = {'publisher_name': row['publisher'].name}
+        for model, column in ((Author, 'authors_display'),
+                              (Genre, 'genres_display'),
+                              ):
+            cache = self._maps[model]
+            instances = {cache[self._key(model, instance)].pk:
+                         cache[self._key(model, instance)]
+                         for instance in refs[model]}
+            display[column] = join_names(
+                str(instances[pk]) for pk in sorted(instances)
+            )
+        return display
+
+    def _flush(self, chunk: List[Tuple[int, Dict, Dict]]) -> None:
+        failed = {model: self._resolve(model, chunk) for model in NATURAL_KEYS}
+        rows = []
+        for number, row, refs in chunk:
+            errors = {}
+            for model, instances in refs.items():
+                for instance in instances:
+                    errors.update(failed[model].get(self._key(model,
+                                                              instance), {}))
+            if errors:
+                self._add_error(number, errors)
+                continue
+            row['publisher'] = self._maps[Publisher][
+                self._key(Publisher, refs[Publisher][0])
+            ]
+            row['volume'] = (self._maps[Volume][self._key(Volume,
+                                                          refs[Volume][0])]
+                             if refs[Volume] else None)
+            rows.append((number, row, refs))
+        errors: Dict[int, Dict] = {}
+        for validator in self._validators:
+            for index, error in validator.validate_many(
+                [row for _, row, _ in rows],
+            ).items():
+                errors.setdefault(index, {}).update(error)
+        books = []
+        for index, (number, row, refs) in enumerate(rows):
+            if index in errors:
+                self._add_error(number, errors[index])
+                continue
+            books.append((number,
+                          Book(**row, **self._display(row, refs)),
+                          refs,
+                          ))
+        if books:
+            self._insert(books)
+
+    def run(self,
+            records: Iterable[Tuple[int, Union[Dict, None]]],
+            ) -> Dict[str, Any]:
+        """Импорт записей
+
+        Args:
+            records: Номер строки и запись, например из read_records
+
+        Returns:
+            Dict[str, Any]: Количество созданных книг и справочников,
+            ошибки по строкам и время работы
+        """
+        started = time.monotonic()
+        chunk = []
+        for number, record in records:
+            if record is None:
+                self._add_error(number,
+                                {'row': ['Строку не удалось разобрать']})
+                continue
+            try:
+                row, refs = self._parse_record(record)
+            except ValidationError as error:
+                self._add_error(number, error.message_dict)
+                continue
+            chunk.append((number, row, refs))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+        return {
+            'created': self.created,
+            'references': self.references,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+            'runtime': round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,120 @@
+import re
+from typing import Iterable, List
+
+from django.db import connection, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Replace
+
+from library.models import DISPLAY_SEPARATOR, Book
+
+# Денормализованные поля книги: связь и строка вывода
+# связанного объекта, как в его __str__
+DISPLAY_FIELDS = {
+    'authors_display': ('author', Concat('author__last_name',
+                                         Value(' '),
+                                         'author__first_name',
+                                         )),
+    'genres_display': ('genre', F('genre__name_ru')),
+}
+
+
+# Экранирование символов в именах, порядок замен важен
+DISPLAY_ESCAPES = (('\\', '\\\\'), (';', '\\;'))
+
+_NAME_TOKENS = re.compile(r'\\(.)|(; )|([^\\;]+|[\\;])', re.S)
+
+
+def escape_name(name: str) -> str:
+    """Экранирование разделителя в имени
+    """
+    for char, escape in DISPLAY_ESCAPES:
+        name = name.replace(char, escape)
+    return name
+
+
+def join_names(names: Iterable[str]) -> str:
+    """Строка денормализованного поля из списка имен
+    """
+    return DISPLAY_SEPARATOR.join(escape_name(name) for name in names)
+
+
+def split_names(value: str) -> List[str]:
+    """Список имен из денормализованного поля
+    """
+    if not value:
+        return []
+    names, current = [], []
+    for escaped, separator, text in _NAME_TOKENS.findall(value):
+        if separator:
+            names.append(''.join(current))
+            current = []
+        else:
+            current.append(escaped or text)
+    names.append(''.join(current))
+    return names
+
+
+class OrderedGroupConcat(Subquery):
+    """GROUP_CONCAT SQLite по строкам подзапроса names
+
+    Порядок внутри GROUP_CONCAT не гарантирован,
+    поэтому строки берутся из подзапроса с ORDER BY
+    """
+    template = '(SELECT GROUP_CONCAT(names, %%s) FROM (%(subquery)s))'
+    output_field = models.TextField()
+
+    def __init__(self, queryset, separator: str, **extra) -> None:
+        super().__init__(queryset, **extra)
+        self.separator = separator
+
+    def as_sql(self, compiler, connection, template=None, **extra_context):
+        sql, params = super().as_sql(compiler, connection,
+                                     template, **extra_context)
+        return sql, (self.separator, *params)
+
+
+def display_names(column: str) -> models.Expression:
+    """Строка имен связанных объектов книги одним подзапросом
+    в порядке первичных ключей связанных объектов
+
+    На PostgreSQL имена собираются StringAgg, на остальных
+    базах - GROUP_CONCAT из упорядоченного подзапроса
+    """
+    name, expression = DISPLAY_FIELDS[column]
+    for char, escape in DISPLAY_ESCAPES:
+        expression = Replace(expression, Value(char), Value(escape))
+    through = getattr(Book, name).through.objects.filter(
+        book_id=OuterRef('pk'),
+    )
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.aggregates import StringAgg
+        names = Subquery(through.order_by().values('book_id').annotate(
+            names=StringAgg(expression,
+                            delimiter=DISPLAY_SEPARATOR,
+                            ordering=f'{name}_id',
+                            ),
+        ).values('names'))
+    else:
+        names = OrderedGroupConcat(
+            through.order_by(f'{name}_id').values(names=expression),
+            DISPLAY_SEPARATOR,
+        )
+    return Coalesce(names, Value(''))
+
+
+def refresh_display(books: Iterable,
+                    columns: Iterable[str] = tuple(DISPLAY_FIELDS),
+                    ) -> int:
+    """Пересчет денормализованных имен авторов и жанров
+    одним UPDATE
+
+    Args:
+        books: Первичные ключи книг или запрос с ними
+        columns: Пересчитываемые поля
+
+    Returns:
+        int: Количество обновленных книг
+    """
+    return Book.objects.filter(pk__in=books).update(**{
+        column: display_names(column) for column in columns
+    })
@@ -0,0 +1,146 @@
+import socket
+import logging
+import smtplib
+import threading
+from typing import Dict, List, Sequence
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected,
+                    ConnectionError,
+                    socket.timeout,
+                    )
+
+# Ошибки, которые не исправятся повтором: неверные учетные данные,
+# отклоненный отправитель или получатели
+PERMANENT_ERRORS = (smtplib.SMTPAuthenticationError,
+                    smtplib.SMTPSenderRefused,
+                    smtplib.SMTPRecipientsRefused,
+                    smtplib.SMTPNotSupportedError,
+                    )
+
+
+class MailConnectionPool:
+    """Пул открытых соединений почтового бэкенда,
+    один на процесс воркера
+
+    Соединение берется из пула на время отправки пачки писем
+    и возвращается обратно открытым. Оборванное соединение
+    переоткрывается, письмо отправляется повторно один раз.
+    """
+
+    def __init__(self, size: int = None) -> None:
+        self._size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(('opened',
+                                     'reused',
+                                     'reconnects',
+                                     'sent',
+                                     ), 0)
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            return settings.MAIL_POOL_SIZE
+        return self._size
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += value
+
+    def _open(self):
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        self._count('opened')
+        return connection
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+        return self._open()
+
+    def _release(self, connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        self._discard(connection)
+
+    @staticmethod
+    def _discard(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def send_messages(self, messages: Sequence[EmailMessage]) -> int:
+        """Отправка пачки писем через соединение из пула
+
+        Письма отправляются по одному, поэтому после обрыва
+        повторно уходит только неотправленное письмо
+
+        Returns:
+            int: Количество отправленных писем
+        """
+        if not messages:
+            return 0
+        sent = 0
+        connection = self._acquire()
+        try:
+            for message in messages:
+                try:
+                    sent += connection.send_messages([message]) or 0
+                except RECONNECT_ERRORS:
+                    self._discard(connection)
+                    self._count('reconnects')
+                    connection = self._open()
+                    sent += connection.send_messages([message]) or 0
+        except Exception:
+            self._discard(connection)
+            raise
+        finally:
+            self._count('sent', sent)
+        self._release(connection)
+        return sent
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики открытых, переиспользованных
+        и переоткрытых соединений
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        return stats
+
+    def close(self) -> None:
+        """Закрытие всех свободных соединений
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+    def reset(self) -> None:
+        """Сброс пула без закрытия соединений,
+        используется в дочернем процессе после fork
+        """
+        with self._lock:
+            self._idle = []
+            for key in self._stats:
+                self._stats[key] = 0
+
+
+mail_pool = MailConnectionPool()
+
+
+def send_messages(messages: List[EmailMessage]) -> int:
+    """Отправка писем через пул соединений процесса
+    """
+    return mail_pool.send_messages(messages)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from library.archive import archive_orders
+
+
+class Command(BaseCommand):
+    """Перенос закрытых выдач и обработанных запросов в архив
+    """
+    help = 'Переносит закрытые выдачи и их запросы в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days',
+                            type=int,
+                            default=None,
+                            help='Архивировать выдачи, закрытые раньше '
+                            'указанного количества дней',
+                            )
+        parser.add_argument('--chunk-size',
+                            type=int,
+                            default=None,
+                            help='Количество выдач, переносимых за '
+                            'одну транзакцию',
+                            )
+
+    def handle(self, *args, **options):
+        report = archive_orders(options['days'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено выдач: {report["orders"]}, '
+            f'запросов: {report["extensions"]}, '
+            f'время: {report["runtime"]} сек.'
+        ))
@@ -0,0 +1,93 @@
+import io
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from django.core.management.base import BaseCommand
+
+from config.renderers import ORJSONParser, ORJSONRenderer
+
+
+def build_page(rows: int) -> OrderedDict:
+    """Страница списка книг в том виде,
+    в котором ее отдает BookListAPIView
+    """
+    results = ReturnList(serializer=None)
+    for number in range(rows):
+        results.append(OrderedDict((
+            ('author', ['Толстой Лев', f'author_last author{number}']),
+            ('publisher', 'publisher'),
+            ('name', f'Война и мир {number}'),
+            ('image', None),
+            ('best_seller', bool(number % 2)),
+            ('volume', 'fantasy_volume'),
+            ('num_of_volume', number),
+            ('age_restriction', 16),
+            ('count_pages', 300 + number),
+            ('year_published', 2015),
+            ('genre', ['Фэнтези', 'Роман']),
+            ('circulation', 1203),
+            ('is_published', True),
+            ('time_request', datetime(2024, 5, 1, 10, 30, number % 60,
+                                      123456, tzinfo=timezone.utc)),
+        )))
+    return OrderedDict((('count', rows),
+                        ('next', 'http://localhost/api/book/list/?page=2'),
+                        ('previous', None),
+                        ('results', results),
+                        ))
+
+
+class Command(BaseCommand):
+    """Сравнение скорости JSONRenderer и ORJSONRenderer
+    """
+    help = 'Замеряет время рендера и разбора JSON страницы списка'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows',
+                            type=int,
+                            default=1000,
+                            help='Количество записей на странице',
+                            )
+        parser.add_argument('--repeat',
+                            type=int,
+                            default=50,
+                            help='Количество повторов',
+                            )
+
+    def _measure(self, func, repeat: int) -> float:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def handle(self, *args, **options):
+        page = build_page(options['rows'])
+        repeat = options['repeat']
+        results = {}
+        for name, renderer, parser in (
+            ('json', JSONRenderer(), JSONParser()),
+            ('orjson', ORJSONRenderer(), ORJSONParser()),
+        ):
+            content = renderer.render(page)
+            results[name] = (
+                content,
+                self._measure(lambda: renderer.render(page), repeat),
+                self._measure(lambda: parser.parse(io.BytesIO(content)),
+                              repeat),
+            )
+        for name, (content, render, parse) in results.items():
+            self.stdout.write(f'{name}: рендер {render:.2f} мс, '
+                              f'разбор {parse:.2f} мс, '
+                              f'{len(content)} байт')
+        identical = results['json'][0] == results['orjson'][0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение рендера: '
+            f'{results["json"][1] / results["orjson"][1]:.1f}x, '
+            f'разбора: {results["json"][2] / results["orjson"][2]:.1f}x, '
+            f'вывод совпадает: {"да" if identical else "нет"}'
+        ))
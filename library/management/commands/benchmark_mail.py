@@ -0,0 +1,88 @@
+import time
+import asyncio
+
+from aiosmtpd.controller import Controller
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from library.mailer import MailConnectionPool
+from library.async_mailer import dispatch_messages
+
+
+class SlowHandler:
+    """Обработчик локального SMTP сервера
+    с задержкой ответа на каждое письмо
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        return '250 OK'
+
+
+class Command(BaseCommand):
+    """Сравнение синхронной и асинхронной рассылки
+    на локальном SMTP сервере
+    """
+    help = 'Замеряет скорость отправки писем на локальный SMTP сервер'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages',
+                            type=int,
+                            default=200,
+                            help='Количество писем',
+                            )
+        parser.add_argument('--connections',
+                            type=int,
+                            default=10,
+                            help='Количество асинхронных соединений',
+                            )
+        parser.add_argument('--delay',
+                            type=int,
+                            default=20,
+                            help='Задержка сервера на письмо, мс',
+                            )
+
+    def handle(self, *args, **options):
+        controller = Controller(SlowHandler(options['delay'] / 1000),
+                                hostname='127.0.0.1',
+                                )
+        controller.start()
+        messages = [EmailMessage('subject',
+                                 'body',
+                                 'library@gmail.com',
+                                 [f'user{number}@gmail.com'],
+                                 ) for number in range(options['messages'])]
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST=controller.hostname,
+                EMAIL_PORT=controller.port,
+                EMAIL_HOST_USER='',
+                EMAIL_HOST_PASSWORD='',
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+            ):
+                pool = MailConnectionPool(size=1)
+                start = time.perf_counter()
+                pool.send_messages(messages)
+                sync_time = time.perf_counter() - start
+                pool.close()
+
+                start = time.perf_counter()
+                dispatch_messages(messages, options['connections'], 0)
+                async_time = time.perf_counter() - start
+        finally:
+            controller.stop()
+
+        for name, runtime in (('Синхронно', sync_time),
+                              ('Асинхронно', async_time),
+                              ):
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {runtime:.2f} сек., '
+                f'{len(messages) / runtime:.0f} писем/сек.'
+            ))
@@ -0,0 +1,54 @@
+import os
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importers import CatalogImporter
+from config.utils import read_records
+
+
+class Command(BaseCommand):
+    """Потоковый импорт каталога книг из файла
+    """
+    help = ('Создает книги, недостающих издателей, авторов, жанры и тома '
+            'из CSV или NDJSON файла')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу')
+        parser.add_argument('--type',
+                            choices=('csv', 'ndjson'),
+                            default=None,
+                            help='Формат файла, по умолчанию '
+                            'по расширению',
+                            )
+        parser.add_argument('--chunk-size',
+                            type=int,
+                            default=None,
+                            help='Количество книг в одной части импорта',
+                            )
+        parser.add_argument('--report',
+                            default=None,
+                            help='Путь для сохранения ошибок по строкам',
+                            )
+
+    def handle(self, *args, **options):
+        file_type = (options['type'] or
+                     os.path.splitext(options['path'])[1].lstrip('.').lower())
+        if file_type not in ('csv', 'ndjson'):
+            raise CommandError('Поддерживаются только CSV и NDJSON')
+        with open(options['path'], encoding='utf-8-sig', newline='') as file:
+            report = CatalogImporter(options['chunk_size']).run(
+                read_records(file, file_type),
+            )
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                for error in report['errors']:
+                    file.write(json.dumps(error, ensure_ascii=False) + '\n')
+        references = ', '.join(f'{name}: {count}' for name, count
+                               in report['references'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано книг: {report["created"]}, '
+            f'справочников: {references}, '
+            f'ошибок: {len(report["errors"])}, '
+            f'время: {report["runtime"]} сек.'
+        ))
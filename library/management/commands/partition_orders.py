@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from library.partitions import (create_order_partitions,
+                                partition_order_table,
+                                unpartition_order_table,
+                                )
+
+
+class Command(BaseCommand):
+    """Перевод таблицы выдач в секционированную и обратно
+
+    Нужна, если ORDER_PARTITIONING включен или выключен
+    после применения миграции 0009
+    """
+    help = 'Секционирует таблицу выдач по месяцам (только PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revert',
+                            action='store_true',
+                            help='Вернуть обычную таблицу выдач',
+                            )
+
+    def handle(self, *args, **options):
+        if options['revert']:
+            changed = unpartition_order_table()
+            message = 'Таблица выдач больше не секционирована'
+        else:
+            changed = partition_order_table()
+            create_order_partitions()
+            message = 'Таблица выдач секционирована по месяцам'
+        if not changed:
+            message = ('Таблица выдач уже в нужном состоянии '
+                       'или база не PostgreSQL')
+        self.stdout.write(self.style.SUCCESS(message))
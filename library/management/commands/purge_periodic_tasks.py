@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from library.task_manager import TaskManager
+
+
+class Command(BaseCommand):
+    """Удаление накопившихся отключенных периодических задач выдач
+    """
+    help = 'Удаляет отключенные периодические задачи закрытых выдач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size',
+                            type=int,
+                            default=None,
+                            help='Количество задач, удаляемых за один запрос',
+                            )
+
+    def handle(self, *args, **options):
+        report = TaskManager.purge_periodic_tasks(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено задач: {report["deleted"]}, '
+            f'частей: {report["chunks"]}, '
+            f'время: {report["runtime"]} сек.'
+        ))
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from library.models import TaskFailure
+from config.celery import MAIL_QUEUE, app
+
+
+class Command(BaseCommand):
+    """Повторная постановка упавших задач в очередь
+    """
+    help = 'Ставит задачи из TaskFailure обратно в очередь Celery'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task',
+                            default=None,
+                            help='Имя задачи, например '
+                            'library.tasks.mail_task',
+                            )
+        parser.add_argument('--limit',
+                            type=int,
+                            default=None,
+                            help='Максимальное количество задач',
+                            )
+        parser.add_argument('--chunk-size',
+                            type=int,
+                            default=500,
+                            help='Количество задач, отправляемых '
+                            'через одно соединение с брокером',
+                            )
+
+    def handle(self, *args, **options):
+        failures = TaskFailure.objects.filter(
+            redriven_at__isnull=True,
+        ).order_by('pk')
+        if options['task']:
+            failures = failures.filter(task=options['task'])
+        failures = failures.values_list('pk', 'task', 'args', 'kwargs')
+        if options['limit']:
+            failures = failures[:options['limit']]
+
+        redriven = 0
+        chunk = []
+        for failure in failures.iterator(chunk_size=options['chunk_size']):
+            chunk.append(failure)
+            if len(chunk) >= options['chunk_size']:
+                redriven += self._redrive(chunk)
+                chunk = []
+        if chunk:
+            redriven += self._redrive(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перезапущено задач: {redriven}',
+        ))
+
+    def _queue(self, task, args, kwargs):
+        """Очередь задачи: транзакционные письма возвращаются
+        в приоритетную MAIL_QUEUE, остальные идут по маршрутам
+        """
+        if task != 'library.tasks.mail_task':
+            return None
+        template = kwargs.get('template')
+        if template is None and len(args) > 1:
+            template = args[1]
+        if template == settings.TEMPLATE_PERIODICK_TASK_PATH:
+            return None
+        return MAIL_QUEUE
+
+    def _redrive(self, chunk):
+        with app.producer_or_acquire() as producer:
+            for _, task, args, kwargs in chunk:
+                app.send_task(task, args, kwargs,
+                              queue=self._queue(task, args, kwargs),
+                              producer=producer,
+                              )
+        return TaskFailure.objects.filter(
+            pk__in=[pk for pk, *_ in chunk],
+        ).update(redriven_at=timezone.now())
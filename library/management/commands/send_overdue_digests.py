@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from library.services import (build_overdue_digest,
+                              get_overdue_digests,
+                              send_overdue_digests,
+                              )
+from library.async_mailer import dispatch_messages
+
+
+class Command(BaseCommand):
+    """Отправка ежедневных писем о просрочке
+    """
+    help = 'Отправляет письма о просрочке, одно письмо на пользователя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--async',
+                            action='store_true',
+                            dest='use_async',
+                            help='Отправлять письма асинхронно',
+                            )
+        parser.add_argument('--connections',
+                            type=int,
+                            default=None,
+                            help='Количество одновременных SMTP соединений',
+                            )
+        parser.add_argument('--rate',
+                            type=int,
+                            default=None,
+                            help='Писем в минуту на домен получателя',
+                            )
+
+    def handle(self, *args, **options):
+        if options['use_async']:
+            sent = dispatch_messages(
+                (build_overdue_digest(tenant, orders)
+                 for tenant, orders in get_overdue_digests()),
+                options['connections'],
+                options['rate'],
+            )
+        else:
+            sent = send_overdue_digests(use_async=False)
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
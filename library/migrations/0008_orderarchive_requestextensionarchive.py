@@ -0,0 +1,53 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0007_alter_order_tenant_alter_requestextension_applicant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Номер выдачи в таблице выдач', primary_key=True, serialize=False, verbose_name='номер выдачи')),
+                ('count_extensions', models.SmallIntegerField(default=0, help_text='Количество сделанных продлений', verbose_name='продления')),
+                ('time_order', models.DateField(help_text='Время когда книга была выдана', verbose_name='время выдачи')),
+                ('time_return', models.DateField(help_text='Время когда книга была возвращена', verbose_name='время возврата')),
+                ('status', models.CharField(help_text='Статус выдачи на момент архивации', max_length=30, verbose_name='статус')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Время переноса в архив', verbose_name='время архивации')),
+                ('book', models.ForeignKey(help_text='Книга которую выдали', null=True, on_delete=django.db.models.deletion.SET_NULL, to='library.book', verbose_name='книга')),
+                ('tenant', models.ForeignKey(help_text='На кого была выдана книга', null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'архивная выдача',
+                'verbose_name_plural': 'архивные выдачи',
+                'ordering': ['time_order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestExtensionArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Номер запроса в таблице запросов', primary_key=True, serialize=False, verbose_name='номер запроса')),
+                ('time_request', models.DateTimeField(help_text='Время запроса', verbose_name='время запроса')),
+                ('time_response', models.DateTimeField(help_text='Время ответа', verbose_name='время ответа')),
+                ('response_text', models.TextField(blank=True, help_text='Письменный ответ от библиотекаря', null=True, verbose_name='ответ')),
+                ('solution', models.CharField(help_text='Принятое решение библиотекарем', max_length=30, verbose_name='решение')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Время переноса в архив', verbose_name='время архивации')),
+                ('applicant', models.ForeignKey(help_text='Заявщик который хотел продлить', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_extensions', to=settings.AUTH_USER_MODEL, verbose_name='заявщик')),
+                ('order', models.ForeignKey(help_text='Архивная выдача книги', on_delete=django.db.models.deletion.CASCADE, related_name='extensions', to='library.orderarchive', verbose_name='выдача')),
+                ('receiving', models.ForeignKey(help_text='Библиотекарь который обработал запрос', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='received_archived_extensions', to=settings.AUTH_USER_MODEL, verbose_name='принимающий')),
+            ],
+            options={
+                'verbose_name': 'архивный запрос',
+                'verbose_name_plural': 'архивные запросы',
+                'ordering': ['time_request'],
+            },
+        ),
+    ]
@@ -0,0 +1,166 @@
+"""Перевод таблицы выдач в секционированную по месяцам time_order
+
+Выполняется только на PostgreSQL при включенном ORDER_PARTITIONING,
+на остальных базах миграция ничего не делает.
+
+Первичный ключ секционированной таблицы должен включать ключ
+секционирования, поэтому он становится (id, time_order), а внешний ключ
+library_requestextension.order_id удаляется на уровне базы данных -
+каскадное удаление запросов выполняет Django.
+
+Если ORDER_PARTITIONING включен после применения миграции, таблица
+переводится командой python manage.py partition_orders.
+
+Имена таблиц и SQL зафиксированы в миграции и не зависят
+от текущих моделей и library.partitions.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+
+ORDER_TABLE = 'library_order'
+
+PARTITIONS_AHEAD = 3
+
+
+def month_bounds(day, shift=0):
+    index = day.year * 12 + day.month - 1 + shift
+    start = date(index // 12, index % 12 + 1, 1)
+    index += 1
+    end = date(index // 12, index % 12 + 1, 1)
+    return start, end
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table '
+        'WHERE partrelid = to_regclass(%s)',
+        [ORDER_TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def create_partition_sql(quote, start, end):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {quote(f"{ORDER_TABLE}_p{start:%Y%m}")} '
+        f'PARTITION OF {quote(ORDER_TABLE)} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def _tables(apps):
+    user = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    return (ORDER_TABLE,
+            'library_book',
+            'library_requestextension',
+            user._meta.db_table,
+            )
+
+
+def _add_relations(cursor, quote, table, book, user):
+    cursor.execute(f'CREATE INDEX {quote(table + "_book_id_idx")} '
+                   f'ON {quote(table)} (book_id)')
+    cursor.execute(f'CREATE INDEX {quote(table + "_tenant_id_idx")} '
+                   f'ON {quote(table)} (tenant_id)')
+    cursor.execute(f'ALTER TABLE {quote(table)} '
+                   f'ADD CONSTRAINT {quote(table + "_book_id_fk")} '
+                   f'FOREIGN KEY (book_id) REFERENCES {quote(book)} (id) '
+                   'DEFERRABLE INITIALLY DEFERRED')
+    cursor.execute(f'ALTER TABLE {quote(table)} '
+                   f'ADD CONSTRAINT {quote(table + "_tenant_id_fk")} '
+                   f'FOREIGN KEY (tenant_id) REFERENCES {quote(user)} (id) '
+                   'DEFERRABLE INITIALLY DEFERRED')
+
+
+def partition_order(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or not settings.ORDER_PARTITIONING:
+        return
+    quote = connection.ops.quote_name
+    table, book, extension, user = _tables(apps)
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        cursor.execute(
+            'SELECT conrelid::regclass::text, conname FROM pg_constraint '
+            "WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [table],
+        )
+        for referencing, name in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {referencing} '
+                           f'DROP CONSTRAINT {quote(name)}')
+        cursor.execute(f'SELECT MIN(time_order) FROM {quote(table)}')
+        first = cursor.fetchone()[0] or date.today()
+
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       f'RENAME TO {quote(legacy)}')
+        cursor.execute(f'CREATE TABLE {quote(table)} '
+                       f'(LIKE {quote(legacy)}) '
+                       'PARTITION BY RANGE (time_order)')
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       'ADD PRIMARY KEY (id, time_order)')
+
+        start, end = month_bounds(first)
+        last, _ = month_bounds(date.today(), PARTITIONS_AHEAD)
+        while start <= last:
+            cursor.execute(create_partition_sql(quote, start, end))
+            start, end = month_bounds(start, 1)
+        cursor.execute(f'CREATE TABLE {quote(table + "_default")} '
+                       f'PARTITION OF {quote(table)} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {quote(table)} '
+                       f'SELECT * FROM {quote(legacy)}')
+        cursor.execute(f'DROP TABLE {quote(legacy)}')
+        _add_relations(cursor, quote, table, book, user)
+        cursor.execute(f'CREATE SEQUENCE {quote(sequence)} '
+                       f'OWNED BY {quote(table)}.id')
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id '
+                       f"SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f"SELECT setval('{sequence}', "
+                       'COALESCE(MAX(id), 0) + 1, false) '
+                       f'FROM {quote(table)}')
+
+
+def unpartition_order(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    table, book, extension, user = _tables(apps)
+    partitioned = f'{table}_partitioned'
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       f'RENAME TO {quote(partitioned)}')
+        cursor.execute(f'CREATE TABLE {quote(table)} '
+                       f'(LIKE {quote(partitioned)})')
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id)')
+        cursor.execute(f'INSERT INTO {quote(table)} '
+                       f'SELECT * FROM {quote(partitioned)}')
+        cursor.execute(f'DROP TABLE {quote(partitioned)} CASCADE')
+        _add_relations(cursor, quote, table, book, user)
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id '
+                       'ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', "
+                       "'id'), COALESCE(MAX(id), 0) + 1, false) "
+                       f'FROM {quote(table)}')
+        cursor.execute(f'ALTER TABLE {quote(extension)} '
+                       f'ADD CONSTRAINT {quote(extension + "_order_id_fk")} '
+                       f'FOREIGN KEY (order_id) REFERENCES {quote(table)} '
+                       '(id) DEFERRABLE INITIALLY DEFERRED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_orderarchive_requestextensionarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_order, unpartition_order),
+    ]
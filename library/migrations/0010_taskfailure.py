@@ -0,0 +1,30 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0009_partition_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskFailure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Имя задачи Celery', max_length=255, verbose_name='задача')),
+                ('task_id', models.CharField(help_text='Идентификатор задачи Celery', max_length=255, verbose_name='идентификатор')),
+                ('args', models.JSONField(default=list, help_text='Позиционные аргументы задачи', verbose_name='аргументы')),
+                ('kwargs', models.JSONField(default=dict, help_text='Именованные аргументы задачи', verbose_name='именованные аргументы')),
+                ('exception', models.TextField(help_text='Последняя ошибка задачи', verbose_name='ошибка')),
+                ('failed_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='Время падения задачи', verbose_name='время ошибки')),
+            ],
+            options={
+                'verbose_name': 'ошибка задачи',
+                'verbose_name_plural': 'ошибки задач',
+                'ordering': ['-failed_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_taskfailure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskfailure',
+            name='redriven_at',
+            field=models.DateTimeField(blank=True, help_text='Время повторной постановки задачи в очередь', null=True, verbose_name='время перезапуска'),
+        ),
+        migrations.AddField(
+            model_name='taskfailure',
+            name='retries',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Количество сделанных повторов', verbose_name='повторы'),
+        ),
+    ]
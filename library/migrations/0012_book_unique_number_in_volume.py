@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0011_taskfailure_retries'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.UniqueConstraint(fields=('volume', 'num_of_volume'), name='unique_book_number_in_volume'),
+        ),
+    ]
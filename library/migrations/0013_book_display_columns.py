@@ -0,0 +1,92 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+# Разделитель и экранирование, как в library.listings
+SEPARATOR = '; '
+ESCAPES = (('\\', '\\\\'), (';', '\\;'))
+BATCH_SIZE = 1000
+
+
+def _join(names):
+    escaped = []
+    for name in names:
+        for char, escape in ESCAPES:
+            name = name.replace(char, escape)
+        escaped.append(name)
+    return SEPARATOR.join(escaped)
+
+
+def _names(through, ids, relation, *fields):
+    """Имена связанных объектов книг по первичному ключу объекта
+    """
+    names = {}
+    for book_id, *values in through.objects.filter(
+        book_id__in=ids,
+    ).values_list(
+        'book_id', *(f'{relation}__{field}' for field in fields),
+    ).order_by(f'{relation}_id'):
+        names.setdefault(book_id, []).append(' '.join(values))
+    return names
+
+
+def fill_display_columns(apps, schema_editor):
+    """Заполнение имен авторов, жанров и издателя существующих книг
+    """
+    book = apps.get_model('library', 'Book')
+    queryset = book.objects.select_related('publisher').only(
+        'pk', 'publisher__name',
+    ).order_by('pk')
+    last_pk = 0
+    while books := list(queryset.filter(pk__gt=last_pk)[:BATCH_SIZE]):
+        ids = [instance.pk for instance in books]
+        authors = _names(book.author.through, ids,
+                         'author', 'last_name', 'first_name')
+        genres = _names(book.genre.through, ids, 'genre', 'name_ru')
+        for instance in books:
+            instance.authors_display = _join(authors.get(instance.pk, ()))
+            instance.genres_display = _join(genres.get(instance.pk, ()))
+            instance.publisher_name = instance.publisher.name
+        book.objects.bulk_update(books, ('authors_display',
+                                         'genres_display',
+                                         'publisher_name',
+                                         ))
+        last_pk = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0012_book_unique_number_in_volume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='authors_display',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Авторы через "; ", ";" в именах экранируется, обновляются сигналами', verbose_name='авторы для вывода'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='genres_display',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Жанры через "; ", ";" в именах экранируется, обновляются сигналами', verbose_name='жанры для вывода'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='publisher_name',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Название издателя, обновляется сигналами', max_length=200, verbose_name='название издателя'),
+        ),
+        migrations.RunPython(fill_display_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['authors_display'], name='book_authors_display_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genres_display'], name='book_genres_display_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publisher_name'], name='book_publisher_name_idx'),
+        ),
+    ]
@@ -0,0 +1,141 @@
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from rest_framework.exceptions import ValidationError
+
+from django.db.models import Prefetch, QuerySet
+from django.core.exceptions import FieldDoesNotExist
+
+
+def _flatten(related: Dict, prefix: str = '') -> List[str]:
+    """Пути select_related из вложенного словаря запроса
+    """
+    lookups = []
+    for name, nested in related.items():
+        lookup = f'{prefix}{name}'
+        children = _flatten(nested, f'{lookup}__')
+        lookups.extend(children or [lookup])
+    return lookups
+
+
+class SparseFieldsSerializerMixin:
+    """Сериализатор с выбором выводимых полей
+
+    fields - оставить только перечисленные поля, omit - убрать поля.
+    Поля из optional_fields выводятся, только если переданы в fields
+    """
+    optional_fields: Tuple[str, ...] = ()
+
+    def __init__(self,
+                 *args,
+                 fields: Union[Iterable[str], None] = None,
+                 omit: Union[Iterable[str], None] = None,
+                 **kwargs,
+                 ) -> None:
+        super().__init__(*args, **kwargs)
+        keep = set(self.fields) if fields is None else set(fields)
+        if fields is None:
+            keep -= set(self.optional_fields)
+        keep -= set(omit or ())
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """Параметры ?fields= и ?omit= для представлений
+    просмотра и списка
+
+    Лишние поля убираются из сериализатора, а из запроса убираются
+    select_related и prefetch_related для этих полей. Если все
+    оставшиеся поля - поля модели, запрос ограничивается .only()
+    """
+    fields_param = 'fields'
+    omit_param = 'omit'
+    _available_fields: Dict[type, Tuple[str, ...]] = {}
+    _sparse_fields = None
+
+    def _get_names(self, param: str) -> Union[Set[str], None]:
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    @classmethod
+    def get_available_fields(cls, serializer_class) -> Tuple[str, ...]:
+        """Все поля сериализатора, включая optional_fields
+
+        Поля собираются один раз на класс сериализатора,
+        построение полей ModelSerializer дорогое
+        """
+        if serializer_class not in cls._available_fields:
+            cls._available_fields[serializer_class] = tuple(
+                serializer_class().get_fields(),
+            )
+        return cls._available_fields[serializer_class]
+
+    def get_sparse_fields(self) -> Tuple[Union[Set[str], None],
+                                         Union[Set[str], None]]:
+        """Запрошенные и исключенные поля из параметров запроса
+        """
+        request = getattr(self, 'request', None)
+        if request is None:
+            return None, None
+        if self._sparse_fields is not None:
+            return self._sparse_fields
+        fields = self._get_names(self.fields_param)
+        omit = self._get_names(self.omit_param)
+        available = set(self.get_available_fields(self.get_serializer_class()))
+        unknown = ((fields or set()) | (omit or set())) - available
+        if unknown:
+            raise ValidationError({
+                self.fields_param: f'Неизвестные поля: '
+                f'{", ".join(sorted(unknown))}',
+            })
+        self._sparse_fields = fields, omit
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields, omit = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        if omit is not None:
+            kwargs.setdefault('omit', omit)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()
+        fields, omit = self.get_sparse_fields()
+        if fields is None and omit is None:
+            return queryset
+        serializer = self.get_serializer()
+        return self.prune_queryset(queryset, serializer.fields.values())
+
+    @staticmethod
+    def prune_queryset(queryset: QuerySet, fields: Iterable) -> QuerySet:
+        """Запрос только для оставшихся полей сериализатора
+        """
+        fields = list(fields)
+        sources = {field.source.split('.')[0] for field in fields}
+        if isinstance(queryset.query.select_related, dict):
+            related = [lookup for lookup
+                       in _flatten(queryset.query.select_related)
+                       if lookup.split('__')[0] in sources]
+            queryset = queryset.select_related(None)
+            if related:
+                queryset = queryset.select_related(*related)
+        lookups = [lookup for lookup in queryset._prefetch_related_lookups
+                   if (lookup.prefetch_to if isinstance(lookup, Prefetch)
+                       else lookup).split('__')[0] in sources]
+        queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+        if '*' in sources:
+            return queryset
+        opts = queryset.model._meta
+        columns = {opts.pk.name}
+        reverse = {rel.get_accessor_name() for rel in opts.related_objects}
+        for source in sources - reverse:
+            try:
+                field = opts.get_field(source)
+            except FieldDoesNotExist:
+                return queryset
+            if field.concrete and not field.many_to_many:
+                columns.add(field.name)
+        return queryset.only(*columns)
@@ -5,6 +5,10 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 # Create your models here.
 
+# Разделитель имен в денормализованных полях книги,
+# ";" и "\\" внутри имен экранируются обратной косой чертой
+DISPLAY_SEPARATOR = '; '
+
 
 class Author(models.Model):
     """Модель Автора книг
@@ -222,10 +226,53 @@ class Book(models.Model):
                                        default=True,
                                        )
 
+    authors_display = models.TextField(verbose_name='авторы для вывода',
+                                       help_text='Авторы через "; ", ";" в '
+                                       'именах экранируется, обновляются '
+                                       'сигналами',
+                                       blank=True,
+                                       default='',
+                                       editable=False,
+                                       )
+
+    genres_display = models.TextField(verbose_name='жанры для вывода',
+                                      help_text='Жанры через "; ", ";" в '
+                                      'именах экранируется, обновляются '
+                                      'сигналами',
+                                      blank=True,
+                                      default='',
+                                      editable=False,
+                                      )
+
+    publisher_name = models.CharField(max_length=200,
+                                      verbose_name='название издателя',
+                                      help_text='Название издателя, '
+                                      'обновляется сигналами',
+                                      blank=True,
+                                      default='',
+                                      editable=False,
+                                      )
+
     class Meta:
         verbose_name = "Книга"
         verbose_name_plural = "Книги"
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=('volume', 'num_of_volume'),
+                                    name='unique_book_number_in_volume',
+                                    ),
+        ]
+        indexes = [
+            models.Index(fields=('authors_display',),
+                         name='book_authors_display_idx',
+                         ),
+            models.Index(fields=('genres_display',),
+                         name='book_genres_display_idx',
+                         ),
+            models.Index(fields=('publisher_name',),
+                         name='book_publisher_name_idx',
+                         ),
+        ]
 
     def __str__(self):
         return f'{self.name} {self.age_restriction}+'
@@ -352,3 +399,184 @@ class RequestExtension(models.Model):
 
     def get_absolute_url(self):
         return reverse("extension_retrieve", kwargs={"pk": self.pk})
+
+
+class OrderArchive(models.Model):
+    """Архив закрытых выдач книг
+    Строки переносятся из Order и больше не изменяются
+    """
+    id = models.BigIntegerField(primary_key=True,
+                                verbose_name='номер выдачи',
+                                help_text='Номер выдачи в таблице выдач',
+                                )
+
+    book = models.ForeignKey(Book,
+                             verbose_name='книга',
+                             on_delete=models.SET_NULL,
+                             help_text='Книга которую выдали',
+                             null=True,
+                             )
+
+    tenant = models.ForeignKey("users.User",
+                               verbose_name='пользователь',
+                               on_delete=models.SET_NULL,
+                               help_text='На кого была выдана книга',
+                               null=True,
+                               )
+
+    count_extensions = models.SmallIntegerField(verbose_name='продления',
+                                                help_text='Количество '
+                                                'сделанных продлений',
+                                                default=0,
+                                                )
+
+    time_order = models.DateField(verbose_name='время выдачи',
+                                  help_text='Время когда книга была выдана',
+                                  )
+
+    time_return = models.DateField(verbose_name='время возврата',
+                                   help_text='Время когда книга '
+                                   'была возвращена',
+                                   )
+
+    status = models.CharField(max_length=30,
+                              verbose_name='статус',
+                              help_text='Статус выдачи на момент архивации',
+                              )
+
+    archived_at = models.DateTimeField(auto_now_add=True,
+                                       verbose_name='время архивации',
+                                       help_text='Время переноса в архив',
+                                       )
+
+    class Meta:
+        verbose_name = 'архивная выдача'
+        verbose_name_plural = 'архивные выдачи'
+        ordering = ['time_order']
+
+    def __str__(self):
+        return f'{self.time_order} - {self.status}'
+
+
+class RequestExtensionArchive(models.Model):
+    """Архив обработанных запросов на продление
+    """
+    id = models.BigIntegerField(primary_key=True,
+                                verbose_name='номер запроса',
+                                help_text='Номер запроса в таблице запросов',
+                                )
+
+    order = models.ForeignKey(OrderArchive,
+                              verbose_name='выдача',
+                              on_delete=models.CASCADE,
+                              related_name='extensions',
+                              help_text='Архивная выдача книги',
+                              )
+
+    applicant = models.ForeignKey("users.User",
+                                  verbose_name='заявщик',
+                                  on_delete=models.SET_NULL,
+                                  related_name='archived_extensions',
+                                  help_text='Заявщик который хотел продлить',
+                                  null=True,
+                                  )
+
+    time_request = models.DateTimeField(verbose_name='время запроса',
+                                        help_text='Время запроса',
+                                        )
+
+    receiving = models.ForeignKey("users.User",
+                                  verbose_name='принимающий',
+                                  help_text='Библиотекарь который '
+                                  'обработал запрос',
+                                  on_delete=models.SET_NULL,
+                                  related_name='received_archived_extensions',
+                                  null=True,
+                                  )
+
+    time_response = models.DateTimeField(verbose_name='время ответа',
+                                         help_text='Время ответа',
+                                         )
+
+    response_text = models.TextField(verbose_name='ответ',
+                                     help_text='Письменный ответ от '
+                                     'библиотекаря',
+                                     null=True,
+                                     blank=True,
+                                     )
+
+    solution = models.CharField(max_length=30,
+                                verbose_name='решение',
+                                help_text='Принятое решение библиотекарем',
+                                )
+
+    archived_at = models.DateTimeField(auto_now_add=True,
+                                       verbose_name='время архивации',
+                                       help_text='Время переноса в архив',
+                                       )
+
+    class Meta:
+        verbose_name = 'архивный запрос'
+        verbose_name_plural = 'архивные запросы'
+        ordering = ['time_request']
+
+    def __str__(self):
+        return f'{self.time_request} - {self.solution}'
+
+
+class TaskFailure(models.Model):
+    """Компактная запись об упавшей задаче Celery
+    вместо хранения результатов в бэкенде результатов
+    Записывается после последнего повтора и служит
+    очередью недоставленных задач для перезапуска
+    """
+    task = models.CharField(max_length=255,
+                            verbose_name='задача',
+                            help_text='Имя задачи Celery',
+                            )
+
+    task_id = models.CharField(max_length=255,
+                               verbose_name='идентификатор',
+                               help_text='Идентификатор задачи Celery',
+                               )
+
+    args = models.JSONField(verbose_name='аргументы',
+                            help_text='Позиционные аргументы задачи',
+                            default=list,
+                            )
+
+    kwargs = models.JSONField(verbose_name='именованные аргументы',
+                              help_text='Именованные аргументы задачи',
+                              default=dict,
+                              )
+
+    exception = models.TextField(verbose_name='ошибка',
+                                 help_text='Последняя ошибка задачи',
+                                 )
+
+    retries = models.PositiveSmallIntegerField(verbose_name='повторы',
+                                               help_text='Количество '
+                                               'сделанных повторов',
+                                               default=0,
+                                               )
+
+    redriven_at = models.DateTimeField(verbose_name='время перезапуска',
+                                       help_text='Время повторной '
+                                       'постановки задачи в очередь',
+                                       null=True,
+                                       blank=True,
+                                       )
+
+    failed_at = models.DateTimeField(auto_now_add=True,
+                                     verbose_name='время ошибки',
+                                     help_text='Время падения задачи',
+                                     db_index=True,
+                                     )
+
+    class Meta:
+        verbose_name = 'ошибка задачи'
+        verbose_name_plural = 'ошибки задач'
+        ordering = ['-failed_at']
+
+    def __str__(self):
+        return f'{self.task} - {self.failed_at}'
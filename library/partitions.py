@@ -0,0 +1,242 @@
+from datetime import date
+from typing import List, Tuple, Union
+
+from django.db import connection, transaction
+from django.conf import settings
+
+from library.models import Book, Order, RequestExtension
+
+
+def month_bounds(day: date,
+                 shift: int = 0,
+                 ) -> Tuple[date, date]:
+    """Границы месяца [начало, начало следующего)
+    со сдвигом на shift месяцев от месяца day
+    """
+    index = day.year * 12 + day.month - 1 + shift
+    start = date(index // 12, index % 12 + 1, 1)
+    index += 1
+    end = date(index // 12, index % 12 + 1, 1)
+    return start, end
+
+
+def partition_name(start: date) -> str:
+    """Имя месячной секции таблицы выдач
+    """
+    return f'{Order._meta.db_table}_p{start:%Y%m}'
+
+
+def default_partition_name() -> str:
+    """Имя секции по умолчанию таблицы выдач
+    """
+    return f'{Order._meta.db_table}_default'
+
+
+def is_partitioned(cursor) -> bool:
+    """Является ли таблица выдач секционированной
+    """
+    cursor.execute(
+        'SELECT 1 FROM pg_partitioned_table '
+        'WHERE partrelid = to_regclass(%s)',
+        [Order._meta.db_table],
+    )
+    return cursor.fetchone() is not None
+
+
+def create_partition_sql(start: date,
+                         end: date,
+                         ) -> str:
+    """SQL создания месячной секции таблицы выдач
+    """
+    quote = connection.ops.quote_name
+    return (
+        f'CREATE TABLE IF NOT EXISTS {quote(partition_name(start))} '
+        f'PARTITION OF {quote(Order._meta.db_table)} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def create_partition(cursor,
+                     start: date,
+                     end: date,
+                     ) -> None:
+    """Создание месячной секции таблицы выдач
+
+    Если в секции по умолчанию уже есть выдачи этого месяца,
+    PostgreSQL не создаст секцию, поэтому секция создается отдельной
+    таблицей, выдачи переносятся в нее из секции по умолчанию
+    и таблица присоединяется к таблице выдач
+    """
+    quote = connection.ops.quote_name
+    table = Order._meta.db_table
+    default = default_partition_name()
+    name = partition_name(start)
+    cursor.execute('SELECT to_regclass(%s)', [default])
+    if cursor.fetchone()[0] is not None:
+        # Новые выдачи этого месяца не должны попасть в секцию
+        # по умолчанию между переносом и присоединением
+        cursor.execute(f'LOCK TABLE {quote(default)} IN EXCLUSIVE MODE')
+        cursor.execute(f'SELECT 1 FROM {quote(default)} '
+                       'WHERE time_order >= %s AND time_order < %s LIMIT 1',
+                       [start, end])
+        if cursor.fetchone() is not None:
+            cursor.execute(f'CREATE TABLE {quote(name)} '
+                           f'(LIKE {quote(table)} INCLUDING DEFAULTS)')
+            cursor.execute(f'WITH moved AS (DELETE FROM {quote(default)} '
+                           'WHERE time_order >= %s AND time_order < %s '
+                           'RETURNING *) '
+                           f'INSERT INTO {quote(name)} SELECT * FROM moved',
+                           [start, end])
+            cursor.execute(f'ALTER TABLE {quote(table)} '
+                           f'ATTACH PARTITION {quote(name)} '
+                           f"FOR VALUES FROM ('{start.isoformat()}') "
+                           f"TO ('{end.isoformat()}')")
+            return
+    cursor.execute(create_partition_sql(start, end))
+
+
+def create_order_partitions(months_ahead: Union[int, None] = None,
+                            ) -> List[str]:
+    """Создание секций таблицы выдач на текущий
+    и months_ahead следующих месяцев
+
+    Проверяется фактическое состояние таблицы, а не ORDER_PARTITIONING,
+    на SQLite и у несекционированной таблицы ничего не делает
+
+    Returns:
+        List[str]: Имена созданных секций
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    if months_ahead is None:
+        months_ahead = settings.ORDER_PARTITIONS_AHEAD
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        for shift in range(months_ahead + 1):
+            start, end = month_bounds(date.today(), shift)
+            name = partition_name(start)
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            create_partition(cursor, start, end)
+            created.append(name)
+    return created
+
+
+def _add_relations(cursor, table: str) -> None:
+    """Индексы и внешние ключи книги и читателя таблицы выдач
+    """
+    quote = connection.ops.quote_name
+    book = Book._meta.db_table
+    user = Order._meta.get_field('tenant').related_model._meta.db_table
+    cursor.execute(f'CREATE INDEX {quote(table + "_book_id_idx")} '
+                   f'ON {quote(table)} (book_id)')
+    cursor.execute(f'CREATE INDEX {quote(table + "_tenant_id_idx")} '
+                   f'ON {quote(table)} (tenant_id)')
+    cursor.execute(f'ALTER TABLE {quote(table)} '
+                   f'ADD CONSTRAINT {quote(table + "_book_id_fk")} '
+                   f'FOREIGN KEY (book_id) REFERENCES {quote(book)} (id) '
+                   'DEFERRABLE INITIALLY DEFERRED')
+    cursor.execute(f'ALTER TABLE {quote(table)} '
+                   f'ADD CONSTRAINT {quote(table + "_tenant_id_fk")} '
+                   f'FOREIGN KEY (tenant_id) REFERENCES {quote(user)} (id) '
+                   'DEFERRABLE INITIALLY DEFERRED')
+
+
+def partition_order_table(months_ahead: Union[int, None] = None) -> bool:
+    """Перевод таблицы выдач в секционированную по месяцам time_order
+
+    То же, что делает миграция 0009 при ORDER_PARTITIONING,
+    для баз, на которых миграция была применена без него
+
+    Returns:
+        bool: Была ли таблица переведена
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    if months_ahead is None:
+        months_ahead = settings.ORDER_PARTITIONS_AHEAD
+    quote = connection.ops.quote_name
+    table = Order._meta.db_table
+    legacy = f'{table}_legacy'
+    sequence = f'{table}_id_seq'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return False
+        cursor.execute(
+            'SELECT conrelid::regclass::text, conname FROM pg_constraint '
+            "WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [table],
+        )
+        for referencing, name in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {referencing} '
+                           f'DROP CONSTRAINT {quote(name)}')
+        cursor.execute(f'SELECT MIN(time_order) FROM {quote(table)}')
+        first = cursor.fetchone()[0] or date.today()
+
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       f'RENAME TO {quote(legacy)}')
+        cursor.execute(f'CREATE TABLE {quote(table)} '
+                       f'(LIKE {quote(legacy)}) '
+                       'PARTITION BY RANGE (time_order)')
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       'ADD PRIMARY KEY (id, time_order)')
+
+        start, end = month_bounds(first)
+        last, _ = month_bounds(date.today(), months_ahead)
+        while start <= last:
+            cursor.execute(create_partition_sql(start, end))
+            start, end = month_bounds(start, 1)
+        cursor.execute(f'CREATE TABLE {quote(default_partition_name())} '
+                       f'PARTITION OF {quote(table)} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {quote(table)} '
+                       f'SELECT * FROM {quote(legacy)}')
+        cursor.execute(f'DROP TABLE {quote(legacy)}')
+        _add_relations(cursor, table)
+        cursor.execute(f'CREATE SEQUENCE {quote(sequence)} '
+                       f'OWNED BY {quote(table)}.id')
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id '
+                       f"SET DEFAULT nextval('{sequence}')")
+        cursor.execute(f"SELECT setval('{sequence}', "
+                       'COALESCE(MAX(id), 0) + 1, false) '
+                       f'FROM {quote(table)}')
+    return True
+
+
+def unpartition_order_table() -> bool:
+    """Возврат таблицы выдач к обычной таблице
+
+    Returns:
+        bool: Была ли таблица переведена
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    quote = connection.ops.quote_name
+    table = Order._meta.db_table
+    extension = RequestExtension._meta.db_table
+    partitioned = f'{table}_partitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return False
+        cursor.execute(f'ALTER TABLE {quote(table)} '
+                       f'RENAME TO {quote(partitioned)}')
+        cursor.execute(f'CREATE TABLE {quote(table)} '
+                       f'(LIKE {quote(partitioned)})')
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id)')
+        cursor.execute(f'INSERT INTO {quote(table)} '
+                       f'SELECT * FROM {quote(partitioned)}')
+        cursor.execute(f'DROP TABLE {quote(partitioned)} CASCADE')
+        _add_relations(cursor, table)
+        cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN id '
+                       'ADD GENERATED BY DEFAULT AS IDENTITY')
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', "
+                       "'id'), COALESCE(MAX(id), 0) + 1, false) "
+                       f'FROM {quote(table)}')
+        cursor.execute(f'ALTER TABLE {quote(extension)} '
+                       f'ADD CONSTRAINT {quote(extension + "_order_id_fk")} '
+                       f'FOREIGN KEY (order_id) REFERENCES {quote(table)} '
+                       '(id) DEFERRABLE INITIALLY DEFERRED')
+    return True
@@ -11,20 +11,20 @@ class IsLibrarian(BasePermission):
     code = status.HTTP_403_FORBIDDEN
 
     def has_permission(self, request, view):
-        return request.user.is_librarian
+        return bool(getattr(request.user, 'is_librarian', False))
 
 
 class IsSuperUser(BasePermission):
     """Проверка прав доступа администратора
     """
     def has_permission(self, request, view):
-        return request.user.is_superuser
+        return bool(getattr(request.user, 'is_superuser', False))
 
 
 class IsCurrentUser(BasePermission):
     """Проверка на текущего пользователя
+    Сравнивает владельца уже полученного представлением объекта
     """
-    def has_permission(self, request, view):
-        pk = view.kwargs['pk']
-        user = view.queryset.get(pk=pk)
-        return request.user == user
+    def has_object_permission(self, request, view, obj):
+        return (request.user.pk is not None and
+                getattr(obj, 'tenant_id', None) == request.user.pk)
@@ -1,11 +1,15 @@
 from datetime import timedelta, date
 
 from rest_framework import serializers, validators
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 from library import models
+from library.listings import split_names
+from library.mixins import SparseFieldsSerializerMixin
 from library.task_manager import TaskManager
 from library.validators import (YearValidator,
                                 PublishedValidator,
@@ -20,7 +24,8 @@ from library.validators import (YearValidator,
                                 )
 
 
-class PublisherSerializer(serializers.ModelSerializer):
+class PublisherSerializer(SparseFieldsSerializerMixin,
+                          serializers.ModelSerializer):
     """Серилизатор издателя
     """
 
@@ -29,9 +34,68 @@ class PublisherSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связей по первичным ключам,
+    получаемый одним запросом вместо запроса на каждый ключ
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        pk_field = child.get_queryset().model._meta.pk
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        objects = child.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in dict.fromkeys(pks)]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связь по первичному ключу, many=True
+    проверяет все ключи одним запросом
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class BookCreateSerializer(serializers.ModelSerializer):
     """Серилизатор создания книги
+
+    Уникальность номера в томе гарантирует ограничение в базе,
+    ошибка целостности при одновременной записи
+    возвращается как ошибка поля
     """
+    author = BulkPrimaryKeyRelatedField(
+        many=True,
+        allow_empty=False,
+        queryset=models.Author.objects.get_queryset(),
+        label='авторы',
+        help_text='Авторы данной книги',
+    )
+    genre = BulkPrimaryKeyRelatedField(
+        many=True,
+        allow_empty=False,
+        queryset=models.Genre.objects.get_queryset(),
+        label='жанры',
+        help_text='Жанры данной книги',
+    )
 
     class Meta:
         model = models.Book
@@ -60,20 +124,59 @@ class BookCreateSerializer(serializers.ModelSerializer):
                                       ),
                       )
 
+    def _check_integrity(self, validated_data):
+        instance = self.instance
+        VolumeValidator('volume', 'num_of_volume').check_integrity(
+            validated_data.get('volume', getattr(instance, 'volume', None)),
+            validated_data.get('num_of_volume',
+                               getattr(instance, 'num_of_volume', None)),
+            getattr(instance, 'pk', None),
+        )
 
-class BookRetrieveSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            self._check_integrity(validated_data)
+            raise
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            self._check_integrity(validated_data)
+            raise
+
+
+class DisplayNamesField(serializers.ReadOnlyField):
+    """Список имен из денормализованного поля книги
+    """
+
+    def to_representation(self, value):
+        return split_names(value)
+
+
+class BookRetrieveSerializer(SparseFieldsSerializerMixin,
+                             serializers.ModelSerializer):
     """Серилизатор вывода книг
+    id и quantity выводятся только по запросу в ?fields=,
+    авторы, жанры и издатель читаются из денормализованных полей
     """
-    author = serializers.StringRelatedField(many=True)
-    publisher = serializers.StringRelatedField()
+    optional_fields = ('id', 'quantity')
+    author = DisplayNamesField(source='authors_display')
+    publisher = serializers.ReadOnlyField(source='publisher_name')
     volume = serializers.StringRelatedField()
-    genre = serializers.StringRelatedField(many=True)
+    genre = DisplayNamesField(source='genres_display')
 
     class Meta:
         model = models.Book
-        fields = ('author',
+        fields = ('id',
+                  'author',
                   'publisher',
                   'name',
+                  'quantity',
                   'image',
                   'best_seller',
                   'volume',
@@ -87,7 +190,8 @@ class BookRetrieveSerializer(serializers.ModelSerializer):
                   )
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     """Серилизатор автора
     """
     books = serializers.StringRelatedField(many=True,
@@ -117,7 +221,8 @@ class AuthorSerializer(serializers.ModelSerializer):
         return obj.book_set.count()
 
 
-class VolumeSerializer(serializers.ModelSerializer):
+class VolumeSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     """Серилизатор тома
     """
     books = BookRetrieveSerializer(many=True,
@@ -132,7 +237,8 @@ class VolumeSerializer(serializers.ModelSerializer):
                   )
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
     """Серилизатор жанра
     """
 
@@ -160,22 +266,24 @@ class OrderOpenSerializer(serializers.ModelSerializer):
                       )
 
     def create(self, validated_data):
-        instance = super().create(validated_data)
-        instance = models.Order.objects.filter(
-            pk=instance.pk,
-            ).select_related(
-                'book',
-                'tenant',
-            ).get()
-        task_manager = TaskManager(instance)
-        task_manager.start_periodic_task()
-        task_manager.launch_task(instance,
-                                 settings.TEMPLATES_TO_TASK['ORDER_OPEN'],
-                                 )
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            instance = models.Order.objects.filter(
+                pk=instance.pk,
+                ).select_related(
+                    'book',
+                    'tenant',
+                ).get()
+            task_manager = TaskManager(instance)
+            task_manager.start_periodic_task()
+            task_manager.launch_task(instance,
+                                     settings.TEMPLATES_TO_TASK['ORDER_OPEN'],
+                                     )
         return instance
 
 
-class OrderViewSerializer(serializers.ModelSerializer):
+class OrderViewSerializer(SparseFieldsSerializerMixin,
+                          serializers.ModelSerializer):
     """Сериализатор выданной книги
     """
     book = BookRetrieveSerializer(read_only=True)
@@ -185,7 +293,8 @@ class OrderViewSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class OrderListViewSerializer(serializers.ModelSerializer):
+class OrderListViewSerializer(SparseFieldsSerializerMixin,
+                              serializers.ModelSerializer):
     """Сериализатор списка выданных книг
     """
     book = serializers.StringRelatedField()
@@ -198,6 +307,21 @@ class OrderListViewSerializer(serializers.ModelSerializer):
                   )
 
 
+class OrderHistorySerializer(serializers.Serializer):
+    """Сериализатор истории выдач
+    """
+    id = serializers.IntegerField(read_only=True)
+    book = serializers.CharField(source='book__name',
+                                 read_only=True,
+                                 allow_null=True,
+                                 )
+    count_extensions = serializers.IntegerField(read_only=True)
+    time_order = serializers.DateField(read_only=True)
+    time_return = serializers.DateField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    archived = serializers.BooleanField(read_only=True)
+
+
 class ExtensionOpenSerializer(serializers.ModelSerializer):
     """Сериализатор открытия запроса на продление
     """
@@ -256,12 +380,12 @@ class ExtensionAcceptSerializer(serializers.ModelSerializer):
                                       'time_return',
                                       ))
             extension = super().update(instance, validated_data)
-
-        task_manager = TaskManager(order)
-        task_manager.update_periodic_task()
-        TaskManager.launch_task(extension,
-                                settings.TEMPLATES_TO_TASK['EXTENSION_ACCEPT'],
-                                )
+            task_manager = TaskManager(order)
+            task_manager.update_periodic_task()
+            TaskManager.launch_task(
+                extension,
+                settings.TEMPLATES_TO_TASK['EXTENSION_ACCEPT'],
+            )
         return extension
 
 
@@ -1,12 +1,18 @@
 from datetime import date
-from typing import Dict, Union
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Iterator, List, Tuple, Union
 from django.urls import NoReverseMatch
+from django.db.models import Q
 from django.template import TemplateDoesNotExist, loader
+from django.contrib.auth.models import AbstractUser
 from django.core.mail import EmailMultiAlternatives
 from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
 
 from library.models import Order, RequestExtension
+from library.mailer import send_messages
+from library.async_mailer import dispatch_messages
 
 
 def get_info_order(model: Union[Order,
@@ -88,11 +94,33 @@ def send_mails(order: str,
                 f'Order по pk {order} не был найден',
             )
 
-    email_template_name = template
-    subject_template_name = settings.MAIL_SUBJECT_TASK_PATH
+    subject, body = render_mail(template, context)
     server_mail: str = settings.EMAIL_HOST_USER
     user_email: str = (user_email,)
 
+    email_message = EmailMultiAlternatives(subject,
+                                           body,
+                                           server_mail,
+                                           user_email,
+                                           )
+    return send_messages([email_message])
+
+
+def render_mail(template: str,
+                context: Dict,
+                ) -> Tuple[str, str]:
+    """Отрисовка темы и текста письма
+
+    Args:
+    template (str): Ссылка на html для отправки письма
+    context (Dict): Контекст письма
+
+    Returns:
+        Tuple[str, str]: Тема и текст письма
+    """
+    email_template_name = template
+    subject_template_name = settings.MAIL_SUBJECT_TASK_PATH
+
     try:
         subject = loader.render_to_string(
             subject_template_name,
@@ -119,9 +147,86 @@ def send_mails(order: str,
     except NoReverseMatch:
         raise NoReverseMatch('Ошибка при постоении пути')
 
-    email_message = EmailMultiAlternatives(subject,
-                                           body,
-                                           server_mail,
-                                           user_email,
-                                           )
-    return email_message.send()
+    return subject, body
+
+
+def get_overdue_digests(day: Union[date, None] = None,
+                        ) -> Iterator[Tuple[AbstractUser, List[Order]]]:
+    """Просроченные выдачи, сгруппированные по пользователям
+    Выдачи получаются одним запросом
+    """
+    if day is None:
+        day = date.today()
+    orders = Order.objects.filter(
+        Q(status='active') &
+        Q(time_return__lte=day) &
+        Q(tenant__is_active=True),
+        ).select_related(
+            'book',
+            'tenant',
+        ).order_by('tenant_id', 'time_return', 'pk')
+    for _, group in groupby(orders.iterator(chunk_size=2000),
+                            key=attrgetter('tenant_id')):
+        group = list(group)
+        yield group[0].tenant, group
+
+
+def build_overdue_digest(tenant: AbstractUser,
+                         orders: List[Order],
+                         day: Union[date, None] = None,
+                         ) -> EmailMultiAlternatives:
+    """Одно письмо со всеми просроченными выдачами пользователя
+    """
+    if day is None:
+        day = date.today()
+    context = {
+        'username': tenant.first_name or tenant.username,
+        'orders': [{
+            'pk_order': order.pk,
+            'book_name': order.book.name,
+            'day_to_return': order.time_return,
+            'overdue_days': (day - order.time_return).days or None,
+        } for order in orders],
+        'support': 'http://easyLibrary/support/ticket/',
+        'library': 'easyLibrary',
+    }
+    subject, body = render_mail(settings.TEMPLATE_OVERDUE_DIGEST_PATH,
+                                context,
+                                )
+    return EmailMultiAlternatives(subject,
+                                  body,
+                                  settings.EMAIL_HOST_USER,
+                                  (tenant.email,),
+                                  )
+
+
+def send_overdue_digests(day: Union[date, None] = None,
+                         batch_size: int = 100,
+                         use_async: Union[bool, None] = None,
+                         ) -> int:
+    """Отправка ежедневных писем о просрочке,
+    одно письмо на пользователя
+
+    Письма отправляются пачками через пул соединений,
+    при ASYNC_MAIL - асинхронно через несколько соединений
+
+    Returns:
+        int: Количество отправленных писем
+    """
+    if use_async is None:
+        use_async = settings.ASYNC_MAIL
+    if use_async:
+        return dispatch_messages(
+            build_overdue_digest(tenant, orders, day)
+            for tenant, orders in get_overdue_digests(day)
+        )
+    sent = 0
+    messages = []
+    for tenant, orders in get_overdue_digests(day):
+        messages.append(build_overdue_digest(tenant, orders, day))
+        if len(messages) >= batch_size:
+            sent += send_messages(messages)
+            messages = []
+    if messages:
+        sent += send_messages(messages)
+    return sent
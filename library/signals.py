@@ -0,0 +1,152 @@
+import logging
+
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete,
+                                      pre_save,
+                                      )
+from django.dispatch import receiver
+
+from celery.signals import (task_failure,
+                            worker_process_init,
+                            worker_process_shutdown,
+                            )
+from django_celery_beat.models import IntervalSchedule
+
+from library.task_manager import TaskManager
+from library.mailer import mail_pool
+from library.listings import refresh_display
+from library.models import Author, Book, Genre, Publisher, TaskFailure
+
+
+logger = logging.getLogger(__name__)
+
+
+@receiver([post_save, post_delete], sender=IntervalSchedule)
+def reset_base_interval(sender, **kwargs) -> None:
+    """Сброс закешированного интервала менеджера задач
+    при изменении или удалении интервалов
+    """
+    TaskManager.reset_base_interval()
+
+
+# Связь книги и денормализованное поле с ее именами
+DISPLAY_RELATIONS = {Author: ('author', 'authors_display'),
+                     Genre: ('genre', 'genres_display'),
+                     }
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+@receiver(m2m_changed, sender=Book.genre.through)
+def refresh_book_display(sender, instance, action, reverse, model,
+                         pk_set, **kwargs) -> None:
+    """Пересчет имен авторов или жанров книг
+    при изменении связей с любой стороны
+    """
+    if reverse:
+        name, column = DISPLAY_RELATIONS[type(instance)]
+    else:
+        name, column = DISPLAY_RELATIONS[model]
+    if action == 'pre_clear' and reverse:
+        instance._display_books = list(Book.objects.filter(
+            **{name: instance},
+        ).values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        books = [instance.pk]
+    elif action == 'post_clear':
+        books = instance.__dict__.pop('_display_books', [])
+    else:
+        books = pk_set
+    if books:
+        refresh_display(books, (column,))
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+def refresh_related_display(sender, instance, created, raw, **kwargs) -> None:
+    """Пересчет имен в книгах после изменения автора или жанра
+    """
+    if created or raw:
+        return
+    name, column = DISPLAY_RELATIONS[sender]
+    refresh_display(Book.objects.filter(**{name: instance}).values('pk'),
+                    (column,))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Genre)
+def collect_related_books(sender, instance, **kwargs) -> None:
+    """Книги удаляемого автора или жанра, связи удаляются
+    без m2m_changed
+    """
+    name, _ = DISPLAY_RELATIONS[sender]
+    instance._display_books = list(Book.objects.filter(
+        **{name: instance},
+    ).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+def refresh_deleted_display(sender, instance, **kwargs) -> None:
+    """Пересчет имен в книгах удаленного автора или жанра
+    """
+    books = instance.__dict__.pop('_display_books', [])
+    if books:
+        refresh_display(books, (DISPLAY_RELATIONS[sender][1],))
+
+
+@receiver(pre_save, sender=Book)
+def set_publisher_name(sender, instance, raw, **kwargs) -> None:
+    """Название издателя книги перед сохранением
+    """
+    if not raw and instance.publisher_id is not None:
+        instance.publisher_name = instance.publisher.name
+
+
+@receiver(post_save, sender=Publisher)
+def refresh_publisher_name(sender, instance, created, raw, **kwargs) -> None:
+    """Название издателя в его книгах после изменения
+    """
+    if created or raw:
+        return
+    Book.objects.filter(publisher=instance).exclude(
+        publisher_name=instance.name,
+    ).update(publisher_name=instance.name)
+
+
+@worker_process_init.connect
+def reset_mail_pool(**kwargs) -> None:
+    """Пустой пул почтовых соединений в новом процессе воркера
+    """
+    mail_pool.reset()
+
+
+@worker_process_shutdown.connect
+def close_mail_pool(**kwargs) -> None:
+    """Закрытие почтовых соединений при остановке процесса воркера
+    """
+    logger.info('Статистика почтовых соединений: %s', mail_pool.stats())
+    mail_pool.close()
+
+
+@task_failure.connect
+def record_task_failure(sender=None, task_id=None, exception=None,
+                        args=None, kwargs=None, **extra) -> None:
+    """Запись упавшей задачи в таблицу ошибок,
+    результаты задач в бэкенде не хранятся
+    """
+    try:
+        TaskFailure.objects.create(
+            task=sender.name if sender else '',
+            task_id=task_id or '',
+            args=list(args or ()),
+            kwargs=dict(kwargs or {}),
+            exception=repr(exception)[:1000],
+            retries=sender.request.retries if sender else 0,
+        )
+    except Exception:
+        logger.exception('Не удалось сохранить ошибку задачи %s', task_id)
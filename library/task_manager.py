@@ -1,25 +1,94 @@
 import json
-from datetime import datetime, date
+import time
+import logging
+from datetime import datetime, date, timedelta
 
-from typing import Union
+from typing import Dict, Tuple, Union
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 
-from django_celery_beat.models import IntervalSchedule, PeriodicTask
+from django_celery_beat.models import (IntervalSchedule,
+                                       PeriodicTask,
+                                       )
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractMinute
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import (ObjectDoesNotExist,
+                                    MultipleObjectsReturned,
+                                    )
 
 from library.models import Order, RequestExtension
-from library.tasks import mail_task
+from library.tasks import mail_batch_task, mail_task
+from config.celery import BULK_QUEUE, MAIL_QUEUE
+
+
+logger = logging.getLogger(__name__)
+
+# Счетчики включенных напоминаний по минутам суток
+REMINDER_SLOTS_KEY = 'library:reminder_slots'
+MINUTES_IN_DAY = 24 * 60
+
+Slot = Tuple[int, int]
+
+
+class MailBatch:
+    """Письма, отложенные до фиксации транзакции
+    Все письма одной транзакции уходят брокеру одним сообщением
+    """
+    # Пачки открытых транзакций: соединение -> точки сохранения -> пачка.
+    # Ссылки на пачки слабые, сильную держит только on_commit Django,
+    # поэтому пачка пропадает из реестра после вызова или отката
+    _registry: WeakKeyDictionary = WeakKeyDictionary()
+
+    def __init__(self) -> None:
+        self.items = []
+
+    def __call__(self) -> None:
+        if len(self.items) == 1:
+            mail_task.apply_async(self.items[0], queue=MAIL_QUEUE)
+        else:
+            mail_batch_task.apply_async((self.items,), queue=MAIL_QUEUE)
+
+    @classmethod
+    def add(cls,
+            order: str,
+            template: str,
+            using: Union[str, None] = None,
+            ) -> None:
+        """Добавление письма в пачку текущей транзакции
+
+        Пачка привязана к набору точек сохранения, поэтому письма
+        из отмененной точки сохранения не отправляются.
+        Вне транзакции письмо отправляется сразу
+        """
+        connection = transaction.get_connection(using)
+        if connection.in_atomic_block:
+            batches = cls._registry.setdefault(connection,
+                                               WeakValueDictionary())
+            key = frozenset(connection.savepoint_ids)
+            batch = batches.get(key)
+            if batch is not None:
+                batch.items.append([order, template])
+                return
+        batch = cls()
+        batch.items.append([order, template])
+        if connection.in_atomic_block:
+            batches[key] = batch
+        transaction.on_commit(batch, using=using)
 
 
 class TaskManager:
     """Менеджер задач Celery
     Принимает в инициализацую модель Order
     """
+    # Базовый интервал, закешированный на процесс
+    _base_interval: Union[IntervalSchedule, None] = None
+
     def __init__(self,
                  order: Order,
                  ) -> None:
@@ -43,24 +112,38 @@ class TaskManager:
     def _get_base_interval(self) -> IntervalSchedule:
         """Получение интервала
         Базовый интервал: every=1, period=DAYS
+
+        Интервал запоминается на процесс после фиксации транзакции,
+        поэтому повторные выдачи не обращаются к базе
         """
-        interval = IntervalSchedule.objects.filter(
-            Q(every=1) &
-            Q(period=IntervalSchedule.DAYS),
-            )
-        if not interval.exists():
-            interval = IntervalSchedule.objects.create(
+        if TaskManager._base_interval is not None:
+            return TaskManager._base_interval
+        try:
+            interval, _ = IntervalSchedule.objects.get_or_create(
                 every=1,
                 period=IntervalSchedule.DAYS,
             )
-        else:
-            interval = interval.get()
+        except MultipleObjectsReturned:
+            interval = IntervalSchedule.objects.filter(
+                every=1,
+                period=IntervalSchedule.DAYS,
+            ).order_by('pk').first()
+        transaction.on_commit(
+            lambda: setattr(TaskManager, '_base_interval', interval),
+        )
         return interval
 
+    @classmethod
+    def reset_base_interval(cls) -> None:
+        """Сброс закешированного интервала
+        """
+        TaskManager._base_interval = None
+
     def _handle_datetime_to_task(self,
                                  start_time: date,
                                  ) -> datetime:
         """Перерабатывает date в datatime время
+        Время сдвигается внутри окна рассылки REMINDER_WINDOW_MINUTES
         """
         year = start_time.year
         month = start_time.month
@@ -76,8 +159,123 @@ class TaskManager:
             minute=minute,
             tzinfo=timezone.get_current_timezone()
         )
+        if settings.REMINDER_WINDOW_MINUTES > 1:
+            date_to_task += timedelta(
+                minutes=self._get_reminder_offset(date_to_task),
+            )
         return date_to_task
 
+    @staticmethod
+    def _get_slot(start_time: datetime) -> Slot:
+        """Час и минута суток напоминания в текущем часовом поясе
+        """
+        start_time = timezone.localtime(start_time)
+        return start_time.hour, start_time.minute
+
+    @staticmethod
+    def _get_slot_counts() -> Dict[Slot, int]:
+        """Количество включенных напоминаний по минутам суток
+
+        Счетчики собираются одним запросом и хранятся в кеше
+        REMINDER_SLOTS_CACHE_TIMEOUT секунд, постановка и отключение
+        напоминаний меняют их на месте. Расхождения из-за гонок
+        и откатов исчезают при следующем пересчете
+        """
+        cached = cache.get(REMINDER_SLOTS_KEY)
+        if cached is not None:
+            return cached[1]
+        tzinfo = timezone.get_current_timezone()
+        app = Order._meta.app_label
+        name_model = Order._meta.model_name
+        counts = {
+            (hour, minute): count
+            for hour, minute, count in PeriodicTask.objects.filter(
+                name__startswith=f'{app}_{name_model}-OR_',
+                enabled=True,
+                start_time__isnull=False,
+            ).annotate(
+                hour=ExtractHour('start_time', tzinfo=tzinfo),
+                minute=ExtractMinute('start_time', tzinfo=tzinfo),
+            ).values_list('hour', 'minute').annotate(
+                count=Count('pk'),
+            ).order_by()
+        }
+        cache.set(REMINDER_SLOTS_KEY,
+                  (time.time(), counts),
+                  settings.REMINDER_SLOTS_CACHE_TIMEOUT,
+                  )
+        return counts
+
+    @staticmethod
+    def _move_slot(old: Union[Slot, None],
+                   new: Union[Slot, None],
+                   ) -> None:
+        """Перенос напоминания между минутами в закешированных
+        счетчиках без продления их времени жизни
+        """
+        cached = cache.get(REMINDER_SLOTS_KEY)
+        if cached is None or old == new:
+            return
+        computed_at, counts = cached
+        timeout = (settings.REMINDER_SLOTS_CACHE_TIMEOUT -
+                   (time.time() - computed_at))
+        if timeout <= 0:
+            return
+        if old is not None and counts.get(old):
+            counts[old] -= 1
+        if new is not None:
+            counts[new] = counts.get(new, 0) + 1
+        cache.set(REMINDER_SLOTS_KEY, (computed_at, counts), timeout)
+
+    def _get_reminder_offset(self,
+                             window_start: datetime,
+                             ) -> int:
+        """Смещение в минутах от начала окна рассылки
+
+        Начальная минута детерминированно выбирается по pk выдачи
+        или пользователя, при заполненной минуте (REMINDER_RATE_PER_MINUTE)
+        берется следующая свободная минута окна. Если заполнено
+        все окно, напоминание переносится за окно на первую
+        свободную минуту суток.
+
+        Напоминания повторяются каждый день, поэтому минута считается
+        по времени суток у всех включенных напоминаний, независимо
+        от даты их начала
+        """
+        window = settings.REMINDER_WINDOW_MINUTES
+        if settings.REMINDER_JITTER_KEY == 'user':
+            key = self.order.tenant_id
+        else:
+            key = self.order.pk
+        offset = key % window
+        rate = settings.REMINDER_RATE_PER_MINUTE
+        if not rate:
+            return offset
+
+        counts = self._get_slot_counts()
+        current = PeriodicTask.objects.filter(
+            name=self._create_unique_name_to_task(self.order),
+            enabled=True,
+        ).values_list('start_time', flat=True).first()
+        current = self._get_slot(current) if current else None
+        minutes = [*((offset + shift) % window for shift in range(window)),
+                   *range(window, MINUTES_IN_DAY)]
+        for minute in minutes:
+            slot = self._get_slot(window_start + timedelta(minutes=minute))
+            if counts.get(slot, 0) - (slot == current) < rate:
+                break
+        else:
+            logger.warning('Все минуты суток заполнены напоминаниями, '
+                           'выдача %s получает минуту %s окна',
+                           self.order.pk, offset)
+            return offset
+        if minute >= window:
+            logger.warning('Окно напоминаний заполнено, напоминание '
+                           'выдачи %s перенесено на %s мин. от начала окна',
+                           self.order.pk, minute)
+        self._move_slot(current, slot)
+        return minute
+
     def _create_periodic_task(self,
                               model: Order,
                               ) -> PeriodicTask:
@@ -98,6 +296,7 @@ class TaskManager:
             interval=interval,
             start_time=start_time,
             kwargs=json.dumps(kwargs),
+            queue=BULK_QUEUE,
         )
         return instance
 
@@ -122,6 +321,7 @@ class TaskManager:
 
     def _delete_periodic_task(self,
                               model: Order,
+                              missing_ok: bool = False,
                               ) -> None:
         """Удаление периодической задачи
         """
@@ -130,26 +330,79 @@ class TaskManager:
         periodic_task = PeriodicTask.objects.filter(name=name)
         if periodic_task.exists():
             periodic_task = periodic_task.get()
+            if periodic_task.enabled and periodic_task.start_time:
+                self._move_slot(self._get_slot(periodic_task.start_time),
+                                None)
             periodic_task.start_time = None
             periodic_task.enabled = False
             periodic_task.save(update_fields=['start_time', 'enabled'])
-        else:
+        elif not missing_ok:
             raise ObjectDoesNotExist(f'Задача по pk {pk} не найдена')
 
-    def start_periodic_task(self) -> PeriodicTask:
+    def start_periodic_task(self) -> Union[PeriodicTask, None]:
         """Запуск периодической задачи
+        В режиме дайджеста задача не создается
         """
+        if settings.OVERDUE_DIGEST:
+            return None
         return self._create_periodic_task(self.order)
 
-    def update_periodic_task(self) -> PeriodicTask:
+    def update_periodic_task(self) -> Union[PeriodicTask, None]:
         """Обновление периодической задачи
+        В режиме дайджеста о просрочке напоминает общая задача,
+        поэтому задача выдачи, если она осталась, отключается
         """
+        if settings.OVERDUE_DIGEST:
+            return self._delete_periodic_task(self.order, missing_ok=True)
         return self._update_periodic_task(self.order)
 
     def delete_periodic_task(self) -> None:
         """Удаление периодической задачи
         """
-        return self._delete_periodic_task(self.order)
+        return self._delete_periodic_task(self.order,
+                                          missing_ok=settings.OVERDUE_DIGEST,
+                                          )
+
+    @classmethod
+    def purge_periodic_tasks(cls,
+                             chunk_size: Union[int, None] = None,
+                             ) -> Dict:
+        """Удаление отключенных периодических задач выдач
+        частями по chunk_size записей
+
+        Returns:
+            Dict: Количество удаленных задач, частей и время работы
+        """
+        if chunk_size is None:
+            chunk_size = settings.PURGE_PERIODIC_TASKS_CHUNK_SIZE
+        if chunk_size <= 0:
+            raise ValueError(f'{chunk_size}, должен быть больше нуля')
+        started = time.monotonic()
+        app = Order._meta.app_label
+        name_model = Order._meta.model_name
+        disabled_tasks = PeriodicTask.objects.filter(
+            name__startswith=f'{app}_{name_model}-OR_',
+            enabled=False,
+        ).order_by('pk')
+        deleted = 0
+        chunks = 0
+        while True:
+            pks = list(
+                disabled_tasks.values_list('pk', flat=True)[:chunk_size],
+            )
+            if not pks:
+                break
+            # Обычное удаление: сигналы django_celery_beat
+            # отмечают изменение расписания для планировщика
+            _, per_model = PeriodicTask.objects.filter(pk__in=pks).delete()
+            deleted += per_model.get(PeriodicTask._meta.label, 0)
+            chunks += 1
+
+        return {
+            'deleted': deleted,
+            'chunks': chunks,
+            'runtime': round(time.monotonic() - started, 3),
+        }
 
     @classmethod
     def launch_task(self,
@@ -159,6 +412,9 @@ class TaskManager:
                     template: str,
                     ) -> None:
         """Запуск мнгновенной задачи
+        Письмо отправляется через приоритетную очередь MAIL_QUEUE
+        после фиксации транзакции, письма одной транзакции
+        отправляются брокеру одним сообщением
         """
         model_name = model._meta.model_name
         if model_name == 'order':
@@ -166,4 +422,4 @@ class TaskManager:
         else:
             order = f'EX_{model.pk}'
 
-        return mail_task.delay(order, template)
+        MailBatch.add(order, template)
@@ -1,13 +1,108 @@
-from typing import Union
+from typing import Dict, List, Union
 
-from library.services import send_mails
-from library.models import Order, RequestExtension
-from config.celery import app
+import aiosmtplib
 
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 
-@app.task()
+from library.services import send_mails, send_overdue_digests
+from library.mailer import PERMANENT_ERRORS
+from library.async_mailer import PERMANENT_ERRORS as ASYNC_PERMANENT_ERRORS
+from library.async_mailer import send_envelope
+from library.archive import archive_orders
+from library.partitions import create_order_partitions
+from library.models import Order, RequestExtension, TaskFailure
+from config.celery import MAIL_QUEUE, app
+
+
+@app.task(ignore_result=True,
+          autoretry_for=(OSError, ObjectDoesNotExist),
+          dont_autoretry_for=PERMANENT_ERRORS,
+          max_retries=settings.MAIL_TASK_MAX_RETRIES,
+          retry_backoff=settings.MAIL_TASK_RETRY_BACKOFF,
+          retry_backoff_max=settings.MAIL_TASK_RETRY_BACKOFF_MAX,
+          retry_jitter=True,
+          )
 def mail_task(order: Union[Order, RequestExtension],
               template: str) -> None:
     """Задача по отправке письма
+    Повторяется при ошибках SMTP, сети и если выдача
+    еще не видна в базе, после последнего повтора
+    записывается в TaskFailure. Постоянные ошибки SMTP
+    (PERMANENT_ERRORS) записываются сразу, без повторов
     """
     return send_mails(order, template)
+
+
+@app.task(bind=True, ignore_result=True)
+def mail_batch_task(self, items: List[List[str]]) -> None:
+    """Задача по отправке нескольких писем одной транзакции
+    Письмо, которое не удалось отправить, ставится
+    отдельной задачей mail_task с повторами, письмо
+    с постоянной ошибкой SMTP сразу записывается в TaskFailure
+    """
+    for order, template in items:
+        try:
+            send_mails(order, template)
+        except PERMANENT_ERRORS as error:
+            TaskFailure.objects.create(task=mail_task.name,
+                                       task_id=self.request.id or '',
+                                       args=[order, template],
+                                       exception=repr(error)[:1000],
+                                       )
+        except (OSError, ObjectDoesNotExist):
+            mail_task.apply_async(
+                (order, template),
+                queue=MAIL_QUEUE,
+                countdown=settings.MAIL_TASK_RETRY_BACKOFF,
+            )
+
+
+@app.task(ignore_result=True,
+          autoretry_for=(OSError, aiosmtplib.SMTPException),
+          dont_autoretry_for=ASYNC_PERMANENT_ERRORS,
+          max_retries=settings.MAIL_TASK_MAX_RETRIES,
+          retry_backoff=settings.MAIL_TASK_RETRY_BACKOFF,
+          retry_backoff_max=settings.MAIL_TASK_RETRY_BACKOFF_MAX,
+          retry_jitter=True,
+          )
+def envelope_mail_task(sender: str,
+                       recipients: List[str],
+                       message: str) -> None:
+    """Задача по отправке письма, не отправленного
+    асинхронной рассылкой, ставится redrive_failed_tasks
+    """
+    send_envelope(sender, recipients, message)
+
+
+@app.task(ignore_result=False)
+def purge_periodic_tasks_task() -> Dict:
+    """Задача по очистке отключенных периодических задач выдач
+    """
+    from library.task_manager import TaskManager
+
+    return TaskManager.purge_periodic_tasks()
+
+
+@app.task(ignore_result=False)
+def archive_orders_task() -> Dict:
+    """Задача по переносу закрытых выдач в архив
+    """
+    return archive_orders()
+
+
+@app.task(ignore_result=False)
+def create_order_partitions_task() -> List[str]:
+    """Задача по созданию будущих секций таблицы выдач
+    """
+    return create_order_partitions()
+
+
+@app.task(ignore_result=False)
+def overdue_digest_task() -> int:
+    """Задача по отправке ежедневных писем о просрочке
+    Работает только в режиме дайджеста
+    """
+    if not settings.OVERDUE_DIGEST:
+        return 0
+    return send_overdue_digests()
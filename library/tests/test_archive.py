@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from library.models import (Book,
+                            Publisher,
+                            Order,
+                            OrderArchive,
+                            RequestExtension,
+                            RequestExtensionArchive,
+                            )
+from library.archive import archive_orders, get_order_history
+
+
+class TestArchive(APITestCase):
+    """Тесты архивации выдач
+    """
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create(
+            username='user',
+            email='user@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+        )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        self.book = Book.objects.create(
+            publisher=publisher,
+            name='book',
+            age_restriction=16,
+            count_pages=300,
+            year_published=2015,
+            circulation=1203,
+            quantity=10,
+        )
+
+    def _create_order(self, status, days_ago):
+        order = Order.objects.create(
+            book=self.book,
+            tenant=self.user,
+            time_return=date.today() - timedelta(days=days_ago),
+            status=status,
+        )
+        return order
+
+    def test_archive_orders(self):
+        """Тест переноса старых закрытых выдач в архив
+        """
+        old_orders = [self._create_order('end', 100) for _ in range(3)]
+        RequestExtension.objects.create(order=old_orders[0],
+                                        applicant=self.user,
+                                        solution='accept',
+                                        )
+        self._create_order('end', 10)
+        self._create_order('active', 100)
+        pending = self._create_order('end', 100)
+        RequestExtension.objects.create(order=pending,
+                                        applicant=self.user,
+                                        )
+
+        report = archive_orders(days=90, chunk_size=2)
+
+        self.assertEqual(report['orders'], 3)
+        self.assertEqual(report['extensions'], 1)
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(OrderArchive.objects.count(), 3)
+        self.assertEqual(RequestExtensionArchive.objects.get().order_id,
+                         old_orders[0].pk)
+        self.assertTrue(Order.objects.filter(pk=pending.pk).exists())
+
+    def test_order_history(self):
+        """Тест истории выдач из рабочей и архивной таблиц
+        """
+        old_order = self._create_order('end', 100)
+        self._create_order('active', 0)
+        archive_orders(days=90)
+
+        history = list(get_order_history(self.user))
+
+        self.assertEqual(len(history), 2)
+        self.assertEqual({row['archived'] for row in history}, {True, False})
+        self.assertIn(old_order.pk, [row['id'] for row in history])
+
+    def test_order_history_view(self):
+        """Тест просмотра истории выдач
+        """
+        self._create_order('end', 100)
+        self._create_order('active', 0)
+        archive_orders(days=90)
+        self.client.force_authenticate(self.user)
+        url = reverse('library:order_history')
+
+        response = self.client.get(url, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][1]['book'], 'book')
+        self.assertTrue(response.data['results'][1]['archived'])
@@ -0,0 +1,180 @@
+import time
+import asyncio
+from unittest import skipIf
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.core.mail import EmailMessage
+
+from library.models import TaskFailure
+from library.tasks import envelope_mail_task
+from library.async_mailer import (ENVELOPE_TASK,
+                                  AsyncMailDispatcher,
+                                  HostRateLimiter,
+                                  dispatch_messages,
+                                  to_envelope,
+                                  )
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+class CountingHandler:
+    """Обработчик локального SMTP сервера,
+    считающий письма и одновременные сессии
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+        self.active = 0
+        self.max_active = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.messages.append(envelope)
+        return '250 OK'
+
+    async def handle_RCPT(self, server, session, envelope, address,
+                          rcpt_options):
+        if address.startswith('bad'):
+            return '550 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+
+class TestHostRateLimiter(SimpleTestCase):
+    """Тесты ограничения частоты отправки на домен
+    """
+
+    def test_rate_limit(self):
+        """Тест интервала между письмами одного домена
+        """
+        limiter = HostRateLimiter(rate_per_minute=600)
+
+        async def wait_all():
+            start = time.perf_counter()
+            await asyncio.gather(*(limiter.wait('gmail.com')
+                                   for _ in range(3)),
+                                 limiter.wait('yandex.ru'))
+            return time.perf_counter() - start
+
+        self.assertGreaterEqual(asyncio.run(wait_all()), 0.2)
+
+    def test_no_limit(self):
+        """Тест отсутствия ограничения
+        """
+        limiter = HostRateLimiter()
+
+        self.assertEqual(limiter.interval, 0)
+
+
+class LocalSMTPMixin:
+    """Локальный aiosmtpd сервер и настройки почты для него
+    """
+
+    def setUp(self) -> None:
+        self.handler = CountingHandler()
+        self.controller = Controller(self.handler, hostname='127.0.0.1')
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+        settings = override_settings(
+            EMAIL_HOST=self.controller.hostname,
+            EMAIL_PORT=self.controller.port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.messages = [EmailMessage('subject',
+                                      'body',
+                                      'library@gmail.com',
+                                      [f'user{number}@gmail.com'],
+                                      ) for number in range(20)]
+
+
+@skipIf(Controller is None, 'Требуется aiosmtpd')
+class TestAsyncMailDispatcher(LocalSMTPMixin, SimpleTestCase):
+    """Тесты асинхронной рассылки на локальном aiosmtpd
+    """
+
+    def test_dispatch_messages(self):
+        """Тест одновременной отправки через ограниченное
+        количество соединений
+        """
+        sent = dispatch_messages(self.messages, connections=3,
+                                 rate_per_host=0)
+
+        self.assertEqual(sent, 20)
+        self.assertEqual(len(self.handler.messages), 20)
+        self.assertGreater(self.handler.max_active, 1)
+        self.assertLessEqual(self.handler.max_active, 3)
+
+    def test_dispatcher_stats(self):
+        """Тест переиспользования соединений
+        """
+        dispatcher = AsyncMailDispatcher(connections=2, rate_per_host=0)
+        envelopes = [to_envelope(message) for message in self.messages]
+
+        sent = asyncio.run(dispatcher.send_messages(envelopes))
+
+        self.assertEqual(sent, 20)
+        self.assertEqual(dispatcher.stats['sent'], 20)
+        self.assertLessEqual(dispatcher.stats['opened'], 2)
+        self.assertEqual(dispatcher.stats['failed'], 0)
+
+    def test_rate_limit_outside_semaphore(self):
+        """Тест ожидания очереди домена без занятого соединения,
+        письма другого домена не ждут
+        """
+        dispatcher = AsyncMailDispatcher(connections=1, rate_per_host=120)
+        envelopes = [to_envelope(EmailMessage('subject',
+                                              'body',
+                                              'library@gmail.com',
+                                              [f'user{number}@{host}'],
+                                              ))
+                     for host in ('gmail.com', 'yandex.ru')
+                     for number in range(2)]
+
+        start = time.perf_counter()
+        sent = asyncio.run(dispatcher.send_messages(envelopes))
+
+        self.assertEqual(sent, 4)
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+
+@skipIf(Controller is None, 'Требуется aiosmtpd')
+class TestAsyncMailFailures(LocalSMTPMixin, TestCase):
+    """Тесты записи неотправленных писем в TaskFailure
+    """
+
+    def test_failed_envelopes_recorded(self):
+        """Тест записи отклоненного письма и его повторной отправки
+        """
+        messages = self.messages[:2] + [EmailMessage('subject',
+                                                     'тело письма',
+                                                     'library@gmail.com',
+                                                     ['bad@gmail.com'],
+                                                     )]
+
+        sent = dispatch_messages(messages, connections=2, rate_per_host=0)
+
+        self.assertEqual(sent, 2)
+        failure = TaskFailure.objects.get()
+        self.assertEqual(failure.task, ENVELOPE_TASK)
+        self.assertEqual(failure.args[:2], ['library@gmail.com',
+                                            ['bad@gmail.com'],
+                                            ])
+        self.assertIn('SMTPRecipientsRefused', failure.exception)
+
+        failure.args[1] = ['user@gmail.com']
+        envelope_mail_task.apply(failure.args).get()
+
+        self.assertEqual(len(self.handler.messages), 3)
+        self.assertIn('тело письма'.encode(),
+                      self.handler.messages[-1].original_content)
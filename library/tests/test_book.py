@@ -1,9 +1,15 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from cachalot.api import cachalot_disabled
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from library.validators import VolumeValidator
 from library.models import (Book,
                             Publisher,
                             Genre,
@@ -328,3 +334,93 @@ class TestBook(APITestCase):
 
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def _book_data(self):
+        second_author = Author.objects.create(first_name='second',
+                                              last_name='author',
+                                              )
+        second_genre = Genre.objects.create(name_en='drama',
+                                            name_ru='Драма',
+                                            )
+        return {
+            'author': [self.author.pk, second_author.pk],
+            'publisher': self.publisher.pk,
+            'name': 'book',
+            'volume': self.volume.pk,
+            'num_of_volume': 1,
+            'age_restriction': 16,
+            'count_pages': 300,
+            'year_published': 2015,
+            'genre': [self.genre.pk, second_genre.pk],
+            'circulation': 1203,
+        }
+
+    def test_create_book_queries(self):
+        """Тест создания книги с авторами и жанрами,
+        получаемыми одним запросом на связь
+        """
+        url = reverse('library:book_create')
+        data = self._book_data()
+        data['author'].append(0)
+
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('author', response.data)
+
+        data['author'].pop()
+        # Сигнал m2m_changed отключает быструю вставку связей
+        # (+1 запрос на связь) и обновляет имена книги (+1 UPDATE на связь)
+        with cachalot_disabled(), self.assertNumQueries(18):
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        book = Book.objects.get(pk=response.data['id'])
+        self.assertEqual(book.author.count(), 2)
+        self.assertEqual(book.genre.count(), 2)
+
+    def test_update_book_same_volume_number(self):
+        """Тест обновления книги без изменения номера в томе
+        """
+        url = reverse('library:book_create')
+        response = self.client.post(url, self._book_data(), format='json')
+        url = reverse('library:book_update',
+                      kwargs={'pk': response.data['id']})
+
+        response = self.client.patch(url, {'volume': self.volume.pk,
+                                           'num_of_volume': 1,
+                                           }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_book_volume_number_race(self):
+        """Тест одновременного создания книг с одним номером в томе,
+        проверка валидатора не видит книгу из другого запроса
+        """
+        url = reverse('library:book_create')
+        data = self._book_data()
+        self.client.post(url, data, format='json')
+
+        with mock.patch.object(VolumeValidator, '__call__',
+                               return_value=None):
+            response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('num_of_volume', response.data)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_unique_number_in_volume_constraint(self):
+        """Тест ограничения уникальности номера в томе в базе
+        """
+        book = {'publisher': self.publisher,
+                'volume': self.volume,
+                'num_of_volume': 1,
+                'age_restriction': 16,
+                'count_pages': 300,
+                'year_published': 2015,
+                'circulation': 1203,
+                }
+        Book.objects.create(name='book', **book)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Book.objects.create(name='book2', **book)
@@ -0,0 +1,189 @@
+import gzip
+import asyncio
+
+import brotli
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APITestCase
+
+from config.middleware import CompressionMiddleware, negotiate_encoding
+from library.models import Author, Book, Genre, Publisher
+
+
+class TestCompressionMiddleware(SimpleTestCase):
+    """Тесты сжатия ответов gzip и brotli
+    """
+    content = b'{"name": "book"}' * 500
+
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, deflate, br'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate_encoding(self):
+        """Тест выбора сжатия по Accept-Encoding и q
+        """
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, gzip'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0'), None)
+        self.assertEqual(negotiate_encoding('identity, *'), None)
+        self.assertEqual(negotiate_encoding(''), None)
+
+    def test_brotli(self):
+        """Тест сжатия brotli
+        """
+        response = self.process(HttpResponse(self.content,
+                                             content_type='application/json',
+                                             ))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertEqual(brotli.decompress(response.content), self.content)
+
+    def test_gzip(self):
+        """Тест сжатия gzip, если brotli не принимается
+        """
+        response = self.process(HttpResponse(self.content,
+                                             content_type='application/json',
+                                             ),
+                                accept_encoding='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_identity(self):
+        """Тест ответа без сжатия, если клиент его не поддерживает
+        """
+        response = self.process(HttpResponse(self.content),
+                                accept_encoding='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_threshold(self):
+        """Тест ответа меньше COMPRESSION_MIN_SIZE
+        """
+        content = b'a' * 1023
+        response = self.process(HttpResponse(content))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, content)
+
+    def test_skip(self):
+        """Тест уже сжатых типов, no-transform и Content-Encoding
+        """
+        image = HttpResponse(self.content, content_type='image/png')
+        no_transform = HttpResponse(self.content)
+        no_transform['Cache-Control'] = 'public, no-transform'
+        encoded = HttpResponse(self.content)
+        encoded['Content-Encoding'] = 'deflate'
+        for response in (image, no_transform, encoded):
+            response = self.process(response)
+            self.assertEqual(response.content, self.content)
+            self.assertNotIn(response.get('Content-Encoding'), ('br', 'gzip'))
+
+    def test_etag(self):
+        """Тест ослабления ETag сжатого ответа
+        """
+        response = HttpResponse(self.content)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_streaming(self):
+        """Тест потокового сжатия brotli, каждая часть
+        отправляется клиенту сразу
+        """
+        chunks = [b'line %d\n' % number for number in range(1000)]
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response)
+        self.assertEqual(len(parts), len(chunks) + 1)
+        self.assertEqual(brotli.decompress(b''.join(parts)),
+                         b''.join(chunks))
+
+    def test_async_streaming(self):
+        """Тест сжатия асинхронного потока, каждая часть
+        отправляется клиенту сразу
+        """
+        chunks = [b'line %d\n' % number for number in range(100)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def consume(response):
+            return [chunk async for chunk in response]
+
+        response = self.process(StreamingHttpResponse(stream()))
+        parts = asyncio.run(consume(response))
+        self.assertEqual(len(parts), len(chunks) + 1)
+        self.assertEqual(brotli.decompress(b''.join(parts)), b''.join(chunks))
+
+
+class TestCompressedExport(APITestCase):
+    """Тесты сжатия выгрузки и списка книг
+    """
+
+    def setUp(self) -> None:
+        librarian = get_user_model().objects.create(
+            username='librarian',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+            is_librarian=True,
+        )
+        author = Author.objects.create(first_name='author',
+                                       last_name='author_last',
+                                       )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        genre = Genre.objects.create(name_en='fantasy', name_ru='Фэнтези')
+        for number in range(20):
+            book = Book.objects.create(publisher=publisher,
+                                       name=f'book{number}',
+                                       age_restriction=0,
+                                       count_pages=300,
+                                       year_published=2015,
+                                       circulation=1203,
+                                       )
+            book.author.add(author)
+            book.genre.add(genre)
+        self.client.force_authenticate(librarian)
+
+    def test_export(self):
+        """Тест потоковой выгрузки со сжатием gzip
+        """
+        plain = self.client.get(reverse('library:book_export'),
+                                {'type': 'ndjson'},
+                                )
+        response = self.client.get(reverse('library:book_export'),
+                                   {'type': 'ndjson'},
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)),
+                         b''.join(plain.streaming_content))
+
+    def test_list(self):
+        """Тест сжатия списка книг brotli
+        """
+        plain = self.client.get(reverse('library:book_list'))
+        response = self.client.get(reverse('library:book_list'),
+                                   HTTP_ACCEPT_ENCODING='br',
+                                   )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(brotli.decompress(response.content), plain.content)
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from datetime import timedelta, date
+
+from django.urls import reverse
+from django.test import override_settings
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from library.models import (Author,
+                            Book,
+                            Genre,
+                            Order,
+                            Publisher,
+                            RequestExtension,
+                            )
+
+
+class TestExport(APITestCase):
+    """Тесты потоковой выгрузки книг, выдач и запросов на продление
+    """
+
+    def setUp(self) -> None:
+        self.librarian = get_user_model().objects.create(
+            username='librarian',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+            is_librarian=True,
+        )
+        self.author = Author.objects.create(first_name='author',
+                                            last_name='author_last',
+                                            )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        genre = Genre.objects.create(name_en='fantasy',
+                                     name_ru='Фэнтези',
+                                     )
+        self.books = []
+        for number in range(3):
+            book = Book.objects.create(
+                publisher=publisher,
+                name=f'book{number}',
+                age_restriction=16 if number else 0,
+                count_pages=300,
+                year_published=2015,
+                circulation=1203,
+            )
+            book.author.add(self.author)
+            book.genre.add(genre)
+            self.books.append(book)
+        self.client.force_authenticate(self.librarian)
+
+    @staticmethod
+    def _content(response) -> str:
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_books_csv(self):
+        """Тест выгрузки книг в CSV частями с фильтром списка
+        """
+        url = reverse('library:book_export')
+
+        response = self.client.get(url, {'age_restriction': 16})
+        with self.assertNumQueries(1):
+            rows = list(csv.DictReader(io.StringIO(self._content(response))))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="books.csv"')
+        self.assertEqual([row['name'] for row in rows], ['book1', 'book2'])
+        self.assertEqual(rows[0]['publisher__name'], 'publisher')
+        self.assertEqual(rows[0]['authors'], 'author_last author')
+        self.assertEqual(rows[0]['genres'], 'Фэнтези')
+
+    def test_export_books_escaped_names(self):
+        """Тест выгрузки имен с разделителем в виде списка книг
+        """
+        self.author.last_name = 'last; name'
+        self.author.save()
+        second = Author.objects.create(first_name='second',
+                                       last_name='author',
+                                       )
+        self.books[1].author.add(second)
+
+        response = self.client.get(reverse('library:book_export'),
+                                   {'type': 'ndjson'})
+        rows = [json.loads(line)
+                for line in self._content(response).splitlines()]
+
+        self.assertEqual(rows[1]['authors'],
+                         'last\\; name author; author second')
+
+    def test_export_orders_ndjson(self):
+        """Тест выгрузки выдач в NDJSON
+        """
+        order = Order.objects.create(
+            book=self.books[0],
+            tenant=self.librarian,
+            time_return=date.today() + timedelta(days=14),
+        )
+        RequestExtension.objects.create(order=order,
+                                        applicant=self.librarian,
+                                        )
+        url = reverse('library:order_export')
+
+        response = self.client.get(url, {'type': 'ndjson'})
+        rows = [json.loads(line)
+                for line in self._content(response).splitlines()]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['book__name'], 'book0')
+        self.assertEqual(rows[0]['tenant__username'], 'librarian')
+        self.assertEqual(rows[0]['time_return'],
+                         str(date.today() + timedelta(days=14)))
+
+        response = self.client.get(reverse('library:extension_export'),
+                                   {'type': 'ndjson'})
+        rows = [json.loads(line)
+                for line in self._content(response).splitlines()]
+
+        self.assertEqual(rows[0]['order'], order.pk)
+        self.assertEqual(rows[0]['order__book__name'], 'book0')
+
+    def test_export_wrong_type(self):
+        """Тест неизвестного формата выгрузки
+        """
+        url = reverse('library:book_export')
+
+        response = self.client.get(url, {'type': 'xlsx'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_forbidden(self):
+        """Тест запрета выгрузки обычному пользователю
+        """
+        user = get_user_model().objects.create(
+            username='user',
+            email='user@gmail.com',
+            phone='+7 (900) 900 2001',
+            password='testpassword',
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse('library:order_export'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
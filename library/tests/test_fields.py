@@ -0,0 +1,156 @@
+from datetime import timedelta, date
+
+from django.db import connection
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+
+from cachalot.api import cachalot_disabled
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from library.models import (Author,
+                            Book,
+                            Genre,
+                            Order,
+                            Publisher,
+                            Volume,
+                            )
+
+
+class TestSparseFields(APITestCase):
+    """Тесты выбора полей через ?fields= и ?omit=
+    """
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create(
+            username='user',
+            email='user@gmail.com',
+            phone='+7 (900) 900 2001',
+            password='testpassword',
+            is_librarian=True,
+        )
+        author = Author.objects.create(first_name='author',
+                                       last_name='author_last',
+                                       )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        volume = Volume.objects.create(name='fantasy_volume')
+        genre = Genre.objects.create(name_en='fantasy', name_ru='Фэнтези')
+        for number in range(1, 3):
+            book = Book.objects.create(
+                publisher=publisher,
+                name=f'book{number}',
+                volume=volume,
+                num_of_volume=number,
+                age_restriction=16,
+                count_pages=300,
+                year_published=2015,
+                circulation=1203,
+            )
+            book.author.add(author)
+            book.genre.add(genre)
+        self.book = book
+
+    def test_book_list_fields(self):
+        """Тест списка книг только с выбранными полями
+        без соединений и предзагрузок
+        """
+        url = reverse('library:book_list')
+
+        with cachalot_disabled(), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,name,quantity'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {
+            'id': response.data['results'][0]['id'],
+            'name': 'book1',
+            'quantity': 1,
+        })
+        self.assertEqual(len(queries), 2)
+        sql = queries[-1]['sql']
+        self.assertNotIn('library_publisher', sql)
+        self.assertNotIn('count_pages', sql)
+
+    def test_book_list_omit(self):
+        """Тест списка книг без авторов и жанров
+        """
+        url = reverse('library:book_list')
+
+        with cachalot_disabled(), self.assertNumQueries(2):
+            response = self.client.get(url, {'omit': 'author,genre'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        book = response.data['results'][0]
+        self.assertNotIn('author', book)
+        self.assertNotIn('id', book)
+        self.assertEqual(book['publisher'], 'publisher')
+
+    def test_book_retrieve_fields(self):
+        """Тест просмотра книги с выбранными полями
+        """
+        url = reverse('library:book_retrieve', kwargs={'pk': self.book.pk})
+
+        response = self.client.get(url, {'fields': 'name,genre'})
+
+        self.assertEqual(response.data, {'name': 'book2',
+                                         'genre': ['Фэнтези'],
+                                         })
+
+    def test_unknown_field(self):
+        """Тест неизвестного поля
+        """
+        url = reverse('library:book_list')
+
+        response = self.client.get(url, {'fields': 'name,password'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_author_list_fields(self):
+        """Тест списка авторов без книг
+        """
+        url = reverse('library:author_list')
+
+        with cachalot_disabled(), self.assertNumQueries(2):
+            response = self.client.get(url, {'fields': 'pk,last_name'})
+
+        self.assertEqual(response.data['results'][0],
+                         {'pk': response.data['results'][0]['pk'],
+                          'last_name': 'author_last',
+                          })
+
+    def test_volume_list_fields(self):
+        """Тест списка томов без вложенных книг
+        """
+        url = reverse('library:volume_list')
+
+        with cachalot_disabled(), self.assertNumQueries(2):
+            response = self.client.get(url, {'omit': 'books'})
+
+        self.assertEqual(response.data['results'][0]['name'],
+                         'fantasy_volume')
+
+    def test_order_list_fields(self):
+        """Тест списка выдач с выбранными полями
+        """
+        Order.objects.create(book=self.book,
+                             tenant=self.user,
+                             time_return=date.today() + timedelta(days=14),
+                             )
+        url = reverse('library:order_list')
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(url, {'omit': 'book'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {
+            'time_order': str(date.today()),
+            'time_return': str(date.today() + timedelta(days=14)),
+        })
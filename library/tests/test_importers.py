@@ -0,0 +1,222 @@
+import io
+import os
+import tempfile
+
+from django.urls import reverse
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from library.importers import CatalogImporter
+from library.models import (Book,
+                            Publisher,
+                            Genre,
+                            Author,
+                            Volume,
+                            )
+from config.utils import read_records
+
+HEADER = ('name,authors,genres,publisher,publisher_address,publisher_url,'
+          'publisher_email,publisher_phone,volume,num_of_volume,'
+          'age_restriction,count_pages,year_published,circulation,'
+          'is_published,best_seller\n')
+
+
+class TestCatalogImporter(APITestCase):
+    """Тесты импорта каталога книг
+    """
+    csv_data = HEADER + (
+        'book1,author_last author,Фэнтези,publisher,,,,,'
+        'fantasy_volume,1,16,300,2015,1000,true,true\n'
+        'book2,Толстой Лев Николаевич; author_last author,Драма/drama,'
+        'new publisher,moscow,https://www.new.com/,new@gmail.com,'
+        '+79136001001,,,12,500,1869,5000,1,0\n'
+        'book3,author_last author,Фэнтези,publisher,,,,,'
+        'fantasy_volume,1,16,300,2016,1000,true,false\n'
+        'book4,author_last author,Фэнтези,publisher,,,,,'
+        ',,16,300,3000,1000,true,false\n'
+        'book5,author_last author,Фэнтези,publisher,,,,,'
+        ',,16,300,2000,5,false,false\n'
+        'book6,author_last author,Детектив,publisher,,,,,'
+        ',,16,300,2000,1000,true,false\n'
+        'book7,author_last author,Фэнтези,publisher,,,,,'
+        ',,7,300,2000,1000,true,false\n'
+    )
+
+    def setUp(self) -> None:
+        self.librarian = get_user_model().objects.create(
+            username='librarian',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+            is_librarian=True,
+        )
+        self.author = Author.objects.create(first_name='author',
+                                            last_name='author_last',
+                                            )
+        self.publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        self.genre = Genre.objects.create(name_en='fantasy',
+                                          name_ru='Фэнтези',
+                                          )
+
+    def test_import_csv(self):
+        """Тест импорта с созданием справочников и ошибками по строкам
+        """
+        records = read_records(io.StringIO(self.csv_data), 'csv')
+
+        report = CatalogImporter(chunk_size=3).run(records)
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['references'], {'publisher': 1,
+                                                'author': 1,
+                                                'genre': 1,
+                                                'volume': 1,
+                                                })
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6, 7])
+        self.assertIn('num_of_volume', errors[3])
+        self.assertIn('year', errors[4])
+        self.assertIn('circulation, best_seller', errors[5])
+        self.assertIn('name_en', errors[6])
+        self.assertIn('age_restriction', errors[7])
+
+        book = Book.objects.get(name='book1')
+        self.assertEqual(book.publisher, self.publisher)
+        self.assertEqual(book.volume.name, 'fantasy_volume')
+        self.assertEqual(list(book.author.all()), [self.author])
+        self.assertEqual(list(book.genre.all()), [self.genre])
+        book = Book.objects.get(name='book2')
+        self.assertEqual(book.publisher.name, 'new publisher')
+        self.assertEqual(book.author.count(), 2)
+        self.assertEqual(book.genre.get().name_en, 'drama')
+        self.assertEqual(Author.objects.get(last_name='Толстой').surname,
+                         'Николаевич')
+        self.assertEqual(book.authors_display,
+                         'author_last author; Толстой Лев')
+        self.assertEqual(book.genres_display, 'Драма')
+        self.assertEqual(book.publisher_name, 'new publisher')
+
+    def test_import_existing_volume_number(self):
+        """Тест номера в томе, уже занятого книгой в базе
+        """
+        volume = Volume.objects.create(name='fantasy_volume')
+        book = Book.objects.create(publisher=self.publisher,
+                                   name='book',
+                                   volume=volume,
+                                   num_of_volume=1,
+                                   age_restriction=16,
+                                   count_pages=300,
+                                   year_published=2015,
+                                   circulation=1203,
+                                   )
+        book.author.add(self.author)
+        records = read_records(io.StringIO(self.csv_data), 'csv')
+
+        report = CatalogImporter().run(records)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['references']['volume'], 0)
+        self.assertIn('num_of_volume', report['errors'][0]['errors'])
+
+    def test_import_ndjson(self):
+        """Тест импорта NDJSON со списками авторов и жанров
+        """
+        data = (
+            '{"name": "book", "authors": [{"first_name": "author", '
+            '"last_name": "author_last"}], "genres": [{"name_ru": "Драма", '
+            '"name_en": "drama"}], "publisher": "publisher", '
+            '"age_restriction": 0, "count_pages": 10, '
+            '"year_published": 2000, "circulation": 10}\n'
+            '{not json\n'
+        )
+        records = read_records(io.StringIO(data), 'ndjson')
+
+        report = CatalogImporter().run(records)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'][0]['row'], 2)
+        self.assertTrue(Book.objects.get(name='book').is_published)
+
+    def test_import_ndjson_types(self):
+        """Тест ошибок по строкам для значений неверного типа
+        """
+        book = ('"publisher": "publisher", "age_restriction": 0, '
+                '"count_pages": 10, "year_published": 2000, '
+                '"circulation": 10')
+        data = (
+            '{"name": "book1", "authors": 123, "genres": "Драма/drama", '
+            f'{book}}}\n'
+            '{"name": "book2", "authors": [5], "genres": "Драма/drama", '
+            f'{book}}}\n'
+            '{"name": "book3", "authors": "author_last author", '
+            f'"genres": [{{"name_ru": 1}}], {book}}}\n'
+            '{"name": ["x"], "authors": "author_last author", '
+            f'"genres": "Драма/drama", {book}}}\n'
+            '{"name": "book5", "authors": "author_last author", '
+            f'"genres": "Драма/drama", {book}}}\n'
+        )
+        records = read_records(io.StringIO(data), 'ndjson')
+
+        report = CatalogImporter().run(records)
+
+        self.assertEqual(report['created'], 1)
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('authors', errors[1])
+        self.assertIn('authors', errors[2])
+        self.assertIn('genres', errors[3])
+        self.assertIn('name', errors[4])
+        self.assertTrue(Book.objects.filter(name='book5').exists())
+
+    def test_import_view(self):
+        """Тест импорта через API библиотекарем
+        """
+        url = reverse('library:book_import')
+        upload = SimpleUploadedFile('catalog.csv',
+                                    self.csv_data.encode('utf-8'),
+                                    )
+        self.client.force_authenticate(self.librarian)
+
+        response = self.client.post(url, {'file': upload},
+                                    format='multipart',
+                                    )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(len(response.data['errors']), 5)
+
+    def test_import_view_anonymous(self):
+        """Тест запрета импорта анонимному пользователю
+        """
+        url = reverse('library:book_import')
+        upload = SimpleUploadedFile('catalog.csv',
+                                    self.csv_data.encode('utf-8'),
+                                    )
+
+        response = self.client.post(url, {'file': upload},
+                                    format='multipart',
+                                    )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_command(self):
+        """Тест команды импорта каталога
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.csv_data)
+            out = io.StringIO()
+
+            call_command('import_catalog', path, stdout=out)
+
+        self.assertIn('Создано книг: 2', out.getvalue())
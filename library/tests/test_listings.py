@@ -0,0 +1,250 @@
+from django.test import TestCase
+
+from rest_framework.test import APIRequestFactory
+
+from cachalot.api import cachalot_disabled
+
+from library.listings import join_names, split_names
+from library.models import Author, Book, Genre, Publisher, Volume
+from library.views import BookListAPIView
+
+
+class TestBookList(TestCase):
+    """Тесты списка книг на денормализованных полях
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        authors = [Author.objects.create(first_name=f'first{number}',
+                                         last_name=f'last{number}',
+                                         ) for number in range(3)]
+        genres = [Genre.objects.create(name_en=f'genre{number}',
+                                       name_ru=f'Жанр{number}',
+                                       ) for number in range(2)]
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        volume = Volume.objects.create(name='volume')
+        for number in range(12):
+            book = Book.objects.create(
+                publisher=publisher,
+                name=f'book{number:02}',
+                volume=volume if number % 2 else None,
+                num_of_volume=number if number % 2 else None,
+                age_restriction=16 if number % 3 else 0,
+                count_pages=300 + number,
+                year_published=2000 + number,
+                circulation=1000,
+                best_seller=bool(number % 4),
+            )
+            # Авторы добавляются в обратном порядке, вывод по ключу
+            book.author.add(*reversed(authors[:number % 3 + 1]))
+            if number % 5:
+                book.genre.add(*genres)
+        Book.objects.filter(name='book01').update(image='book/cover.png')
+
+    def get(self, params=None):
+        request = APIRequestFactory().get('/api/book/list/', params or {})
+        response = BookListAPIView.as_view()(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_pages(self):
+        """Тест страниц, порядка авторов, пустых связей и изображения
+        """
+        results = self.get({'page_size': 25}).data['results']
+        self.assertEqual(len(results), 12)
+        first = results[1]
+        self.assertEqual(first['author'], ['last0 first0', 'last1 first1'])
+        self.assertEqual(first['genre'], ['Жанр0', 'Жанр1'])
+        self.assertEqual(first['publisher'], 'publisher')
+        self.assertEqual(first['volume'], 'volume')
+        self.assertEqual(first['image'],
+                         'http://testserver/media/book/cover.png')
+        self.assertEqual(results[0]['genre'], [])
+        self.assertIsNone(results[0]['volume'])
+        self.assertEqual(len(self.get({'page': 2}).data['results']), 2)
+
+    def test_fields(self):
+        """Тест ?fields= и ?omit=, id и quantity только по запросу
+        """
+        response = self.get({'fields': 'id,name'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+        response = self.get({'omit': 'author,genre,publisher'})
+        self.assertNotIn('author', response.data['results'][0])
+        self.assertNotIn('id', response.data['results'][0])
+
+    def test_filters(self):
+        """Тест фильтров и сортировки
+        """
+        author = Author.objects.get(first_name='first2')
+        results = self.get({'author': author.pk}).data['results']
+        self.assertEqual([book['name'] for book in results],
+                         ['book02', 'book05', 'book08', 'book11'])
+        results = self.get({'ordering': '-count_pages'}).data['results']
+        self.assertEqual(results[0]['name'], 'book11')
+
+    def test_queries(self):
+        """Тест количества запросов: подсчет и одна выборка страницы
+        без предзагрузки авторов и жанров
+        """
+        with cachalot_disabled():
+            with self.assertNumQueries(2):
+                self.get({'page_size': 25})
+
+
+class TestDisplayColumns(TestCase):
+    """Тесты денормализованных имен авторов, жанров и издателя книги
+    """
+
+    def setUp(self) -> None:
+        self.authors = [Author.objects.create(first_name=f'first{number}',
+                                              last_name=f'last{number}',
+                                              ) for number in range(2)]
+        self.genre = Genre.objects.create(name_en='fantasy',
+                                          name_ru='Фэнтези',
+                                          )
+        self.publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        self.book = Book.objects.create(publisher=self.publisher,
+                                        name='book',
+                                        age_restriction=16,
+                                        count_pages=300,
+                                        year_published=2015,
+                                        circulation=1000,
+                                        )
+
+    def assertDisplay(self, authors, genres='', publisher='publisher'):
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.authors_display, authors)
+        self.assertEqual(self.book.genres_display, genres)
+        self.assertEqual(self.book.publisher_name, publisher)
+
+    def test_book_relations(self):
+        """Тест добавления, удаления и очистки связей со стороны книги
+        """
+        self.assertDisplay('')
+        self.book.author.add(*reversed(self.authors))
+        self.book.genre.add(self.genre)
+        self.assertDisplay('last0 first0; last1 first1', 'Фэнтези')
+        self.book.author.remove(self.authors[0])
+        self.assertDisplay('last1 first1', 'Фэнтези')
+        self.book.genre.clear()
+        self.assertDisplay('last1 first1')
+
+    def test_reverse_relations(self):
+        """Тест изменения связей со стороны автора и жанра
+        """
+        self.authors[1].book_set.add(self.book)
+        self.genre.book_set.add(self.book)
+        self.assertDisplay('last1 first1', 'Фэнтези')
+        self.authors[1].book_set.clear()
+        self.genre.book_set.remove(self.book)
+        self.assertDisplay('')
+
+    def test_rename_and_delete(self):
+        """Тест переименования и удаления автора, жанра и издателя
+        """
+        self.book.author.add(*self.authors)
+        self.book.genre.add(self.genre)
+        self.authors[0].last_name = 'renamed'
+        self.authors[0].save()
+        self.genre.name_ru = 'Роман'
+        self.genre.save()
+        self.publisher.name = 'new publisher'
+        self.publisher.save()
+        self.assertDisplay('renamed first0; last1 first1',
+                           'Роман',
+                           'new publisher',
+                           )
+        self.authors[1].delete()
+        self.assertDisplay('renamed first0', 'Роман', 'new publisher')
+
+    def test_publisher_on_save(self):
+        """Тест названия издателя при смене издателя книги
+        """
+        publisher = Publisher.objects.create(
+            name='other',
+            address='moscow',
+            url='https://www.other.com/',
+            email='other@gmail.com',
+            phone='+79136001001',
+        )
+        self.book.publisher = publisher
+        self.book.save()
+        self.assertDisplay('', publisher='other')
+
+    def test_ordering_by_author(self):
+        """Тест сортировки по авторам без дублирования книг
+        """
+        self.book.author.add(*self.authors)
+        other = Book.objects.create(publisher=self.publisher,
+                                    name='other',
+                                    age_restriction=16,
+                                    count_pages=300,
+                                    year_published=2015,
+                                    circulation=1000,
+                                    )
+        other.author.add(self.authors[1])
+        request = APIRequestFactory().get('/api/book/list/',
+                                          {'ordering': '-author'})
+        response = BookListAPIView.as_view()(request)
+        self.assertEqual([book['name'] for book in response.data['results']],
+                         ['other', 'book'])
+
+    def test_ordering_by_publisher_and_genre(self):
+        """Тест сортировки по названию издателя и жанрам
+        """
+        self.book.genre.add(self.genre)
+        publisher = Publisher.objects.create(
+            name='other',
+            address='moscow',
+            url='https://www.other.com/',
+            email='other@gmail.com',
+            phone='+79136001001',
+        )
+        other = Book.objects.create(publisher=publisher,
+                                    name='other',
+                                    age_restriction=16,
+                                    count_pages=300,
+                                    year_published=2015,
+                                    circulation=1000,
+                                    )
+        other.genre.add(Genre.objects.create(name_en='drama',
+                                             name_ru='Драма',
+                                             ))
+        for ordering, names in (('publisher', ['other', 'book']),
+                                ('genre', ['other', 'book'])):
+            request = APIRequestFactory().get('/api/book/list/',
+                                              {'ordering': ordering})
+            response = BookListAPIView.as_view()(request)
+            self.assertEqual([book['name']
+                              for book in response.data['results']], names)
+
+    def test_separator_in_names(self):
+        """Тест имен с разделителем и обратной косой чертой
+        """
+        names = ['Роман; драма', 'back\\slash;', '\\; ', '']
+        self.assertEqual(split_names(join_names(names)), names)
+        self.assertEqual(split_names(''), [])
+
+        self.authors[0].last_name = 'last;\\'
+        self.authors[0].save()
+        self.book.author.add(*self.authors)
+        self.genre.name_ru = 'Роман; драма'
+        self.genre.save()
+        self.book.genre.add(self.genre)
+        request = APIRequestFactory().get('/api/book/list/')
+        book = BookListAPIView.as_view()(request).data['results'][0]
+        self.assertEqual(book['author'], ['last;\\ first0', 'last1 first1'])
+        self.assertEqual(book['genre'], ['Роман; драма'])
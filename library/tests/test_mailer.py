@@ -0,0 +1,96 @@
+import socket
+from unittest import skipIf
+
+from django.test import SimpleTestCase, override_settings
+from django.core.mail import EmailMessage
+
+from library.mailer import MailConnectionPool
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+class MessageHandler:
+    """Обработчик локального SMTP сервера,
+    сохраняющий полученные письма
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return '250 OK'
+
+
+@skipIf(Controller is None, 'Требуется aiosmtpd')
+class TestMailConnectionPool(SimpleTestCase):
+    """Тесты пула SMTP соединений на локальном aiosmtpd
+    """
+
+    def setUp(self) -> None:
+        self.handler = MessageHandler()
+        self.controller = Controller(self.handler, hostname='127.0.0.1')
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+        settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=self.controller.hostname,
+            EMAIL_PORT=self.controller.port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.pool = MailConnectionPool(size=1)
+        self.addCleanup(self.pool.close)
+
+    def _messages(self, count):
+        return [EmailMessage(f'subject{number}',
+                             'body',
+                             'library@gmail.com',
+                             [f'user{number}@gmail.com'],
+                             ) for number in range(count)]
+
+    def test_connection_reuse(self):
+        """Тест переиспользования соединения между отправками
+        """
+        sent = sum(self.pool.send_messages([message])
+                   for message in self._messages(3))
+        sent += self.pool.send_messages(self._messages(2))
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(len(self.handler.messages), 5)
+        self.assertEqual(self.pool.stats(), {'opened': 1,
+                                             'reused': 3,
+                                             'reconnects': 0,
+                                             'sent': 5,
+                                             'idle': 1,
+                                             })
+
+    def test_reconnect(self):
+        """Тест переоткрытия оборванного соединения
+        """
+        self.pool.send_messages(self._messages(1))
+        self.pool._idle[0].connection.sock.shutdown(socket.SHUT_RDWR)
+
+        sent = self.pool.send_messages(self._messages(2))
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(len(self.handler.messages), 3)
+        stats = self.pool.stats()
+        self.assertEqual(stats['opened'], 2)
+        self.assertEqual(stats['reconnects'], 1)
+
+    def test_close(self):
+        """Тест закрытия свободных соединений
+        """
+        self.pool.send_messages(self._messages(1))
+
+        self.pool.close()
+
+        self.assertEqual(self.pool.stats()['idle'], 0)
@@ -123,6 +123,38 @@ class TestOrder(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_retrieve_order_owner(self):
+        """Тест вывода выдачи владельцу и запрета
+        для другого пользователя
+        """
+        tenant = get_user_model().objects.create(
+            username='tenant',
+            email='tenant@gmail.com',
+            phone='+7 (900) 900 2002',
+            password='testpassword',
+        )
+        other = get_user_model().objects.create(
+            username='other',
+            email='other@gmail.com',
+            phone='+7 (900) 900 2003',
+            password='testpassword',
+        )
+        order = Order.objects.create(
+            book=self.book,
+            tenant=tenant,
+            time_return=date.today() + timedelta(days=30),
+        )
+        url = reverse('library:order_retrieve',
+                      kwargs={'pk': order.pk})
+
+        self.client.force_authenticate(tenant)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(other)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_open_order(self):
         """Тест открытия выдачи книги
         """
@@ -0,0 +1,157 @@
+from io import StringIO
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.core.management import call_command
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from library.models import Book, Order, Publisher
+from library.partitions import (create_order_partitions,
+                                default_partition_name,
+                                is_partitioned,
+                                month_bounds,
+                                partition_name,
+                                )
+
+
+class TestPartitions(TestCase):
+    """Тесты секционирования таблицы выдач
+    """
+
+    def test_month_bounds(self):
+        """Тест границ месяца
+        """
+        self.assertEqual(month_bounds(date(2024, 12, 15)),
+                         (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(month_bounds(date(2024, 12, 15), 2),
+                         (date(2025, 2, 1), date(2025, 3, 1)))
+        self.assertEqual(month_bounds(date(2024, 1, 31), -1),
+                         (date(2023, 12, 1), date(2024, 1, 1)))
+
+    def test_partition_name(self):
+        """Тест имени секции
+        """
+        self.assertEqual(partition_name(date(2024, 3, 1)),
+                         'library_order_p202403')
+
+    @skipUnless(connection.vendor != 'postgresql' or
+                not settings.ORDER_PARTITIONING,
+                'Проверка несекционированной базы')
+    def test_create_partitions_disabled(self):
+        """Тест отсутствия секций без PostgreSQL
+        """
+        self.assertEqual(create_order_partitions(), [])
+
+
+@skipUnless(connection.vendor == 'postgresql' and
+            settings.ORDER_PARTITIONING,
+            'Секционирование доступно только на PostgreSQL')
+class TestPostgresPartitions(TestCase):
+    """Тесты секций таблицы выдач на PostgreSQL
+    """
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create(
+            username='user',
+            email='user@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+        )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        book = Book.objects.create(
+            publisher=publisher,
+            name='book',
+            age_restriction=16,
+            count_pages=300,
+            year_published=2015,
+            circulation=1203,
+            quantity=10,
+        )
+        self.order = Order.objects.create(
+            book=book,
+            tenant=user,
+            time_return=date.today() + timedelta(days=14),
+        )
+
+    def test_create_partitions(self):
+        """Тест идемпотентного создания секций
+        """
+        self.assertEqual(create_order_partitions(), [])
+        created = create_order_partitions(
+            settings.ORDER_PARTITIONS_AHEAD + 1,
+        )
+        start, _ = month_bounds(date.today(),
+                                settings.ORDER_PARTITIONS_AHEAD + 1)
+
+        self.assertEqual(created, [partition_name(start)])
+
+    def test_partition_pruning(self):
+        """Тест отсечения секций при запросе по диапазону дат
+        """
+        current, _ = month_bounds(date.today())
+        previous, _ = month_bounds(date.today(), -1)
+        start, end = month_bounds(date.today(), 1)
+
+        plan = Order.objects.filter(time_order__gte=start,
+                                    time_order__lt=end,
+                                    ).explain()
+
+        self.assertIn(partition_name(start), plan)
+        self.assertNotIn(partition_name(current), plan)
+        self.assertNotIn(partition_name(previous), plan)
+        self.assertEqual(Order.objects.get(), self.order)
+
+    @override_settings(ORDER_PARTITIONING=False)
+    def test_create_partitions_setting_off(self):
+        """Тест создания секций по состоянию таблицы,
+        а не по настройке
+        """
+        created = create_order_partitions(
+            settings.ORDER_PARTITIONS_AHEAD + 1,
+        )
+
+        self.assertEqual(len(created), 1)
+
+    def test_move_default_rows(self):
+        """Тест переноса выдач из секции по умолчанию
+        в созданную секцию
+        """
+        shift = settings.ORDER_PARTITIONS_AHEAD + 2
+        start, _ = month_bounds(date.today(), shift)
+        Order.objects.filter(pk=self.order.pk).update(time_order=start)
+
+        created = create_order_partitions(shift)
+
+        self.assertEqual(created[-1], partition_name(start))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {partition_name(start)}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute(f'SELECT COUNT(*) FROM {default_partition_name()}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(Order.objects.get().time_order, start)
+
+    def test_partition_orders_command(self):
+        """Тест возврата и повторного секционирования таблицы выдач
+        """
+        # Проверки отложенных внешних ключей setUp не дают удалить
+        # таблицу в той же транзакции
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        call_command('partition_orders', '--revert', stdout=StringIO())
+        with connection.cursor() as cursor:
+            self.assertFalse(is_partitioned(cursor))
+        self.assertEqual(Order.objects.get(), self.order)
+
+        call_command('partition_orders', stdout=StringIO())
+        with connection.cursor() as cursor:
+            self.assertTrue(is_partitioned(cursor))
+        self.assertEqual(Order.objects.get(), self.order)
@@ -0,0 +1,106 @@
+import io
+import uuid
+from decimal import Decimal
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from phonenumber_field.phonenumber import PhoneNumber
+
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import ORJSONParser, ORJSONRenderer
+
+
+class TestORJSON(SimpleTestCase):
+    """Тесты совпадения вывода ORJSONRenderer с JSONRenderer
+    """
+
+    def assertSameOutput(self, data, **kwargs):
+        self.assertEqual(ORJSONRenderer().render(data, **kwargs),
+                         JSONRenderer().render(data, **kwargs))
+
+    def test_types(self):
+        """Тест дат, Decimal, UUID, ленивых строк и вложенных структур
+        """
+        data = OrderedDict((
+            ('datetime', datetime(2024, 5, 1, 10, 30, 15, 123456,
+                                  tzinfo=timezone.utc)),
+            ('naive', datetime(2024, 5, 1, 10, 30)),
+            ('date', date(2024, 5, 1)),
+            ('time', time(10, 30, 15, 500)),
+            ('timedelta', timedelta(days=1, seconds=5)),
+            ('decimal', Decimal('10.50')),
+            ('uuid', uuid.UUID(int=1)),
+            ('lazy', gettext_lazy('Книга')),
+            ('error', [ErrorDetail('Ошибка', code='invalid')]),
+            ('nested', {'list': [1, 2.5, None, True], 'text': 'Тест'}),
+            ('separator', 'line\u2028break\u2029'),
+            ('big', 2 ** 70),
+            (1, 'int key'),
+        ))
+
+        self.assertSameOutput(data)
+
+    def test_phone_number(self):
+        """Тест номера телефона: сериализатор приводит его к строке,
+        необработанный объект не сериализуется обоими рендерерами
+        """
+        phone = PhoneNumber.from_string('+79136001000')
+
+        self.assertSameOutput({'phone': str(phone)})
+        with self.assertRaises(TypeError):
+            JSONRenderer().render({'phone': phone})
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({'phone': phone})
+
+    def test_indent(self):
+        """Тест отступов через параметр типа ответа
+        """
+        self.assertSameOutput({'a': [1, 2]},
+                              accepted_media_type='application/json; '
+                              'indent=4')
+
+    def test_non_finite(self):
+        """Тест NaN и бесконечности: ошибка STRICT_JSON, как в JSONRenderer
+        """
+        for value in (float('nan'), float('inf'), -float('inf')):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'nested': [{'value': value}]})
+        self.assertSameOutput({'value': 1.5, 'none': None})
+
+    def test_empty(self):
+        """Тест пустого ответа
+        """
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parse(self):
+        """Тест разбора тела запроса
+        """
+        content = '{"name": "Книга", "count": [1, 2]}'.encode('utf-8')
+
+        data = ORJSONParser().parse(io.BytesIO(content))
+
+        self.assertEqual(data, JSONParser().parse(io.BytesIO(content)))
+
+    def test_parse_encoding(self):
+        """Тест разбора тела запроса в другой кодировке
+        """
+        content = '{"name": "Книга"}'.encode('cp1251')
+
+        data = ORJSONParser().parse(io.BytesIO(content),
+                                    parser_context={'encoding': 'cp1251'})
+
+        self.assertEqual(data, {'name': 'Книга'})
+
+    def test_parse_error(self):
+        """Тест ошибки разбора и запрета NaN
+        """
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"count": NaN}'))
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+from django_celery_beat.models import PeriodicTask
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from library.models import Book, Order, Publisher
+from library.services import get_overdue_digests, send_overdue_digests
+from library.task_manager import TaskManager
+
+
+class TestOverdueDigest(TestCase):
+    """Тесты ежедневных писем о просрочке
+    """
+
+    def setUp(self) -> None:
+        self.user1 = get_user_model().objects.create(
+            username='user1',
+            email='user1@gmail.com',
+            phone='+7 (900) 900 2001',
+            password='testpassword',
+        )
+        self.user2 = get_user_model().objects.create(
+            username='user2',
+            email='user2@gmail.com',
+            phone='+7 (900) 900 2002',
+            password='testpassword',
+        )
+        publisher = Publisher.objects.create(
+            name='publisher',
+            address='new-york',
+            url='https://www.publisher.com/',
+            email='publisher@gmail.com',
+            phone='+79136001000',
+        )
+        self.books = [Book.objects.create(
+            publisher=publisher,
+            name=f'book{number}',
+            age_restriction=16,
+            count_pages=300,
+            year_published=2015,
+            circulation=1203,
+        ) for number in range(3)]
+        for book in self.books:
+            Order.objects.create(book=book,
+                                 tenant=self.user1,
+                                 time_return=date.today() - timedelta(days=3),
+                                 )
+        Order.objects.create(book=self.books[0],
+                             tenant=self.user2,
+                             time_return=date.today(),
+                             )
+        Order.objects.create(book=self.books[1],
+                             tenant=self.user2,
+                             time_return=date.today() + timedelta(days=1),
+                             )
+        Order.objects.create(book=self.books[2],
+                             tenant=self.user2,
+                             time_return=date.today() - timedelta(days=5),
+                             status='end',
+                             )
+
+    def test_get_overdue_digests(self):
+        """Тест группировки просроченных выдач одним запросом
+        """
+        with self.assertNumQueries(1):
+            digests = [(tenant, len(orders))
+                       for tenant, orders in get_overdue_digests()]
+
+        self.assertEqual(digests, [(self.user1, 3), (self.user2, 1)])
+
+    def test_send_overdue_digests(self):
+        """Тест отправки одного письма на пользователя
+        """
+        sent = send_overdue_digests()
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['user1@gmail.com'])
+        for book in self.books:
+            self.assertIn(book.name, mail.outbox[0].body)
+        self.assertIn('просрочена на 3 дней', mail.outbox[0].body)
+
+    @override_settings(OVERDUE_DIGEST=True)
+    def test_task_manager_digest_mode(self):
+        """Тест отсутствия задачи выдачи в режиме дайджеста
+        """
+        order = Order.objects.filter(tenant=self.user2).first()
+        task_manager = TaskManager(order)
+
+        self.assertIsNone(task_manager.start_periodic_task())
+        self.assertIsNone(task_manager.update_periodic_task())
+        task_manager.delete_periodic_task()
+        self.assertEqual(PeriodicTask.objects.count(), 0)
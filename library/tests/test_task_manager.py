@@ -1,19 +1,31 @@
 from datetime import date, timedelta, datetime
+from io import StringIO
+from unittest import mock
 
-from django_celery_beat.models import IntervalSchedule, PeriodicTask
+from django_celery_beat.models import (IntervalSchedule,
+                                       PeriodicTask,
+                                       PeriodicTasks,
+                                       )
 
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from cachalot.api import cachalot_disabled
+
 from library.models import Author, Book, Genre, Order, Publisher, Volume
-from library.task_manager import TaskManager
+from library.task_manager import MailBatch, TaskManager
+from library.tasks import mail_batch_task, mail_task
 
 
 class TestTaskManager(TestCase):
     """Тесты менеджера задач
     """
     def setUp(self) -> None:
+        cache.clear()
         user = get_user_model().objects.create(
             username='user',
             email='user@gmail.com',
@@ -99,6 +111,37 @@ class TestTaskManager(TestCase):
         self.assertEqual(interval1, interval2)
         self.assertEqual(IntervalSchedule.objects.count(), 1)
 
+    def test_cached_base_interval(self):
+        """Тест кеширования интервала после фиксации транзакции
+        """
+        task_manager = TaskManager(self.order)
+        self.addCleanup(TaskManager.reset_base_interval)
+        with self.captureOnCommitCallbacks(execute=True):
+            interval1 = task_manager._get_base_interval()
+
+        with self.assertNumQueries(0):
+            interval2 = task_manager._get_base_interval()
+        self.assertEqual(interval1, interval2)
+
+        interval1.delete()
+        self.assertIsNone(TaskManager._base_interval)
+
+    def test_duplicate_base_interval(self):
+        """Тест получения интервала при наличии дубликатов
+        """
+        interval1 = IntervalSchedule.objects.create(
+            every=1,
+            period=IntervalSchedule.DAYS,
+        )
+        IntervalSchedule.objects.create(
+            every=1,
+            period=IntervalSchedule.DAYS,
+        )
+        task_manager = TaskManager(self.order)
+        interval2 = task_manager._get_base_interval()
+
+        self.assertEqual(interval1, interval2)
+
     def test_handle_time_to_task(self):
         """Тест переработчика времени
         """
@@ -136,6 +179,7 @@ class TestTaskManager(TestCase):
         self.assertEqual(PeriodicTask.objects.count(), 1)
         self.assertEqual(instance, PeriodicTask.objects.get())
         self.assertEqual(instance.start_time, time_to_check)
+        self.assertEqual(instance.queue, 'bulk')
 
     def test_update_task(self):
         """Тест обновления задачи
@@ -168,3 +212,186 @@ class TestTaskManager(TestCase):
 
         self.assertIsNone(instance.start_time)
         self.assertFalse(instance.enabled)
+
+    def test_purge_periodic_tasks(self):
+        """Тест очистки отключенных задач
+        """
+        for number in range(5):
+            PeriodicTask.objects.create(
+                name=f'library_order-OR_{self.order.pk + number + 1}',
+                task='library.tasks.mail_task',
+                interval=TaskManager(self.order)._get_base_interval(),
+                enabled=False,
+            )
+        task_manager = TaskManager(self.order)
+        task_manager.start_periodic_task()
+        PeriodicTask.objects.create(
+            name='other_task',
+            task='library.tasks.mail_task',
+            interval=task_manager._get_base_interval(),
+            enabled=False,
+        )
+        changed = timezone.now() - timedelta(days=1)
+        PeriodicTasks.objects.update(last_update=changed)
+
+        report = TaskManager.purge_periodic_tasks(chunk_size=2)
+
+        self.assertEqual(report['deleted'], 5)
+        self.assertGreater(PeriodicTasks.last_change(), changed)
+        self.assertEqual(report['chunks'], 3)
+        self.assertEqual(PeriodicTask.objects.count(), 2)
+        self.assertTrue(PeriodicTask.objects.filter(
+            name=task_manager._create_unique_name_to_task(self.order),
+            ).exists())
+
+    def test_purge_periodic_tasks_command(self):
+        """Тест команды очистки отключенных задач
+        """
+        task_manager = TaskManager(self.order)
+        task_manager.start_periodic_task()
+        task_manager.delete_periodic_task()
+        out = StringIO()
+
+        call_command('purge_periodic_tasks', stdout=out)
+
+        self.assertEqual(PeriodicTask.objects.count(), 0)
+        self.assertIn('Удалено задач: 1', out.getvalue())
+
+    @override_settings(REMINDER_WINDOW_MINUTES=60,
+                       REMINDER_RATE_PER_MINUTE=0,
+                       )
+    def test_reminder_window(self):
+        """Тест детерминированного сдвига напоминания внутри окна
+        """
+        task_manager = TaskManager(self.order)
+        time_return = self.order.time_return
+
+        instance = task_manager.start_periodic_task()
+        time_to_check = datetime(
+            year=time_return.year,
+            month=time_return.month,
+            day=time_return.day,
+            hour=8,
+            minute=self.order.pk % 60,
+            tzinfo=timezone.get_current_timezone()
+        )
+
+        self.assertEqual(instance.start_time, time_to_check)
+        self.assertEqual(task_manager._handle_datetime_to_task(time_return),
+                         time_to_check)
+
+    @override_settings(REMINDER_WINDOW_MINUTES=3,
+                       REMINDER_RATE_PER_MINUTE=1,
+                       REMINDER_JITTER_KEY='user',
+                       )
+    def test_reminder_rate(self):
+        """Тест переноса напоминания на свободную минуту окна,
+        при заполненном окне - за окно
+        """
+        orders = [self.order] + [Order.objects.create(
+            book=self.order.book,
+            tenant=self.order.tenant,
+            time_return=self.order.time_return,
+        ) for _ in range(3)]
+
+        minutes = [TaskManager(order).start_periodic_task().start_time.minute
+                   for order in orders]
+
+        offset = self.order.tenant_id % 3
+        self.assertEqual(minutes[:3], [offset,
+                                       (offset + 1) % 3,
+                                       (offset + 2) % 3,
+                                       ])
+        self.assertEqual(minutes[3], 3)
+
+    @override_settings(REMINDER_WINDOW_MINUTES=2,
+                       REMINDER_RATE_PER_MINUTE=1,
+                       REMINDER_JITTER_KEY='user',
+                       )
+    def test_reminder_rate_across_dates(self):
+        """Тест учета напоминаний с другими датами возврата,
+        которые срабатывают каждый день в ту же минуту
+        """
+        orders = [self.order] + [Order.objects.create(
+            book=self.order.book,
+            tenant=self.order.tenant,
+            time_return=self.order.time_return + timedelta(days=days),
+        ) for days in (1, 5)]
+
+        minutes = [TaskManager(order).start_periodic_task().start_time.minute
+                   for order in orders]
+
+        offset = self.order.tenant_id % 2
+        self.assertEqual(minutes, [offset, (offset + 1) % 2, 2])
+
+    @override_settings(REMINDER_WINDOW_MINUTES=2,
+                       REMINDER_RATE_PER_MINUTE=1,
+                       REMINDER_JITTER_KEY='user',
+                       )
+    def test_reminder_slot_counts_cached(self):
+        """Тест счетчиков минут в кеше: постановка не пересчитывает
+        их по базе, отключение освобождает минуту
+        """
+        orders = [self.order] + [Order.objects.create(
+            book=self.order.book,
+            tenant=self.order.tenant,
+            time_return=self.order.time_return,
+        ) for _ in range(2)]
+        first = TaskManager(orders[0])
+        first.start_periodic_task()
+        window_start = datetime(
+            year=self.order.time_return.year,
+            month=self.order.time_return.month,
+            day=self.order.time_return.day,
+            hour=8,
+            tzinfo=timezone.get_current_timezone(),
+        )
+
+        with cachalot_disabled(), self.assertNumQueries(1):
+            minute = TaskManager(orders[1])._get_reminder_offset(window_start)
+        first.delete_periodic_task()
+        instance = TaskManager(orders[2]).start_periodic_task()
+
+        offset = self.order.tenant_id % 2
+        self.assertEqual(minute, (offset + 1) % 2)
+        self.assertEqual(instance.start_time.minute, offset)
+
+    def test_launch_task_on_commit(self):
+        """Тест отправки писем транзакции одним сообщением
+        после ее фиксации
+        """
+        template = 'library/template_order.html'
+        with self.captureOnCommitCallbacks() as callbacks:
+            TaskManager.launch_task(self.order, template)
+            TaskManager.launch_task(self.order, template)
+            try:
+                with transaction.atomic():
+                    TaskManager.launch_task(self.order, template)
+                    raise ValueError
+            except ValueError:
+                pass
+            # Пачка отмененной точки сохранения пропадает из реестра
+            self.assertEqual(
+                len(MailBatch._registry[transaction.get_connection()]), 1,
+            )
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsInstance(callbacks[0], MailBatch)
+        self.assertEqual(callbacks[0].items,
+                         [[f'OR_{self.order.pk}', template]] * 2)
+        with mock.patch.object(mail_batch_task, 'apply_async') as batch:
+            callbacks[0]()
+        batch.assert_called_once_with((callbacks[0].items,), queue='mail')
+
+    def test_launch_single_task(self):
+        """Тест отправки одного письма отдельной задачей
+        """
+        template = 'library/template_order.html'
+        with mock.patch.object(mail_task, 'apply_async') as task:
+            with self.captureOnCommitCallbacks(execute=True):
+                TaskManager.launch_task(self.order, template)
+                task.assert_not_called()
+
+        task.assert_called_once_with([f'OR_{self.order.pk}', template],
+                                     queue='mail',
+                                     )
@@ -0,0 +1,146 @@
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.test import TestCase
+from django.conf import settings
+from django.core.management import call_command
+
+from library.models import TaskFailure
+from library.tasks import (archive_orders_task,
+                           mail_batch_task,
+                           mail_task,
+                           overdue_digest_task,
+                           )
+from config.celery import BULK_QUEUE, DEFAULT_QUEUE, MAIL_QUEUE, app
+
+
+class TestTaskResults(TestCase):
+    """Тесты политики хранения результатов задач
+    """
+
+    def test_result_policy(self):
+        """Тест отключения результатов у задач отправки писем
+        """
+        self.assertTrue(mail_task.ignore_result)
+        self.assertFalse(archive_orders_task.ignore_result)
+        self.assertFalse(settings.CELERY_RESULT_EXTENDED)
+
+    def test_task_failure(self):
+        """Тест записи упавшей задачи в таблицу ошибок
+        """
+        result = mail_task.apply(args=('OR_0',
+                                       settings.TEMPLATE_PERIODICK_TASK_PATH,
+                                       ))
+
+        self.assertTrue(result.failed())
+        failure = TaskFailure.objects.get()
+        self.assertEqual(failure.task, 'library.tasks.mail_task')
+        self.assertEqual(failure.task_id, result.id)
+        self.assertEqual(failure.args[0], 'OR_0')
+        self.assertIn('ObjectDoesNotExist', failure.exception)
+        self.assertEqual(failure.retries, settings.MAIL_TASK_MAX_RETRIES)
+
+    def test_permanent_smtp_error(self):
+        """Тест записи постоянной ошибки SMTP без повторов
+        """
+        template = settings.TEMPLATE_PERIODICK_TASK_PATH
+        error = SMTPRecipientsRefused({'bad@mail.ru': (550, b'No such user')})
+        with mock.patch('library.tasks.send_mails', side_effect=error):
+            result = mail_task.apply(args=('OR_0', template))
+
+        self.assertTrue(result.failed())
+        failure = TaskFailure.objects.get()
+        self.assertIn('SMTPRecipientsRefused', failure.exception)
+        self.assertEqual(failure.retries, 0)
+
+    def test_redrive_failed_tasks(self):
+        """Тест повторной постановки упавших задач в очередь
+        """
+        templates = [settings.TEMPLATES_TO_TASK['ORDER_OPEN'],
+                     settings.TEMPLATE_PERIODICK_TASK_PATH,
+                     settings.TEMPLATE_PERIODICK_TASK_PATH,
+                     ]
+        for number, template in enumerate(templates):
+            TaskFailure.objects.create(
+                task='library.tasks.mail_task',
+                task_id=str(number),
+                args=[f'OR_{number}', template],
+                exception='ObjectDoesNotExist()',
+            )
+        TaskFailure.objects.create(task='library.tasks.archive_orders_task',
+                                   task_id='archive',
+                                   exception='OperationalError()',
+                                   )
+        out = StringIO()
+
+        with mock.patch.object(app, 'producer_or_acquire') as producer, \
+                mock.patch.object(app, 'send_task') as send_task:
+            call_command('redrive_failed_tasks',
+                         task='library.tasks.mail_task',
+                         chunk_size=2,
+                         stdout=out,
+                         )
+
+        self.assertIn('Перезапущено задач: 3', out.getvalue())
+        self.assertEqual(send_task.call_count, 3)
+        self.assertEqual(send_task.call_args.args[:2],
+                         ('library.tasks.mail_task',
+                          ['OR_2', settings.TEMPLATE_PERIODICK_TASK_PATH],
+                          ))
+        self.assertIs(send_task.call_args.kwargs['producer'],
+                      producer.return_value.__enter__.return_value)
+        self.assertEqual(send_task.call_args_list[0].kwargs['queue'],
+                         MAIL_QUEUE)
+        self.assertIsNone(send_task.call_args.kwargs['queue'])
+        self.assertEqual(TaskFailure.objects.filter(
+            redriven_at__isnull=True,
+            ).get().task_id, 'archive')
+
+    def test_mail_batch_task(self):
+        """Тест постановки неотправленных писем пачки
+        отдельными задачами с повторами
+        """
+        template = settings.TEMPLATE_PERIODICK_TASK_PATH
+        with mock.patch.object(mail_task, 'apply_async') as task:
+            result = mail_batch_task.apply(args=([['OR_0', template],
+                                                  ['EX_0', template],
+                                                  ],))
+
+        self.assertTrue(result.successful())
+        self.assertEqual(task.call_count, 2)
+        self.assertEqual(task.call_args.args[0], ('EX_0', template))
+        self.assertEqual(task.call_args.kwargs['queue'], MAIL_QUEUE)
+
+    def test_mail_batch_task_permanent_error(self):
+        """Тест записи письма пачки с постоянной ошибкой SMTP
+        без постановки mail_task
+        """
+        template = settings.TEMPLATE_PERIODICK_TASK_PATH
+        error = SMTPRecipientsRefused({'bad@mail.ru': (550, b'No such user')})
+        with mock.patch('library.tasks.send_mails', side_effect=error), \
+                mock.patch.object(mail_task, 'apply_async') as task:
+            result = mail_batch_task.apply(args=([['OR_0', template]],))
+
+        self.assertTrue(result.successful())
+        task.assert_not_called()
+        failure = TaskFailure.objects.get()
+        self.assertEqual(failure.task, 'library.tasks.mail_task')
+        self.assertEqual(failure.args, ['OR_0', template])
+
+
+class TestTaskRoutes(TestCase):
+    """Тесты маршрутизации задач по очередям
+    """
+
+    def _queue(self, task, **options):
+        return app.amqp.router.route(options, task.name)['queue'].name
+
+    def test_task_routes(self):
+        """Тест очередей задач
+        """
+        self.assertEqual(self._queue(mail_task), BULK_QUEUE)
+        self.assertEqual(self._queue(overdue_digest_task), BULK_QUEUE)
+        self.assertEqual(self._queue(archive_orders_task), DEFAULT_QUEUE)
+        self.assertEqual(self._queue(mail_task, queue=MAIL_QUEUE),
+                         MAIL_QUEUE)
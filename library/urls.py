@@ -6,6 +6,8 @@ from library.views import (BookCreateAPIView,
                            BookRetrieveAPIView,
                            BookDeleteAPIView,
                            BookUpdateAPIView,
+                           BookImportAPIView,
+                           BookExportAPIView,
                            AuthorCreateAPIView,
                            AuthorListAPIView,
                            AuthorDeleteAPIView,
@@ -30,11 +32,14 @@ from library.views import (BookCreateAPIView,
                            OrderListAPIView,
                            OrderOpenAPIView,
                            OrderRerieveAPIView,
+                           OrderHistoryListAPIView,
+                           OrderExportAPIView,
                            ExtensionAcceptAPIView,
                            ExtensionCancelAPIView,
                            ExtensionListAPIView,
                            ExtensionOpenAPIView,
                            ExtensionRetrieveAPIView,
+                           ExtensionExportAPIView,
                            )
 
 
@@ -62,6 +67,14 @@ urlpatterns = [
          BookDeleteAPIView.as_view(),
          name='book_delete',
          ),
+    path('api/book/import/',
+         BookImportAPIView.as_view(),
+         name='book_import',
+         ),
+    path('api/book/export/',
+         BookExportAPIView.as_view(),
+         name='book_export',
+         ),
     # Автор
     path('api/author/list/',
          AuthorListAPIView.as_view(),
@@ -163,6 +176,14 @@ urlpatterns = [
          OrderListAPIView.as_view(),
          name='order_list',
          ),
+    path('api/order/history/',
+         OrderHistoryListAPIView.as_view(),
+         name='order_history',
+         ),
+    path('api/order/export/',
+         OrderExportAPIView.as_view(),
+         name='order_export',
+         ),
     # Запрос на продление
     path('api/extension/open/<int:pk>/',
          ExtensionOpenAPIView.as_view(),
@@ -184,4 +205,8 @@ urlpatterns = [
          ExtensionListAPIView.as_view(),
          name='extension_list',
          ),
+    path('api/extension/export/',
+         ExtensionExportAPIView.as_view(),
+         name='extension_export',
+         ),
 ]
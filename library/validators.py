@@ -4,7 +4,7 @@ from rest_framework.serializers import ModelSerializer
 from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
 
-from typing import Any, List, Union, Dict
+from typing import Any, Callable, List, Union, Dict
 
 from datetime import date
 
@@ -27,7 +27,7 @@ def get_value(field: str,
             field = instance._meta.get_field(field)
             value = field.value_from_object(instance)
         else:
-            field = instance.model._meta.get_field(field)
+            field = serializer.Meta.model._meta.get_field(field)
             if field.has_default():
                 value = field.default
             else:
@@ -48,6 +48,23 @@ def tigger_to_check(attrs: Dict,
     return need_check
 
 
+def collect_errors(rows: List[Dict],
+                   check: Callable[[Dict], None],
+                   ) -> Dict[int, Dict]:
+    """Проверка пачки записей одной функцией
+
+    Returns:
+        Dict[int, Dict]: Ошибки по индексу записи в пачке
+    """
+    errors = {}
+    for index, row in enumerate(rows):
+        try:
+            check(row)
+        except ValidationError as error:
+            errors[index] = error.detail
+    return errors
+
+
 class YearValidator:
     """Валидатор года
     """
@@ -85,6 +102,14 @@ class YearValidator:
             published = get_value(self.published, attrs, serializer)
             self._check_valid_year(year, published)
 
+    def validate_many(self, rows: List[Dict]) -> Dict[int, Dict]:
+        """Проверка пачки новых записей без сериализатора
+        """
+        return collect_errors(rows, lambda row: self._check_valid_year(
+            row[self.year],
+            row.get(self.published, True),
+        ))
+
 
 class VolumeValidator:
     """Валидатор тома
@@ -122,12 +147,16 @@ class VolumeValidator:
     def _check_dublicate_number_of_volume(self,
                                           volume: Union[Volume, None],
                                           num_of_volume: Union[int, None],
+                                          exclude_pk: Union[int, None] = None,
                                           ) -> None:
         """Проверка уникальности номера в томе
+        Обновляемая книга исключается из проверки
         """
         if volume:
             volume = Book.objects.filter(Q(volume=volume) &
                                          Q(num_of_volume=num_of_volume))
+            if exclude_pk is not None:
+                volume = volume.exclude(pk=exclude_pk)
             if volume.exists():
                 raise ValidationError(
                     {'num_of_volume': 'В данном томе уже присутсвует\
@@ -140,7 +169,74 @@ class VolumeValidator:
             volume = get_value(self.volume, attrs, serializer)
             num_of_volume = get_value(self.num_of_volume, attrs, serializer)
             self._check_values_volume(volume, num_of_volume)
-            self._check_dublicate_number_of_volume(volume, num_of_volume)
+            instance = serializer.instance
+            if instance is not None and self._is_unchanged(instance,
+                                                           volume,
+                                                           num_of_volume,
+                                                           ):
+                return
+            self._check_dublicate_number_of_volume(
+                volume,
+                num_of_volume,
+                getattr(instance, 'pk', None),
+            )
+
+    def _is_unchanged(self,
+                      instance: Book,
+                      volume: Union[Volume, int, None],
+                      num_of_volume: Union[int, None],
+                      ) -> bool:
+        """Номер в томе у обновляемой книги не изменился
+        """
+        current = getattr(instance, f'{self.volume}_id', None)
+        return (current is not None and
+                current == getattr(volume, 'pk', volume) and
+                getattr(instance, self.num_of_volume) == num_of_volume)
+
+    def check_integrity(self,
+                        volume: Union[Volume, None],
+                        num_of_volume: Union[int, None],
+                        exclude_pk: Union[int, None] = None,
+                        ) -> None:
+        """Перевод ошибки целостности в ошибку поля
+        Вызывается после IntegrityError, когда номер в томе
+        заняли одновременным запросом
+        """
+        self._check_dublicate_number_of_volume(volume,
+                                               num_of_volume,
+                                               exclude_pk,
+                                               )
+
+    def validate_many(self, rows: List[Dict]) -> Dict[int, Dict]:
+        """Проверка пачки новых записей без сериализатора
+
+        Занятые номера в томах выбираются одним запросом,
+        повторы номеров внутри пачки тоже считаются ошибкой
+        """
+        errors = collect_errors(rows, lambda row: self._check_values_volume(
+            row.get(self.volume),
+            row.get(self.num_of_volume),
+        ))
+        pairs = {(row[self.volume].pk, row[self.num_of_volume])
+                 for index, row in enumerate(rows)
+                 if index not in errors and row.get(self.volume)}
+        if not pairs:
+            return errors
+        taken = set(Book.objects.filter(
+            volume__in={volume for volume, _ in pairs},
+            num_of_volume__in={number for _, number in pairs},
+        ).values_list('volume', 'num_of_volume'))
+        for index, row in enumerate(rows):
+            if index in errors or not row.get(self.volume):
+                continue
+            pair = (row[self.volume].pk, row[self.num_of_volume])
+            if pair in taken:
+                errors[index] = {
+                    'num_of_volume': 'В данном томе уже присутсвует '
+                    'книга с таким номером',
+                }
+            taken.add(pair)
+        return errors
 
 
 class PublishedValidator:
@@ -197,6 +293,18 @@ class PublishedValidator:
             publish = get_value(self.is_published, attrs, serializer)
             self._check_status_depens_on_published(bs, circ, publish)
 
+    def validate_many(self, rows: List[Dict]) -> Dict[int, Dict]:
+        """Проверка пачки новых записей без сериализатора
+        """
+        return collect_errors(
+            rows,
+            lambda row: self._check_status_depens_on_published(
+                row.get(self.best_seller, False),
+                row.get(self.circulation),
+                row.get(self.is_published, True),
+            ),
+        )
+
 
 class OrderRepeatValidator:
     """Валидатор контроля повторения
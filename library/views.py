@@ -1,3 +1,5 @@
+import io
+import os
 from datetime import date, timedelta
 
 from rest_framework import generics, status
@@ -7,12 +9,15 @@ from rest_framework.response import Response
 
 from django_filters.rest_framework import backends as filters
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
 from django.core.exceptions import (MultipleObjectsReturned,
                                     ObjectDoesNotExist,
                                     )
 from django.conf import settings
 
+from config.utils import read_records
+
 from library.models import (Book,
                             Genre,
                             Author,
@@ -30,6 +35,7 @@ from library.serializers import (BookCreateSerializer,
                                  OrderOpenSerializer,
                                  OrderViewSerializer,
                                  OrderListViewSerializer,
+                                 OrderHistorySerializer,
                                  ExtensionAcceptSerializer,
                                  ExtensionCancelSerializer,
                                  ExtensionOpenSerializer,
@@ -38,6 +44,11 @@ from library.serializers import (BookCreateSerializer,
                                  )
 from library.permissions import IsLibrarian, IsSuperUser, IsCurrentUser
 from library.task_manager import TaskManager
+from library.archive import get_order_history
+from library.importers import CatalogImporter
+from library.exports import ExportMixin
+from library.filters import AliasOrderingFilter
+from library.mixins import SparseFieldsViewMixin
 from library.paginators import (BasePaginate,
                                 PaginageVolumes,
                                 PaginagePublishers,
@@ -73,34 +84,24 @@ class BookDeleteAPIView(generics.DestroyAPIView):
                           IsSuperUser | IsLibrarian]
 
 
-class BookRetrieveAPIView(generics.RetrieveAPIView):
+class BookRetrieveAPIView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Енд поинт просмотра книги
     """
     serializer_class = BookRetrieveSerializer
-    queryset = Book.objects.get_queryset().select_related(
-        'publisher',
-        'volume',
-        ).prefetch_related(
-            'author',
-            'genre',
-            )
+    queryset = Book.objects.get_queryset().select_related('volume')
     permission_classes = [permissions.AllowAny]
 
 
-class BookListAPIView(generics.ListAPIView):
+class BookListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Енд поинт списка книг
     """
     serializer_class = BookRetrieveSerializer
     queryset = Book.objects.get_queryset().order_by('name').select_related(
-        'publisher',
         'volume',
-        ).prefetch_related(
-            'author',
-            'genre',
-            )
+        )
     permission_classes = [permissions.AllowAny]
     filter_backends = (filters.DjangoFilterBackend,
-                       OrderingFilter,)
+                       AliasOrderingFilter,)
     filterset_fields = ('name',
                         'publisher',
                         'best_seller',
@@ -120,10 +121,68 @@ class BookListAPIView(generics.ListAPIView):
                        'quantity',
                        'count_pages',
                        'author',
+                       'genre',
                        )
+    # Сортировка по именам из индексированных полей книги,
+    # без соединения, которое дублирует книги
+    ordering_aliases = {'author': 'authors_display',
+                        'genre': 'genres_display',
+                        'publisher': 'publisher_name',
+                        }
     pagination_class = BasePaginate
 
 
+class BookExportAPIView(ExportMixin, BookListAPIView):
+    """Енд поинт выгрузки каталога книг с фильтрами списка
+    """
+    export_name = 'books'
+    export_fields = ('id',
+                     'name',
+                     'publisher__name',
+                     'volume__name',
+                     'num_of_volume',
+                     'age_restriction',
+                     'count_pages',
+                     'year_published',
+                     'circulation',
+                     'quantity',
+                     'best_seller',
+                     'is_published',
+                     )
+    # Имена в том же виде, что и в списке книг: через "; ",
+    # с экранированием ";" внутри имени
+    export_expressions = {'authors': F('authors_display'),
+                          'genres': F('genres_display'),
+                          }
+
+
+class BookImportAPIView(generics.GenericAPIView):
+    """Енд поинт импорта каталога книг из CSV или NDJSON файла
+    """
+    permission_classes = [permissions.IsAuthenticated &
+                          (IsSuperUser | IsLibrarian)]
+    file_types = ('csv', 'ndjson')
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': 'Файл не был передан'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        file_type = request.query_params.get(
+            'type',
+            os.path.splitext(upload.name)[1].lstrip('.').lower(),
+        )
+        if file_type not in self.file_types:
+            return Response({'type': 'Поддерживаются только CSV и NDJSON'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        stream = io.TextIOWrapper(upload.file,
+                                  encoding='utf-8-sig',
+                                  newline='',
+                                  )
+        report = CatalogImporter().run(read_records(stream, file_type))
+        return Response(report, status=status.HTTP_200_OK)
+
+
 # Автор
 class AuthorCreateAPIView(generics.CreateAPIView):
     """Енд поинт создания автора
@@ -151,19 +210,19 @@ class AuthorDeleteAPIView(generics.DestroyAPIView):
                           IsSuperUser | IsLibrarian]
 
 
-class AuthorRetrieveAPIView(generics.RetrieveAPIView):
+class AuthorRetrieveAPIView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Енд поинт просмотра автора
     """
     serializer_class = AuthorSerializer
-    queryset = Author.objects.get_queryset()
+    queryset = Author.objects.get_queryset().prefetch_related('book_set')
     permission_classes = [permissions.AllowAny]
 
 
-class AuthorListAPIView(generics.ListAPIView):
+class AuthorListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Енд поинт списка авторов
     """
     serializer_class = AuthorSerializer
-    queryset = Author.objects.get_queryset()
+    queryset = Author.objects.get_queryset().prefetch_related('book_set')
     permission_classes = [permissions.AllowAny]
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_fields = ('last_name', 'first_name',)
@@ -197,7 +256,8 @@ class PublisherDeleteAPIView(generics.DestroyAPIView):
                           IsSuperUser | IsLibrarian]
 
 
-class PublisherRetrieveAPIView(generics.RetrieveAPIView):
+class PublisherRetrieveAPIView(SparseFieldsViewMixin,
+                               generics.RetrieveAPIView):
     """Енд поинт просмотра издателя
     """
     serializer_class = PublisherSerializer
@@ -205,7 +265,7 @@ class PublisherRetrieveAPIView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class PublisherListAPIView(generics.ListAPIView):
+class PublisherListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Енд поинт списка издателей
     """
     serializer_class = PublisherSerializer
@@ -245,19 +305,27 @@ class VolumeDeleteAPIView(generics.DestroyAPIView):
                           IsSuperUser | IsLibrarian]
 
 
-class VolumeRetrieveAPIView(generics.RetrieveAPIView):
+class VolumeRetrieveAPIView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Енд поинт просмотра тома
     """
     serializer_class = VolumeSerializer
-    queryset = Volume.objects.get_queryset()
+    queryset = Volume.objects.get_queryset().prefetch_related(
+        Prefetch('books',
+                 queryset=Book.objects.select_related('volume'),
+                 ),
+    )
     permission_classes = [permissions.AllowAny]
 
 
-class VolumeListAPIView(generics.ListAPIView):
+class VolumeListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Енд поинт списка томов
     """
     serializer_class = VolumeSerializer
-    queryset = Volume.objects.get_queryset().order_by('name')
+    queryset = Volume.objects.get_queryset().order_by('name').prefetch_related(
+        Prefetch('books',
+                 queryset=Book.objects.select_related('volume'),
+                 ),
+    )
     permission_classes = [permissions.AllowAny]
     filter_backends = (filters.DjangoFilterBackend,
                        OrderingFilter,)
@@ -293,7 +361,7 @@ class GenreDeleteAPIView(generics.DestroyAPIView):
                           IsSuperUser | IsLibrarian]
 
 
-class GenreRetrieveAPIView(generics.RetrieveAPIView):
+class GenreRetrieveAPIView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Енд поинт просмотра жанра
     """
     serializer_class = GenreSerializer
@@ -301,7 +369,7 @@ class GenreRetrieveAPIView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class GenreListAPIView(generics.ListAPIView):
+class GenreListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Енд поинт списка жанров
     """
     serializer_class = GenreSerializer
@@ -349,17 +417,18 @@ class OrderCloseAPIView(generics.DestroyAPIView):
                           (IsLibrarian | IsSuperUser)]
 
     def perform_destroy(self, instance):
-        instance.time_return = date.today()
-        instance.status = 'end'
-        instance.save(update_fields=('time_return', 'status'))
-        task_manager = TaskManager(instance)
-        task_manager.delete_periodic_task()
-        TaskManager.launch_task(instance,
-                                settings.TEMPLATES_TO_TASK['ORDER_CLOSE'],
-                                )
+        with transaction.atomic():
+            instance.time_return = date.today()
+            instance.status = 'end'
+            instance.save(update_fields=('time_return', 'status'))
+            task_manager = TaskManager(instance)
+            task_manager.delete_periodic_task()
+            TaskManager.launch_task(instance,
+                                    settings.TEMPLATES_TO_TASK['ORDER_CLOSE'],
+                                    )
 
 
-class OrderRerieveAPIView(generics.RetrieveAPIView):
+class OrderRerieveAPIView(SparseFieldsViewMixin, generics.RetrieveAPIView):
     """Просмотр статуса выданной книги
     """
     queryset = Order.objects.get_queryset().prefetch_related('book')
@@ -368,7 +437,7 @@ class OrderRerieveAPIView(generics.RetrieveAPIView):
                           (IsCurrentUser | IsLibrarian | IsSuperUser)]
 
 
-class OrderListAPIView(generics.ListAPIView):
+class OrderListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     """Просмотр списка выданных книг
     """
     queryset = Order.objects.get_queryset().prefetch_related('book')
@@ -393,6 +462,35 @@ class OrderListAPIView(generics.ListAPIView):
         return queryset
 
 
+class OrderExportAPIView(ExportMixin, OrderListAPIView):
+    """Выгрузка выдач книг с фильтрами списка
+    """
+    export_name = 'orders'
+    export_fields = ('id',
+                     'book',
+                     'book__name',
+                     'tenant',
+                     'tenant__username',
+                     'count_extensions',
+                     'time_order',
+                     'time_return',
+                     'status',
+                     )
+
+
+class OrderHistoryListAPIView(generics.ListAPIView):
+    """Просмотр истории выдач, включая архивные
+    """
+    serializer_class = OrderHistorySerializer
+    pagination_class = BasePaginate
+
+    def get_queryset(self):
+        user = self.request.user
+        if not user.is_librarian and not user.is_superuser:
+            return get_order_history(user)
+        return get_order_history()
+
+
 class ExtensionOpenAPIView(generics.CreateAPIView):
     """Открытие запроса на продление
     """
@@ -474,3 +572,20 @@ class ExtensionListAPIView(generics.ListAPIView):
         else:
             pass
         return queryset
+
+
+class ExtensionExportAPIView(ExportMixin, ExtensionListAPIView):
+    """Выгрузка запросов на продление с фильтрами списка
+    """
+    export_name = 'extensions'
+    export_fields = ('id',
+                     'order',
+                     'order__book__name',
+                     'applicant',
+                     'applicant__username',
+                     'receiving',
+                     'time_request',
+                     'time_response',
+                     'response_text',
+                     'solution',
+                     )
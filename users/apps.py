@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        import users.signals  # noqa: F401
+        from django.contrib.auth.password_validation import (
+            get_default_password_validators,
+        )
+
+        # Валидаторы паролей создаются один раз на процесс,
+        # список распространенных паролей загружается при старте
+        get_default_password_validators()
@@ -0,0 +1,227 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Union
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from django.db import router
+from django.conf import settings
+from django.utils import timezone
+from django.core.cache import cache, caches
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractUser
+
+from users.models import TokenRevocation
+
+# Роли пользователя, которых достаточно для проверки прав
+ROLE_CLAIMS = ('is_active',
+               'is_librarian',
+               'is_superuser',
+               'is_staff',
+               )
+SNAPSHOT_FIELDS = ('id', *ROLE_CLAIMS)
+
+
+class LocalSnapshotCache:
+    """LRU кеш снимков пользователей в памяти процесса
+    Запись живет не дольше timeout секунд
+    """
+
+    def __init__(self, maxsize: int, timeout: int) -> None:
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Union[Dict, None]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, snapshot = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return snapshot
+
+    def set(self, key: int, snapshot: Dict) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, snapshot)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: int) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+local_snapshots = LocalSnapshotCache(settings.USER_SNAPSHOT_LOCAL_SIZE,
+                                     settings.USER_SNAPSHOT_LOCAL_TIMEOUT,
+                                     )
+
+
+def _cache_key(pk: int) -> str:
+    return f'users:snapshot:{pk}'
+
+
+def get_user_snapshot(pk: int) -> Union[Dict, None]:
+    """Снимок пользователя из локального кеша,
+    общего кеша или базы данных
+    """
+    snapshot = local_snapshots.get(pk)
+    if snapshot is not None:
+        return snapshot
+    snapshot = cache.get(_cache_key(pk))
+    if snapshot is None:
+        snapshot = get_user_model().objects.filter(
+            pk=pk,
+        ).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        cache.set(_cache_key(pk),
+                  snapshot,
+                  settings.USER_SNAPSHOT_CACHE_TIMEOUT,
+                  )
+    local_snapshots.set(pk, snapshot)
+    return snapshot
+
+
+def invalidate_user_snapshot(pk: int) -> None:
+    """Удаление снимка пользователя из кешей
+    """
+    local_snapshots.delete(pk)
+    cache.delete(_cache_key(pk))
+
+
+def _revocation_cache():
+    """Общий кеш списка отзыва или None, если отзыв хранится в базе
+    """
+    if settings.TOKEN_REVOCATION_CACHE is None:
+        return None
+    return caches[settings.TOKEN_REVOCATION_CACHE]
+
+
+def _revoked_key(pk: int) -> str:
+    return f'users:revoked:{pk}'
+
+
+def revoke_user_tokens(pk: int) -> None:
+    """Отзыв всех выданных до этого момента токенов пользователя
+
+    Токены, выпущенные по обновлению, сохраняют время выпуска
+    refresh токена, поэтому запись хранится время жизни refresh токена
+    """
+    revoked_at = timezone.now()
+    revocations = _revocation_cache()
+    if revocations is None:
+        TokenRevocation.objects.update_or_create(
+            user_id=pk,
+            defaults={'revoked_at': revoked_at},
+        )
+        return
+    revocations.set(_revoked_key(pk),
+                    revoked_at.timestamp(),
+                    int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()),
+                    )
+
+
+def get_tokens_revoked_at(pk: int) -> Union[float, None]:
+    """Время отзыва токенов пользователя в секундах эпохи
+    из общего кеша или базы данных
+    """
+    revocations = _revocation_cache()
+    if revocations is not None:
+        return revocations.get(_revoked_key(pk))
+    revoked_at = TokenRevocation.objects.filter(
+        user_id=pk,
+    ).values_list('revoked_at', flat=True).first()
+    return revoked_at.timestamp() if revoked_at else None
+
+
+def build_user(snapshot: Dict) -> AbstractUser:
+    """Пользователь из снимка без запроса к базе
+    Остальные поля модели отложены и загружаются при обращении
+    """
+    model = get_user_model()
+    # from_db ожидает значения в порядке полей модели
+    field_names = [field.attname for field in model._meta.concrete_fields
+                   if field.attname in snapshot]
+    return model.from_db(router.db_for_read(model),
+                         field_names,
+                         [snapshot[field] for field in field_names],
+                         )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT аутентификация без запроса пользователя к базе
+
+    Пользователь собирается из закешированного снимка,
+    остальные поля модели отложены и загружаются при обращении
+    """
+
+    def get_user_pk(self, validated_token) -> int:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed(
+                'Токен не содержит идентификатор пользователя',
+                code='token_not_valid',
+            )
+        try:
+            return get_user_model()._meta.pk.to_python(user_id)
+        except Exception:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found',
+                                       )
+
+    def check_snapshot(self, snapshot: Union[Dict, None]) -> None:
+        if snapshot is None:
+            raise AuthenticationFailed('Пользователь не найден',
+                                       code='user_not_found',
+                                       )
+        if not snapshot['is_active']:
+            raise AuthenticationFailed('Пользователь неактивен',
+                                       code='user_inactive',
+                                       )
+
+    def get_user(self, validated_token) -> AbstractUser:
+        snapshot = get_user_snapshot(self.get_user_pk(validated_token))
+        self.check_snapshot(snapshot)
+        return build_user(snapshot)
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """JWT аутентификация по ролям из токена
+
+    Роли берутся из утверждений токена, база и кеш снимков
+    не используются. Токены деактивированного пользователя
+    и пользователя с измененными ролями отклоняются
+    по списку отзыва в общем кеше, без общего кеша - в базе.
+    Токены без ролей обрабатываются по снимку пользователя
+    """
+
+    def get_user(self, validated_token) -> AbstractUser:
+        pk = self.get_user_pk(validated_token)
+        revoked_at = get_tokens_revoked_at(pk)
+        # iat с долями секунды, у токенов без них отклоняются
+        # и выпущенные в ту же секунду после отзыва
+        if (revoked_at is not None and
+                validated_token.get('iat', 0) <= revoked_at):
+            raise AuthenticationFailed('Токен отозван',
+                                       code='token_revoked',
+                                       )
+        if not all(claim in validated_token for claim in ROLE_CLAIMS):
+            return super().get_user(validated_token)
+        snapshot = {claim: validated_token[claim] for claim in ROLE_CLAIMS}
+        snapshot['id'] = pk
+        self.check_snapshot(snapshot)
+        return build_user(snapshot)
@@ -35,9 +35,13 @@ class HandleCreateUser:
             в случае успеха
         """
         try:
-            instance = self.model._default_manager.create(**validated_data)
+            # Пароль хэшируется до вставки, пользователь
+            # записывается одним INSERT
+            instance = self.model(**validated_data)
             instance.set_password(password)
-            instance.save(update_fields=['password'])
+            instance.save(force_insert=True,
+                          using=self.model._default_manager.db,
+                          )
         except TypeError:
             tb = traceback.format_exc()
             msg = (
@@ -0,0 +1,60 @@
+import time
+
+from django.db import transaction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from users.handlers import HandleCreateUser
+from users.validators import ValidatorSetPasswordUser
+
+
+class Command(BaseCommand):
+    """Замер скорости создания пользователей
+    с выбранным хэшером паролей
+    """
+    help = ('Создает пользователей в откатываемой транзакции '
+            'и замеряет скорость')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users',
+                            type=int,
+                            default=100,
+                            help='Количество пользователей',
+                            )
+        parser.add_argument('--hasher',
+                            default=None,
+                            help='Путь к хэшеру паролей, по умолчанию '
+                            'первый из PASSWORD_HASHERS',
+                            )
+
+    def handle(self, *args, **options):
+        hasher = options['hasher'] or settings.PASSWORD_HASHERS[0]
+        hashers = [hasher] + [path for path in settings.PASSWORD_HASHERS
+                              if path != hasher]
+        validator = ValidatorSetPasswordUser(['password', 'password_check'])
+        model = get_user_model()
+        with override_settings(PASSWORD_HASHERS=hashers):
+            start = time.perf_counter()
+            with transaction.atomic():
+                for number in range(options['users']):
+                    data = {
+                        'username': f'benchmark{number}',
+                        'email': f'benchmark{number}@gmail.com',
+                        'phone': f'+7900{number:07d}',
+                        'password': 'Benchmark-password-1',
+                        'password_check': 'Benchmark-password-1',
+                    }
+                    validator(data)
+                    HandleCreateUser(model, data).create()
+                transaction.set_rollback(True)
+            runtime = time.perf_counter() - start
+            algorithm = get_hasher().algorithm
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Хэшер: {algorithm}, пользователей: {options["users"]}, '
+            f'время: {runtime:.2f} сек., '
+            f'{options["users"] / runtime:.1f} пользователей/сек.'
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.BigIntegerField(help_text='Первичный ключ пользователя, запись остается после его удаления', primary_key=True, serialize=False, verbose_name='пользователь')),
+                ('revoked_at', models.DateTimeField(help_text='Токены, выпущенные до этого момента, отклоняются', verbose_name='время отзыва')),
+            ],
+            options={
+                'verbose_name': 'отзыв токенов',
+                'verbose_name_plural': 'отзывы токенов',
+            },
+        ),
+    ]
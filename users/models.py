@@ -24,3 +24,23 @@ class User(AbstractUser):
                                        verbose_name='библиотекарь',
                                        help_text='Обозначение библитекаря',
                                        )
+
+
+class TokenRevocation(models.Model):
+    """Время отзыва JWT пользователя
+    Используется вместо кеша, если общий кеш не настроен
+    """
+    user_id = models.BigIntegerField(primary_key=True,
+                                     verbose_name='пользователь',
+                                     help_text='Первичный ключ пользователя, '
+                                     'запись остается после его удаления',
+                                     )
+
+    revoked_at = models.DateTimeField(verbose_name='время отзыва',
+                                      help_text='Токены, выпущенные до этого '
+                                      'момента, отклоняются',
+                                      )
+
+    class Meta:
+        verbose_name = 'отзыв токенов'
+        verbose_name_plural = 'отзывы токенов'
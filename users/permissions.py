@@ -3,15 +3,23 @@ from rest_framework.permissions import BasePermission
 
 class IsCurrentUser(BasePermission):
     """Проверка на текущего пользователя
+    Сравнивает идентификаторы без запроса к базе
     """
     def has_permission(self, request, view):
         pk = view.kwargs['pk']
-        user = view.queryset.get(pk=pk)
-        return request.user == user
+        return (request.user.pk is not None and
+                str(request.user.pk) == str(pk))
 
 
 class IsSuperUser(BasePermission):
     """Проверка прав доступа администратора
     """
     def has_permission(self, request, view):
-        return request.user.is_superuser
+        return bool(getattr(request.user, 'is_superuser', False))
+
+
+class IsLibrarian(BasePermission):
+    """Права доступа библиотекаря
+    """
+    def has_permission(self, request, view):
+        return bool(getattr(request.user, 'is_librarian', False))
@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from django.contrib.auth import get_user_model
 
 from users.validators import ValidatorSetPasswordUser
 from users.handlers import HandleCreateUser
+from users.authentication import ROLE_CLAIMS
 from library.serializers import OrderListViewSerializer
 
 
@@ -72,3 +74,18 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
                   'email',
                   'phone',
                   )
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Сериализатор получения токенов с ролями пользователя
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in ROLE_CLAIMS:
+            token[claim] = getattr(user, claim)
+        # Время выпуска с долями секунды, чтобы токен, полученный
+        # сразу после отзыва, не попадал под него
+        token['iat'] = token.current_time.timestamp()
+        return token
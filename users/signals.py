@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.conf import settings
+
+from users.authentication import (ROLE_CLAIMS,
+                                  invalidate_user_snapshot,
+                                  revoke_user_tokens,
+                                  )
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def check_user_roles(sender, instance, update_fields=None, **kwargs) -> None:
+    """Проверка изменения ролей пользователя перед сохранением
+    """
+    instance._roles_changed = False
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(ROLE_CLAIMS):
+        return
+    stored = sender.objects.filter(pk=instance.pk).values(*ROLE_CLAIMS).first()
+    instance._roles_changed = stored is not None and any(
+        stored[claim] != getattr(instance, claim) for claim in ROLE_CLAIMS
+    )
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def reset_user_snapshot(sender, instance, **kwargs) -> None:
+    """Сброс закешированного снимка пользователя
+    при изменении, деактивации или удалении,
+    при смене ролей и удалении выданные токены отзываются
+
+    Снимок сбрасывается еще раз после фиксации транзакции,
+    чтобы не остался снимок, прочитанный до нее
+    """
+    pk = instance.pk
+    if (kwargs['signal'] is post_delete or
+            getattr(instance, '_roles_changed', False)):
+        revoke_user_tokens(pk)
+    invalidate_user_snapshot(pk)
+    transaction.on_commit(lambda: invalidate_user_snapshot(pk))
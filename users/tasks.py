@@ -0,0 +1,31 @@
+import io
+import logging
+from typing import Dict
+
+from django.core.files.storage import default_storage
+
+from users.importers import UserImporter
+from config.utils import read_records
+from config.celery import app
+
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(ignore_result=False)
+def import_users_task(name: str, file_type: str) -> Dict:
+    """Задача по импорту читателей из загруженного файла,
+    файл удаляется после импорта
+    """
+    try:
+        with default_storage.open(name, 'rb') as upload:
+            stream = io.TextIOWrapper(upload,
+                                      encoding='utf-8-sig',
+                                      newline='',
+                                      )
+            report = UserImporter().run(read_records(stream, file_type))
+    finally:
+        default_storage.delete(name)
+    logger.info('Импорт читателей из %s: создано %s, ошибок %s',
+                name, report['created'], len(report['errors']))
+    return report
@@ -1,11 +1,33 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+import io
+import os
+import json
+import tempfile
+from unittest import mock
 
 from django.urls import reverse
+from django.test import override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 
 from users.validators import ValidatorSetPasswordUser
+from users.authentication import (CachedJWTAuthentication,
+                                  ClaimsJWTAuthentication,
+                                  local_snapshots,
+                                  )
+from users.serializers import RoleTokenObtainPairSerializer
+from users.handlers import HandleCreateUser
+from users.models import TokenRevocation
+from users.importers import UserImporter
+from users.tasks import import_users_task
+from config.utils import read_records
 
 
 class TestUserApi(APITestCase):
@@ -150,6 +172,23 @@ class TestUserApi(APITestCase):
         self.assertFalse(get_user_model().objects.get(username='test',
                                                       ).is_active)
 
+    def test_handle_create_user(self):
+        """Тест создания пользователя одним запросом
+        """
+        data = {'username': 'test',
+                'email': 'test@gmail.com',
+                'phone': '+7 (900) 900 1000',
+                'password': 'testroot',
+                'password_check': 'testroot',
+                }
+
+        with self.assertNumQueries(1):
+            user = HandleCreateUser(get_user_model(), data).create()
+
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('testroot'))
+        self.assertNotEqual(user.password, 'testroot')
+
     def test_validator_set_password_user(self):
         """Проверка валидатора для пользователя
         """
@@ -297,3 +336,297 @@ class TestLibrarianAPI(APITestCase):
         self.assertFalse(get_user_model().objects.get(
             pk=librarian.pk,
             ).is_active)
+
+
+class TestCachedAuthentication(APITestCase):
+    """Тесты JWT аутентификации по снимку пользователя
+    """
+
+    def setUp(self) -> None:
+        local_snapshots.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create(
+            username='librarian',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 1000',
+            password='testpassword',
+            is_librarian=True,
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def test_cached_user(self):
+        """Тест получения пользователя без запроса к базе
+        """
+        authentication = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            authentication.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = authentication.get_user(self.token)
+
+        self.assertEqual(user, self.user)
+        self.assertTrue(user.is_librarian)
+        self.assertFalse(user.is_superuser)
+        self.assertEqual(user.username, 'librarian')
+
+    def test_snapshot_invalidation(self):
+        """Тест сброса снимка при деактивации пользователя
+        """
+        user = get_user_model().objects.create(
+            username='user',
+            email='user@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+        )
+        token = AccessToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('users:user_profile', kwargs={'pk': user.pk})
+        delete_url = reverse('users:user_delete', kwargs={'pk': user.pk})
+
+        self.assertEqual(self.client.get(url).status_code,
+                         status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(delete_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(TOKEN_REVOCATION_CACHE='default')
+class TestClaimsAuthentication(APITestCase):
+    """Тесты JWT аутентификации по ролям из токена
+    """
+
+    def setUp(self) -> None:
+        local_snapshots.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='librarian',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 1000',
+            password='testpassword',
+            is_librarian=True,
+        )
+
+    def _access_token(self):
+        refresh = RoleTokenObtainPairSerializer.get_token(self.user)
+        return refresh.access_token
+
+    def test_token_claims(self):
+        """Тест ролей в выданном токене
+        """
+        url = reverse('users:token_obtain_pair')
+
+        response = self.client.post(url, {'username': 'librarian',
+                                          'password': 'testpassword',
+                                          }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data['access'])
+        self.assertTrue(token['is_librarian'])
+        self.assertFalse(token['is_superuser'])
+        self.assertTrue(token['is_active'])
+
+    def test_user_from_claims(self):
+        """Тест получения пользователя без запроса к базе
+        """
+        token = self._access_token()
+
+        with self.assertNumQueries(0):
+            user = ClaimsJWTAuthentication().get_user(token)
+
+        self.assertEqual(user, self.user)
+        self.assertTrue(user.is_librarian)
+
+    def test_revoke_on_role_change(self):
+        """Тест отзыва токенов при смене ролей
+        """
+        token = self._access_token()
+        self.user.is_librarian = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(token)
+
+    def test_token_after_revoke(self):
+        """Тест токена, выпущенного в ту же секунду после отзыва
+        """
+        old_token = self._access_token()
+        self.user.is_librarian = False
+        self.user.save()
+        token = self._access_token()
+
+        self.assertEqual(int(token['iat']), int(old_token['iat']))
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(old_token)
+        self.assertFalse(ClaimsJWTAuthentication().get_user(
+            token,
+        ).is_librarian)
+
+    @override_settings(TOKEN_REVOCATION_CACHE=None)
+    def test_revoke_without_shared_cache(self):
+        """Тест отзыва через базу, когда общего кеша нет
+        """
+        token = self._access_token()
+        self.user.is_librarian = False
+        self.user.save()
+        cache.clear()
+
+        with self.assertRaises(AuthenticationFailed):
+            ClaimsJWTAuthentication().get_user(token)
+        self.assertTrue(TokenRevocation.objects.filter(
+            user_id=self.user.pk,
+        ).exists())
+        with self.assertNumQueries(1):
+            user = ClaimsJWTAuthentication().get_user(self._access_token())
+        self.assertEqual(user, self.user)
+
+    def test_keep_token_on_profile_change(self):
+        """Тест сохранения токенов при изменении профиля
+        """
+        token = self._access_token()
+        self.user.first_name = 'name'
+        self.user.save(update_fields=('first_name',))
+
+        self.assertEqual(ClaimsJWTAuthentication().get_user(token), self.user)
+
+
+class TestUserImport(APITestCase):
+    """Тесты массового импорта читателей
+    """
+    csv_data = (
+        'username,email,phone,first_name,password\n'
+        'reader1,reader1@gmail.com,+79009000001,Reader,\n'
+        'reader2,reader2@gmail.com,+79009000002,,\n'
+        'reader3,reader1@gmail.com,+79009000003,,\n'
+        'existing,reader4@gmail.com,+79009000004,,\n'
+        'reader5,wrong-email,+79009000005,,\n'
+        'reader6,reader6@gmail.com,+79009000006,,Reader-password-6\n'
+    )
+
+    def setUp(self) -> None:
+        self.librarian = get_user_model().objects.create(
+            username='existing',
+            email='librarian@gmail.com',
+            phone='+7 (900) 900 1000',
+            password='testpassword',
+            is_librarian=True,
+        )
+
+    def test_import_csv(self):
+        """Тест импорта с отчетом об ошибках по строкам
+        """
+        records = read_records(io.StringIO(self.csv_data), 'csv')
+
+        report = UserImporter(chunk_size=2, hash_workers=2).run(records)
+
+        self.assertEqual(report['created'], 3)
+        self.assertEqual([error['row'] for error in report['errors']],
+                         [3, 4, 5])
+        self.assertIn('email', report['errors'][0]['errors'])
+        self.assertIn('username', report['errors'][1]['errors'])
+        self.assertIn('email', report['errors'][2]['errors'])
+        reader = get_user_model().objects.get(username='reader1')
+        self.assertEqual(str(reader.phone), '+79009000001')
+        self.assertFalse(reader.has_usable_password())
+        self.assertTrue(get_user_model().objects.get(
+            username='reader6',
+        ).check_password('Reader-password-6'))
+
+    def test_import_ndjson(self):
+        """Тест импорта NDJSON с неразобранной строкой
+        """
+        data = '\n'.join((
+            json.dumps({'username': 'reader1',
+                        'email': 'reader1@gmail.com',
+                        'phone': '+79009000001',
+                        }),
+            '{not json',
+            '',
+        ))
+        records = read_records(io.StringIO(data), 'ndjson')
+
+        report = UserImporter().run(records)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'][0]['row'], 2)
+
+    def test_import_view(self):
+        """Тест импорта через API библиотекарем
+        """
+        url = reverse('users:user_import')
+        upload = SimpleUploadedFile('readers.csv',
+                                    self.csv_data.encode('utf-8'),
+                                    )
+        self.client.force_authenticate(self.librarian)
+
+        response = self.client.post(url, {'file': upload},
+                                    format='multipart',
+                                    )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(len(response.data['errors']), 3)
+
+    def test_import_view_background(self):
+        """Тест передачи большого файла задаче Celery
+        """
+        url = reverse('users:user_import')
+        upload = SimpleUploadedFile('readers.csv',
+                                    self.csv_data.encode('utf-8'),
+                                    )
+        self.client.force_authenticate(self.librarian)
+
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(MEDIA_ROOT=directory,
+                                  USER_IMPORT_SYNC_MAX_SIZE=10,
+                                  ), \
+                mock.patch.object(import_users_task, 'delay',
+                                  return_value=mock.Mock(id='task'),
+                                  ) as delay:
+            response = self.client.post(url, {'file': upload},
+                                        format='multipart',
+                                        )
+            report = import_users_task.apply(delay.call_args.args).get()
+            files = os.listdir(os.path.join(directory, 'imports'))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {'task_id': 'task'})
+        self.assertEqual(delay.call_args.args[1], 'csv')
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(len(report['errors']), 3)
+        self.assertEqual(files, [])
+
+    def test_import_view_permission(self):
+        """Тест запрета импорта обычному пользователю
+        """
+        reader = get_user_model().objects.create(
+            username='reader',
+            email='reader@gmail.com',
+            phone='+7 (900) 900 2000',
+            password='testpassword',
+        )
+        url = reverse('users:user_import')
+        upload = SimpleUploadedFile('readers.csv',
+                                    self.csv_data.encode('utf-8'),
+                                    )
+        self.client.force_authenticate(reader)
+
+        response = self.client.post(url, {'file': upload},
+                                    format='multipart',
+                                    )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command(self):
+        """Тест команды импорта
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'readers.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.csv_data)
+            out = io.StringIO()
+
+            call_command('import_users', path, stdout=out)
+
+        self.assertIn('Создано пользователей: 3, ошибок: 3', out.getvalue())
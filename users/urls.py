@@ -8,6 +8,7 @@ from users.views import (UserProfileViewAPI,
                          UserUpdateProfileAPI,
                          UserDeleteProfuleAPI,
                          LibrarianCreateProfileAPI,
+                         UserImportAPIView,
                          )
 
 app_name = UsersConfig.name
@@ -26,6 +27,10 @@ urlpatterns = [
           UserCreateProfileAPI.as_view(),
           name='user_create',
           ),
+     path('api/user/import/',
+          UserImportAPIView.as_view(),
+          name='user_import',
+          ),
      path('api/user/<int:pk>/',
           UserProfileViewAPI.as_view(),
           name='user_profile',
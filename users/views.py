@@ -1,14 +1,22 @@
-from rest_framework import generics, permissions
+import io
+import os
+
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import default_storage
 
 from users.serializers import (UserProfileSerializer,
                                UserProfileCreateSerializer,
                                UserProfileUpdateSerializer,
                                )
-from users.permissions import IsCurrentUser, IsSuperUser
+from users.permissions import IsCurrentUser, IsLibrarian, IsSuperUser
+from users.importers import UserImporter
+from users.tasks import import_users_task
+from config.utils import read_records
 
 
 class UserProfileViewAPI(generics.RetrieveAPIView):
@@ -99,3 +107,39 @@ class LibrarianCreateProfileAPI(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(is_staff=True, is_librarian=True)
+
+
+class UserImportAPIView(generics.GenericAPIView):
+    """Массовый импорт читателей из CSV или NDJSON файла,
+    может выполнить библиотекарь или администратор
+
+    Файл больше USER_IMPORT_SYNC_MAX_SIZE сохраняется и импортируется
+    задачей Celery, ответ 202 содержит идентификатор задачи
+    """
+    permission_classes = [permissions.IsAuthenticated &
+                          (IsLibrarian | IsSuperUser)]
+    file_types = ('csv', 'ndjson')
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': 'Файл не был передан'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        file_type = request.query_params.get(
+            'type',
+            os.path.splitext(upload.name)[1].lstrip('.').lower(),
+        )
+        if file_type not in self.file_types:
+            return Response({'type': 'Поддерживаются только CSV и NDJSON'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > settings.USER_IMPORT_SYNC_MAX_SIZE:
+            name = default_storage.save(f'imports/{upload.name}', upload)
+            task = import_users_task.delay(name, file_type)
+            return Response({'task_id': task.id},
+                            status=status.HTTP_202_ACCEPTED)
+        stream = io.TextIOWrapper(upload.file,
+                                  encoding='utf-8-sig',
+                                  newline='',
+                                  )
+        report = UserImporter().run(read_records(stream, file_type))
+        return Response(report, status=status.HTTP_200_OK)